@@ -0,0 +1 @@
+"""Benchmarks for the user access control API."""
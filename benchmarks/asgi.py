@@ -0,0 +1,71 @@
+"""Minimal in-process ASGI client used by the benchmarks."""
+import json
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+
+async def request(
+    app,
+    method: str,
+    path: str,
+    json_body: Any = None,
+    body: Optional[bytes] = None,
+    headers: Optional[Dict[str, str]] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> Tuple[int, Dict[str, str], bytes]:
+    """
+    Send one HTTP request straight to an ASGI app, without sockets.
+
+    Args:
+        app: ASGI application
+        method: HTTP method
+        path: Request path
+        json_body: Object to send as a JSON body
+        body: Raw request body (used when json_body is None)
+        headers: Extra request headers
+        params: Query string parameters
+
+    Returns:
+        Tuple of (status code, response headers, response body)
+    """
+    raw_headers = [(b"host", b"bench")]
+    if json_body is not None:
+        body = json.dumps(json_body).encode("utf-8")
+        raw_headers.append((b"content-type", b"application/json"))
+    body = body or b""
+    raw_headers.append((b"content-length", str(len(body)).encode()))
+    for name, value in (headers or {}).items():
+        raw_headers.append((name.lower().encode(), value.encode()))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": urlencode(params or {}).encode(),
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    response: Dict[str, Any] = {"status": 500, "headers": {}, "body": []}
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], b"".join(response["body"])
@@ -0,0 +1,95 @@
+"""
+Concurrent login throughput for POST /api/users/authenticate by bcrypt cost.
+
+Each run seeds a user whose hash uses the cost under test and sets the
+hasher to the same cost, so no rehashing happens during the measurement.
+Throughput is bounded by the hashing pool: expect roughly
+HASH_WORKERS / (time per bcrypt verification) logins per second.
+
+Usage:
+    python -m benchmarks.bench_auth [--costs 4,8,10,12] [--requests 64]
+                                    [--concurrency 16]
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List
+
+import bcrypt
+
+from benchmarks.loadtest import app, fake_db, summarize  # noqa: F401  (installs the in-memory database)
+from benchmarks.asgi import request
+from config import settings
+from services.hashing import password_hasher
+
+PASSWORD = "Benchmark#Pass1"
+
+
+async def run_cost(cost: int, requests: int, concurrency: int) -> Dict[str, Any]:
+    """Measure concurrent successful logins at one bcrypt cost."""
+    username = f"bench_auth_{cost}"
+    fake_db[settings.USERS_COLLECTION].add({
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(cost)).decode("utf-8"),
+        "is_active": True,
+    })
+    password_hasher.rounds = cost
+    body = {"username": username, "password": PASSWORD}
+
+    # Warm the worker pool so process start-up is not measured
+    await request(app, "POST", "/api/users/authenticate", json_body=body)
+
+    slots = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+
+    async def login() -> None:
+        async with slots:
+            start = time.perf_counter()
+            status, _, _ = await request(app, "POST", "/api/users/authenticate", json_body=body)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(requests)))
+    result = summarize(latencies, time.perf_counter() - start)
+    result["cost"] = cost
+    result["statuses"] = statuses
+    return result
+
+
+async def run(costs: List[int], requests: int, concurrency: int) -> List[Dict[str, Any]]:
+    """Benchmark every cost factor in turn."""
+    original = password_hasher.rounds
+    try:
+        return [await run_cost(cost, requests, concurrency) for cost in costs]
+    finally:
+        password_hasher.rounds = original
+        password_hasher.shutdown()
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--costs", default="4,8,10,12", help="comma-separated bcrypt cost factors")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    costs = [int(cost) for cost in args.costs.split(",")]
+    results = asyncio.run(run(costs, args.requests, args.concurrency))
+    print(
+        f"POST /api/users/authenticate, {args.requests} logins, concurrency {args.concurrency}, "
+        f"{password_hasher.workers} {password_hasher.executor_type} worker(s)"
+    )
+    print(f"  {'cost':>4}  {'logins/s':>9}  {'p50 ms':>9}  {'p95 ms':>9}  statuses")
+    for result in results:
+        print(
+            f"  {result['cost']:>4}  {result['req_per_sec']:>9.1f}  {result['p50_ms']:>9.1f}  "
+            f"{result['p95_ms']:>9.1f}  {result['statuses']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Per-request CPU cost of the get_user response path, validated vs. fast.
+
+The user is served from the cache so the numbers isolate routing, response
+model validation and JSON encoding from database latency.
+
+Usage:
+    python -m benchmarks.bench_responses [--requests 5000]
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from bson import ObjectId
+from config import settings
+from main import app
+from services.cache import user_cache
+from benchmarks.asgi import request
+from responses import FastJSONResponse
+from schemas.user_schema import UserApiResponse
+
+
+def _sample_user() -> dict:
+    """Build a cached user payload shaped like user_helper output."""
+    now = datetime(2024, 1, 1, 12, 30, 45, 123000)
+    return {
+        "id": str(ObjectId()),
+        "username": "benchmark_user",
+        "email": "benchmark@example.com",
+        "full_name": "Benchmark User",
+        "is_active": True,
+        "mobile": "1234567890",
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+async def _measure(path: str, requests: int) -> float:
+    """Return CPU microseconds per request for GET ``path``."""
+    for _ in range(min(200, requests)):
+        await request(app, "GET", path)
+
+    start = time.process_time()
+    for _ in range(requests):
+        status, _, _ = await request(app, "GET", path)
+        assert status == 200, status
+    return (time.process_time() - start) / requests * 1e6
+
+
+def _measure_serialization(content: dict, iterations: int) -> dict:
+    """Return CPU microseconds per call for the serialization step alone."""
+    start = time.process_time()
+    for _ in range(iterations):
+        model = UserApiResponse.model_validate(content)
+        json.dumps(model.model_dump(mode="json"), separators=(",", ":"))
+    validated = (time.process_time() - start) / iterations * 1e6
+
+    start = time.process_time()
+    for _ in range(iterations):
+        FastJSONResponse(content)
+    fast = (time.process_time() - start) / iterations * 1e6
+    return {"validated_us": round(validated, 2), "fast_us": round(fast, 2)}
+
+
+async def run(requests: int) -> dict:
+    """Benchmark both response modes and return the results."""
+    user = _sample_user()
+    user_cache.set(user)
+    path = f"/api/users/{user['id']}"
+
+    original = settings.FAST_JSON_RESPONSES
+    try:
+        settings.FAST_JSON_RESPONSES = False
+        validated = await _measure(path, requests)
+        settings.FAST_JSON_RESPONSES = True
+        fast = await _measure(path, requests)
+    finally:
+        settings.FAST_JSON_RESPONSES = original
+
+    return {
+        "requests": requests,
+        "validated_cpu_us": round(validated, 1),
+        "fast_cpu_us": round(fast, 1),
+        "speedup": round(validated / fast, 2) if fast else None,
+        "serialization": _measure_serialization({"status": "success", "data": user}, requests * 4),
+    }
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.requests))
+    print(f"GET /api/users/{{user_id}} (cached), {results['requests']} requests")
+    print(f"  validated response path: {results['validated_cpu_us']:>8.1f} us CPU/request")
+    print(f"  fast response path:      {results['fast_cpu_us']:>8.1f} us CPU/request")
+    print(f"  speedup:                 {results['speedup']:>8.2f}x")
+    serialization = results["serialization"]
+    print("Serialization step only")
+    print(f"  validate + encode:       {serialization['validated_us']:>8.2f} us CPU/call")
+    print(f"  fast render:             {serialization['fast_us']:>8.2f} us CPU/call")
+
+
+if __name__ == "__main__":
+    main()
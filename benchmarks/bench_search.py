@@ -0,0 +1,243 @@
+"""
+Prefix search latency on a synthetic user population (default one million).
+
+Builds the in-memory full-name index the way a worker does and times
+typeahead queries against it, plus incremental index updates. With
+``--mongo-uri`` the same dataset is loaded into a scratch database on a
+real server and the username/email range queries behind
+GET /api/users/search are timed too, with the index keys each one examined.
+The target is under 5 ms per query.
+
+Usage:
+    python -m benchmarks.bench_search [--users 1000000] [--queries 2000]
+                                      [--limit 10] [--mongo-uri mongodb://localhost:27017]
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from bson import ObjectId
+
+from benchmarks.loadtest import percentile
+from config import settings
+from repositories.user_repository import DEFAULT_PROJECTION
+from services.search import NameIndex, normalize_name
+from utils import prefix_range
+
+SYLLABLES = [
+    "an", "ar", "be", "bo", "ca", "da", "de", "el", "en", "fa", "ga", "ha", "he", "in", "is", "ja", "jo", "ka",
+    "ki", "la", "le", "li", "lo", "ma", "mi", "mo", "na", "ne", "ni", "no", "ol", "ra", "re", "ri", "ro", "sa",
+    "se", "si", "ta", "te", "ti", "to", "va", "vi", "wa", "ya", "yo", "za", "ze", "zo",
+]
+ACCENTED = ["José", "Zoë", "Björn", "Ramírez", "Núñez", "Müller", "Dvořák", "Łukasz", "Søren", "Renée"]
+DOMAINS = ["example.com", "mail.test", "corp.example", "users.example.org"]
+SEARCH_DB = "user_info_bench_search"
+
+
+def _word(rng: random.Random, syllables: int) -> str:
+    """A pronounceable capitalized word."""
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables)).capitalize()
+
+
+def synthetic_users(count: int, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """
+    Yield ``count`` user documents with realistic name skew.
+
+    First names come from a pool of 4,000 and surnames from 60,000, so
+    short prefixes match many users; a fifth have a middle name and a few
+    have accented names.
+    """
+    rng = random.Random(seed)
+    first_names = [_word(rng, rng.randint(2, 3)) for _ in range(4000)] + ACCENTED[:3]
+    last_names = [_word(rng, rng.randint(2, 4)) for _ in range(60000)] + ACCENTED[3:]
+    start = datetime(2020, 1, 1)
+    for i in range(count):
+        first, last = rng.choice(first_names), rng.choice(last_names)
+        middle = f" {rng.choice(first_names)}" if rng.random() < 0.2 else ""
+        handle = normalize_name(f"{first}{last}").replace(" ", "")
+        created = start + timedelta(seconds=i * 7)
+        yield {
+            "_id": ObjectId(),
+            "username": f"{handle}{i}",
+            "email": f"{handle[:12]}.{i}@{DOMAINS[i % len(DOMAINS)]}",
+            "full_name": f"{first}{middle} {last}",
+            "is_active": True,
+            "created_at": created,
+            "updated_at": created,
+        }
+
+
+def sample_queries(samples: List[Dict[str, Any]], count: int, seed: int = 7) -> Dict[str, List[str]]:
+    """Typeahead queries as users type them: 1-4 characters, and into a second word."""
+    rng = random.Random(seed)
+    queries: Dict[str, List[str]] = {"name 1 char": [], "name 2 chars": [], "name 4 chars": [], "name 2 words": []}
+    handles: List[str] = []
+    for _ in range(count):
+        user = rng.choice(samples)
+        words = normalize_name(user["full_name"]).split(" ")
+        word = rng.choice(words)
+        queries["name 1 char"].append(word[:1])
+        queries["name 2 chars"].append(word[:2])
+        queries["name 4 chars"].append(word[:4])
+        queries["name 2 words"].append(f"{words[0]} {words[1][:2]}")
+        handles.append(user["username"][:rng.randint(2, 6)])
+    queries["username"] = handles
+    queries["email"] = handles
+    return queries
+
+
+def summarize_ms(latencies: List[float]) -> Dict[str, float]:
+    """Latency percentiles in milliseconds."""
+    values = sorted(latencies)
+    return {
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "max_ms": values[-1] * 1000 if values else 0.0,
+    }
+
+
+def bench_name_index(
+    users: int, queries: int, limit: int, mongo_batches: Optional[List[List[Dict[str, Any]]]] = None
+) -> Dict[str, Any]:
+    """Build the name index over the synthetic users and time queries and updates."""
+    index = NameIndex(repo=None)
+    samples: List[Dict[str, Any]] = []
+    every = max(1, users // 5000)
+    start = time.perf_counter()
+    for i, user in enumerate(synthetic_users(users)):
+        index.add_user(user)
+        if i % every == 0:
+            samples.append(user)
+        if mongo_batches is not None:
+            if not mongo_batches or len(mongo_batches[-1]) >= 10000:
+                mongo_batches.append([])
+            mongo_batches[-1].append(user)
+    build_seconds = time.perf_counter() - start
+    index.ready = True
+
+    query_sets = sample_queries(samples, queries)
+    timings: Dict[str, Dict[str, float]] = {}
+    for name, texts in query_sets.items():
+        if not name.startswith("name"):
+            continue
+        latencies, found = [], 0
+        for text in texts:
+            start = time.perf_counter()
+            found += len(index.search(normalize_name(text), limit))
+            latencies.append(time.perf_counter() - start)
+        timings[name] = {**summarize_ms(latencies), "avg_results": found / len(texts)}
+
+    updates = samples[:1000]
+    start = time.perf_counter()
+    for user in updates:
+        index.replace_user(user["full_name"], {**user, "full_name": f"Renamed {user['full_name']}"})
+    rename_us = (time.perf_counter() - start) / len(updates) * 1e6
+    start = time.perf_counter()
+    for user in updates:
+        index.remove_user({**user, "full_name": f"Renamed {user['full_name']}"})
+    remove_us = (time.perf_counter() - start) / len(updates) * 1e6
+    start = time.perf_counter()
+    index.add_users(updates)
+    add_us = (time.perf_counter() - start) / len(updates) * 1e6
+
+    return {
+        "users": users,
+        "build_seconds": build_seconds,
+        **index.keys.stats(),
+        "queries": timings,
+        "add_us": add_us,
+        "rename_us": rename_us,
+        "remove_us": remove_us,
+        "query_sets": query_sets,
+    }
+
+
+async def bench_mongo(
+    uri: str, batches: List[List[Dict[str, Any]]], query_sets: Dict[str, List[str]], limit: int
+) -> Dict[str, Dict[str, float]]:
+    """Load the dataset into a scratch database and time the username/email range queries."""
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from services.db import USER_INDEXES
+
+    client = AsyncIOMotorClient(uri)
+    collection = client[SEARCH_DB][settings.USERS_COLLECTION]
+    total = sum(len(batch) for batch in batches)
+    try:
+        if await collection.estimated_document_count() != total:
+            await collection.drop()
+            for batch in batches:
+                await collection.insert_many(batch, ordered=False)
+        for keys, options in USER_INDEXES:
+            await collection.create_index(keys, **options)
+
+        results: Dict[str, Dict[str, float]] = {}
+        for field in ("username", "email"):
+            latencies, examined = [], 0
+            for text in query_sets[field]:
+                query = {field: prefix_range(text)}
+                start = time.perf_counter()
+                await collection.find(query, DEFAULT_PROJECTION).sort(field, 1).limit(limit).to_list(length=limit)
+                latencies.append(time.perf_counter() - start)
+            for text in query_sets[field][:50]:
+                plan = await collection.find({field: prefix_range(text)}).sort(field, 1).limit(limit).explain()
+                examined = max(examined, plan["executionStats"]["totalKeysExamined"])
+            results[field] = {**summarize_ms(latencies), "max_keys_examined": examined}
+
+        # The $in fetch that re-checks full-name candidates
+        ids = [user["_id"] for user in batches[0][:limit]]
+        latencies = []
+        for _ in range(len(query_sets["username"])):
+            start = time.perf_counter()
+            await collection.find({"_id": {"$in": ids}}, DEFAULT_PROJECTION).to_list(length=limit)
+            latencies.append(time.perf_counter() - start)
+        results["name candidates ($in)"] = summarize_ms(latencies)
+        return results
+    finally:
+        client.close()
+
+
+def print_table(title: str, rows: Dict[str, Dict[str, float]]) -> None:
+    """Print one latency table."""
+    print(title)
+    print(f"  {'query':<24}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for name, row in rows.items():
+        extra = "".join(
+            f"  {key}={value:.1f}" if isinstance(value, float) else f"  {key}={value}"
+            for key, value in row.items() if not key.endswith("_ms")
+        )
+        print(
+            f"  {name:<24}{row['p50_ms']:>9.3f}{row['p95_ms']:>9.3f}{row['p99_ms']:>9.3f}{row['max_ms']:>9.3f}{extra}"
+        )
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000, help="queries per query type")
+    parser.add_argument("--limit", type=int, default=settings.SEARCH_DEFAULT_LIMIT)
+    parser.add_argument("--mongo-uri", help=f"also time range queries on this server (database {SEARCH_DB})")
+    args = parser.parse_args()
+
+    batches: Optional[List[List[Dict[str, Any]]]] = [] if args.mongo_uri else None
+    result = bench_name_index(args.users, args.queries, args.limit, batches)
+    print(
+        f"Name index: {result['users']} users, {result['keys']} keys in {result['blocks']} blocks, "
+        f"{result['memory_bytes'] / 2 ** 20:.1f} MiB, built in {result['build_seconds']:.1f} s"
+    )
+    print(
+        f"  per update: add {result['add_us']:.1f} us, rename {result['rename_us']:.1f} us, "
+        f"remove {result['remove_us']:.1f} us"
+    )
+    print_table(f"Name index lookups (limit {args.limit})", result["queries"])
+    if args.mongo_uri:
+        rows = asyncio.run(bench_mongo(args.mongo_uri, batches, result["query_sets"], args.limit))
+        print_table(f"MongoDB round trips (limit {args.limit})", rows)
+
+
+if __name__ == "__main__":
+    main()
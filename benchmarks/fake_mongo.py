@@ -0,0 +1,447 @@
+"""
+In-memory stand-in for the Motor collection API used by UserRepository.
+
+Implements the subset of the query language, projections, unique indexes
+and bulk-write error reporting the application relies on, so the API can
+be exercised offline without a MongoDB server.
+"""
+import bisect
+import copy
+import re
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo.results import (
+    BulkWriteResult,
+    DeleteResult,
+    InsertManyResult,
+    InsertOneResult,
+    UpdateResult,
+)
+
+_MISSING = object()
+
+
+def _get(doc: Dict[str, Any], key: str) -> Any:
+    """Read a field, distinguishing missing from None."""
+    return doc.get(key, _MISSING)
+
+
+def _compare(value: Any, op: str, operand: Any) -> bool:
+    """Evaluate one query operator against a field value."""
+    if op == "$in":
+        return value in operand
+    if op == "$nin":
+        return value not in operand
+    if op == "$ne":
+        return value != operand
+    if op == "$eq":
+        return value == operand
+    if op == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if op == "$regex":
+        return value is not _MISSING and re.search(operand, value) is not None
+    if value is _MISSING or value is None:
+        return False
+    try:
+        if op == "$gt":
+            return value > operand
+        if op == "$gte":
+            return value >= operand
+        if op == "$lt":
+            return value < operand
+        if op == "$lte":
+            return value <= operand
+    except TypeError:
+        return False
+    raise NotImplementedError(op)
+
+
+def matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    """Evaluate the subset of the MongoDB query language the app uses."""
+    for key, cond in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in cond):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, sub) for sub in cond):
+                return False
+        elif isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+            value = _get(doc, key)
+            if not all(_compare(value, op, operand) for op, operand in cond.items()):
+                return False
+        else:
+            value = _get(doc, key)
+            if value is _MISSING or value != cond:
+                return False
+    return True
+
+
+def project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply an inclusion or exclusion projection."""
+    if not projection:
+        return copy.copy(doc)
+    include = {k for k, v in projection.items() if v and k != "_id"}
+    if include or projection.get("_id"):
+        out = {k: doc[k] for k in include if k in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            out["_id"] = doc["_id"]
+        return out
+    return {k: v for k, v in doc.items() if k not in projection}
+
+
+class FakeCursor:
+    """Async cursor over a materialized result list."""
+
+    def __init__(self, collection: "FakeCollection", query, projection):
+        """Initialize a lazily evaluated cursor."""
+        self._collection = collection
+        self._query = query or {}
+        self._projection = projection
+        self._sort = None
+        self._limit = 0
+        self._results: Optional[List[Dict[str, Any]]] = None
+
+    def sort(self, key_or_list, direction=None):
+        """Set the sort specification."""
+        if isinstance(key_or_list, str):
+            key_or_list = [(key_or_list, direction or 1)]
+        self._sort = list(key_or_list)
+        return self
+
+    def limit(self, n: int):
+        """Limit the number of results."""
+        self._limit = n
+        return self
+
+    def batch_size(self, n: int):
+        """Accept a batch size (results are already in memory)."""
+        return self
+
+    def hint(self, index):
+        """Accept an index hint (ignored)."""
+        return self
+
+    def _materialize(self) -> List[Dict[str, Any]]:
+        """Run the query once and keep the results."""
+        if self._results is None:
+            self._collection.calls["find"] += 1
+            docs = self._collection._matching(self._query)
+            if self._sort:
+                for field, direction in reversed(self._sort):
+                    docs.sort(key=lambda d: (d.get(field) is None, d.get(field)), reverse=direction < 0)
+            if self._limit:
+                docs = docs[: self._limit]
+            self._results = [project(d, self._projection) for d in docs]
+        return self._results
+
+    def __aiter__(self):
+        """Iterate asynchronously over the results."""
+        self._iter = iter(self._materialize())
+        return self
+
+    async def __anext__(self):
+        """Return the next result."""
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length=None):
+        """Return up to ``length`` results as a list."""
+        results = self._materialize()
+        return list(results if length is None else results[:length])
+
+
+class FakeCollection:
+    """
+    Dictionary-backed collection with unique username/email indexes.
+
+    Lookups by ``_id`` (including ``$in``) and by the unique fields are
+    answered from hash maps, like indexed queries, and ``$gte``/``$lt``
+    ranges on the unique fields from a sorted copy of those maps; anything
+    else scans.
+    """
+
+    def __init__(self, name: str = "users", unique_fields=("username", "email")):
+        """Initialize an empty collection."""
+        self.name = name
+        self.docs: Dict[Any, Dict[str, Any]] = {}
+        self.unique_fields = tuple(unique_fields)
+        self._unique: Dict[str, Dict[Any, Any]] = {field: {} for field in self.unique_fields}
+        # Sorted unique-field values, rebuilt on the first range query after a write
+        self._sorted: Dict[str, Optional[List[Any]]] = {field: None for field in self.unique_fields}
+        self.indexes: Dict[str, Dict[str, Any]] = {"_id_": {"key": {"_id": 1}}}
+        self.calls: Dict[str, int] = {
+            "find_one": 0, "find": 0, "insert_one": 0, "insert_many": 0,
+            "find_one_and_update": 0, "find_one_and_delete": 0, "delete_one": 0,
+            "delete_many": 0, "update_many": 0, "update_one": 0, "bulk_write": 0, "count_documents": 0,
+        }
+
+    def with_options(self, **kwargs):
+        """Return the same collection (read preferences do not apply)."""
+        return self
+
+    def reset_calls(self) -> None:
+        """Zero the per-method call counters."""
+        for key in self.calls:
+            self.calls[key] = 0
+
+    def add(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a document synchronously (for seeding test data)."""
+        document.setdefault("_id", ObjectId())
+        self._check_unique(document)
+        self._store(document)
+        return document
+
+    def _store(self, doc: Dict[str, Any]) -> None:
+        """Save a document and index its unique fields."""
+        self.docs[doc["_id"]] = doc
+        for field in self.unique_fields:
+            if doc.get(field) is not None:
+                self._unique[field][doc[field]] = doc["_id"]
+                self._sorted[field] = None
+
+    def _unstore(self, _id: Any) -> Dict[str, Any]:
+        """Remove a document and its unique-field entries."""
+        doc = self.docs.pop(_id)
+        for field in self.unique_fields:
+            if self._unique[field].get(doc.get(field)) == _id:
+                del self._unique[field][doc[field]]
+                self._sorted[field] = None
+        return doc
+
+    def _replace(self, _id: Any, new: Dict[str, Any]) -> None:
+        """Swap in an updated version of a document."""
+        self._unstore(_id)
+        self._store(new)
+
+    def _candidates(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Narrow the documents to scan using the hash indexes when possible."""
+        query = query or {}
+        key = query.get("_id", _MISSING)
+        if key is not _MISSING:
+            if isinstance(key, dict):
+                if set(key) == {"$in"}:
+                    return [self.docs[k] for k in dict.fromkeys(key["$in"]) if k in self.docs]
+            else:
+                doc = self.docs.get(key)
+                return [doc] if doc is not None else []
+        for field in self.unique_fields:
+            value = query.get(field, _MISSING)
+            if value is _MISSING:
+                continue
+            if not isinstance(value, dict):
+                _id = self._unique[field].get(value)
+                return [self.docs[_id]] if _id is not None else []
+            if "$gte" in value and set(value) <= {"$gte", "$lt"}:
+                return self._range(field, value["$gte"], value.get("$lt"))
+        return list(self.docs.values())
+
+    def _range(self, field: str, low: Any, high: Any) -> List[Dict[str, Any]]:
+        """Documents with ``low <= field < high`` (no upper bound if ``high`` is None)."""
+        if self._sorted[field] is None:
+            self._sorted[field] = sorted(self._unique[field])
+        values = self._sorted[field]
+        end = bisect.bisect_left(values, high) if high is not None else len(values)
+        return [self.docs[self._unique[field][value]] for value in values[bisect.bisect_left(values, low):end]]
+
+    def _check_unique(self, doc: Dict[str, Any], ignore_id=None) -> None:
+        """Raise DuplicateKeyError like a unique index would."""
+        if doc["_id"] in self.docs and doc["_id"] != ignore_id:
+            raise DuplicateKeyError(
+                "E11000 duplicate key error",
+                11000,
+                {"code": 11000, "keyPattern": {"_id": 1}, "keyValue": {"_id": doc["_id"]}},
+            )
+        for field in self.unique_fields:
+            value = doc.get(field)
+            if value is None:
+                continue
+            owner = self._unique[field].get(value)
+            if owner is not None and owner != ignore_id:
+                raise DuplicateKeyError(
+                    f"E11000 duplicate key error collection: {self.name} index: {field}_1 dup key",
+                    11000,
+                    {"code": 11000, "keyPattern": {field: 1}, "keyValue": {field: value}},
+                )
+
+    def _matching(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Return every document matching a query."""
+        return [doc for doc in self._candidates(query) if matches(doc, query or {})]
+
+    async def find_one(self, query=None, projection=None, **kwargs):
+        """Return the first matching document."""
+        self.calls["find_one"] += 1
+        for doc in self._candidates(query):
+            if matches(doc, query or {}):
+                return project(doc, projection)
+        return None
+
+    def find(self, query=None, projection=None, **kwargs):
+        """Return a cursor over matching documents."""
+        return FakeCursor(self, query, projection)
+
+    async def insert_one(self, document, **kwargs):
+        """Insert one document, assigning an _id like the driver does."""
+        self.calls["insert_one"] += 1
+        document.setdefault("_id", ObjectId())
+        self._check_unique(document)
+        self._store(copy.copy(document))
+        return InsertOneResult(document["_id"], True)
+
+    async def insert_many(self, documents, ordered=True, **kwargs):
+        """Insert documents, reporting failures as a BulkWriteError."""
+        self.calls["insert_many"] += 1
+        inserted, errors = [], []
+        for index, document in enumerate(documents):
+            document.setdefault("_id", ObjectId())
+            try:
+                self._check_unique(document)
+            except DuplicateKeyError as exc:
+                errors.append({"index": index, "errmsg": str(exc), **(exc.details or {})})
+                if ordered:
+                    break
+                continue
+            self._store(copy.copy(document))
+            inserted.append(document["_id"])
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(inserted)})
+        return InsertManyResult(inserted, True)
+
+    def _apply_update(self, doc, update):
+        """Apply a ``$set`` update to a copy of a document."""
+        new = copy.copy(doc)
+        for key, value in update.get("$set", {}).items():
+            new[key] = value
+        self._check_unique(new, ignore_id=doc["_id"])
+        return new
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=False, **kwargs):
+        """Update the first matching document and return it."""
+        self.calls["find_one_and_update"] += 1
+        for doc in self._matching(query)[:1]:
+            new = self._apply_update(doc, update)
+            self._replace(doc["_id"], new)
+            return project(new if return_document else doc, projection)
+        return None
+
+    async def find_one_and_delete(self, query, projection=None, **kwargs):
+        """Delete the first matching document and return it."""
+        self.calls["find_one_and_delete"] += 1
+        for doc in self._matching(query)[:1]:
+            self._unstore(doc["_id"])
+            return project(doc, projection)
+        return None
+
+    async def update_one(self, query, update, upsert=False, **kwargs):
+        """Update the first matching document, inserting one on ``upsert``."""
+        self.calls["update_one"] += 1
+        return self._update_one(query, update, upsert)
+
+    def _update_one(self, query, update, upsert):
+        """Apply an update_one without counting the call."""
+        for doc in self._matching(query)[:1]:
+            self._replace(doc["_id"], self._apply_update(doc, update))
+            return UpdateResult({"n": 1, "nModified": 1}, True)
+        if upsert:
+            seed = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+            seed.setdefault("_id", ObjectId())
+            doc = self._apply_update(seed, update)
+            self._store(doc)
+            return UpdateResult({"n": 1, "nModified": 0, "upserted": doc["_id"]}, True)
+        return UpdateResult({"n": 0, "nModified": 0}, True)
+
+    async def update_many(self, query, update, **kwargs):
+        """Update every matching document."""
+        self.calls["update_many"] += 1
+        matched = self._matching(query)
+        modified = 0
+        for doc in matched:
+            new = self._apply_update(doc, update)
+            if new != doc:
+                self._replace(doc["_id"], new)
+                modified += 1
+        return UpdateResult({"n": len(matched), "nModified": modified}, True)
+
+    async def bulk_write(self, requests, ordered=True, **kwargs):
+        """Apply UpdateOne requests (the only kind the application sends)."""
+        self.calls["bulk_write"] += 1
+        matched = modified = upserted = 0
+        for op in requests:
+            result = self._update_one(op._filter, op._doc, op._upsert)
+            matched += result.matched_count
+            modified += result.modified_count
+            upserted += result.upserted_id is not None
+        return BulkWriteResult(
+            {"nMatched": matched, "nModified": modified, "nUpserted": upserted, "upserted": []}, True
+        )
+
+    async def delete_one(self, query, **kwargs):
+        """Delete the first matching document."""
+        self.calls["delete_one"] += 1
+        for doc in self._matching(query)[:1]:
+            self._unstore(doc["_id"])
+            return DeleteResult({"n": 1}, True)
+        return DeleteResult({"n": 0}, True)
+
+    async def delete_many(self, query, **kwargs):
+        """Delete every matching document."""
+        self.calls["delete_many"] += 1
+        doomed = self._matching(query)
+        for doc in doomed:
+            self._unstore(doc["_id"])
+        return DeleteResult({"n": len(doomed)}, True)
+
+    async def count_documents(self, query, **kwargs):
+        """Count matching documents."""
+        self.calls["count_documents"] += 1
+        return len(self._matching(query))
+
+    async def create_index(self, keys, **kwargs):
+        """Record an index definition."""
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+        name = kwargs.get("name") or "_".join(f"{k}_{v}" for k, v in keys)
+        self.indexes[name] = {"key": dict(keys), **kwargs}
+        return name
+
+    def list_indexes(self):
+        """Return a cursor over the recorded index definitions."""
+        cursor = FakeCursor(FakeCollection(), {}, None)
+        cursor._results = [{"name": name, **spec} for name, spec in self.indexes.items()]
+        return cursor
+
+
+class FakeDatabase:
+    """Database facade handing out FakeCollection instances by name."""
+
+    def __init__(self, name: str = "test"):
+        """Initialize an empty database."""
+        self.name = name
+        self._collections: Dict[str, FakeCollection] = {}
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        """Return (creating if needed) a collection by name."""
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(name)
+        return self._collections[name]
+
+    async def command(self, name, *args, **kwargs):
+        """Answer server commands such as ``ping``."""
+        return {"ok": 1.0}
+
+
+def install(name: str = None) -> FakeDatabase:
+    """
+    Point the application's database module at an in-memory database.
+
+    Must be called before application startup; ``connect_db`` then uses the
+    installed database instead of creating a Motor client.
+    """
+    from config import settings
+    import services.db as db_module
+
+    fake = FakeDatabase(name or settings.DB_NAME)
+    db_module.db = fake
+    return fake
@@ -0,0 +1,374 @@
+"""
+Offline load test for every user route, plus per-layer timings.
+
+Drives ``main:app`` through an in-process ASGI client against the
+in-memory collection from ``benchmarks.fake_mongo``, so it needs neither
+a network nor a MongoDB server. Results are printed as a table and can be
+written as JSON to diff between releases.
+
+Usage:
+    python -m benchmarks.loadtest [--requests 500] [--concurrency 16]
+                                  [--users 1000] [--output baseline.json]
+                                  [--compare previous.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List
+
+# bcrypt cost dominates create routes; keep it low unless asked otherwise.
+# Must be set before the application modules read their settings.
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from benchmarks import fake_mongo  # noqa: E402
+
+fake_db = fake_mongo.install()
+
+from config import settings  # noqa: E402
+from main import app  # noqa: E402
+from models.user_model import user_helper  # noqa: E402
+from routes.user_routes import user_service  # noqa: E402
+from services.availability import availability_index  # noqa: E402
+from services.search import name_index  # noqa: E402
+from benchmarks.asgi import request  # noqa: E402
+
+STRONG_PASSWORD = "Benchmark#Pass1"
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], wall_seconds: float) -> Dict[str, float]:
+    """Throughput and latency percentiles (milliseconds) for one scenario."""
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "req_per_sec": round(len(values) / wall_seconds, 1) if wall_seconds else 0.0,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+    }
+
+
+async def drive(
+    call: Callable[[int], Awaitable[Any]],
+    requests: int,
+    concurrency: int
+) -> Dict[str, float]:
+    """Run ``call(i)`` for i in range(requests) across concurrent workers."""
+    latencies: List[float] = []
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def expect(status: int, *allowed: int) -> None:
+    """Fail loudly if a route returned an unexpected status."""
+    if status not in allowed:
+        raise RuntimeError(f"Unexpected status {status}, expected {allowed}")
+
+
+async def seed(count: int) -> List[Dict[str, Any]]:
+    """Create ``count`` users through the bulk import route."""
+    rows = [
+        {
+            "username": f"seed_user_{i}",
+            "email": f"seed_user_{i}@example.com",
+            "password": STRONG_PASSWORD,
+            "full_name": f"Seed User {i}",
+        }
+        for i in range(count)
+    ]
+    status, _, body = await request(app, "POST", "/api/users/bulk", json_body=rows)
+    expect(status, 200)
+    created = [row for row in json.loads(body)["data"] if row["status"] == "created"]
+    return [{"id": row["id"], "username": rows[row["index"]]["username"]} for row in created]
+
+
+async def run_routes(users: List[Dict[str, Any]], requests: int, concurrency: int) -> Dict[str, Any]:
+    """Benchmark every route in routes/user_routes.py."""
+    results: Dict[str, Any] = {}
+    ids = [user["id"] for user in users]
+
+    async def create(i):
+        status, _, _ = await request(app, "POST", "/api/users/", json_body={
+            "username": f"load_user_{i}",
+            "email": f"load_user_{i}@example.com",
+            "password": STRONG_PASSWORD,
+        })
+        expect(status, 201)
+
+    def idempotent_body(i):
+        return {
+            "username": f"load_user_idem_{i}",
+            "email": f"load_user_idem_{i}@example.com",
+            "password": STRONG_PASSWORD,
+        }
+
+    async def create_idempotent(i):
+        status, _, _ = await request(
+            app, "POST", "/api/users/", json_body=idempotent_body(i), headers={"Idempotency-Key": f"load-{i}"}
+        )
+        expect(status, 201)
+
+    async def replay_idempotent(i):
+        status, headers, _ = await request(
+            app, "POST", "/api/users/", json_body=idempotent_body(i), headers={"Idempotency-Key": f"load-{i}"}
+        )
+        expect(status, 201)
+        assert headers.get("idempotent-replayed") == "true"
+
+    etags: Dict[str, str] = {}
+
+    async def get_by_id(i):
+        user_id = ids[i % len(ids)]
+        status, headers, _ = await request(app, "GET", f"/api/users/{user_id}")
+        expect(status, 200)
+        etags[user_id] = headers["etag"]
+
+    async def get_not_modified(i):
+        user_id = ids[i % len(ids)]
+        status, _, _ = await request(app, "GET", f"/api/users/{user_id}", headers={"If-None-Match": etags[user_id]})
+        expect(status, 304)
+
+    async def availability_free(i):
+        status, _, _ = await request(app, "GET", "/api/users/availability", params={"username": f"free_{i}"})
+        expect(status, 200)
+
+    async def availability_taken(i):
+        status, _, _ = await request(
+            app, "GET", "/api/users/availability", params={"username": users[i % len(users)]["username"]}
+        )
+        expect(status, 200)
+
+    async def search(i):
+        status, _, _ = await request(app, "GET", "/api/users/search", params={"q": f"seed_user_{i % 100}"})
+        expect(status, 200)
+
+    async def get_by_username(i):
+        status, _, _ = await request(app, "GET", f"/api/users/username/{users[i % len(users)]['username']}")
+        expect(status, 200)
+
+    async def update(i):
+        status, _, _ = await request(app, "PUT", f"/api/users/{ids[i % len(ids)]}", json_body={"full_name": f"Updated {i}"})
+        expect(status, 200)
+
+    async def list_page(i):
+        status, _, _ = await request(app, "GET", "/api/users/", params={"limit": 50})
+        expect(status, 200)
+
+    async def batch_get(i):
+        start = (i * 50) % len(ids)
+        status, _, _ = await request(app, "POST", "/api/users/batch-get", json_body={"ids": ids[start:start + 50]})
+        expect(status, 200)
+
+    async def bulk_update(i):
+        start = (i * 50) % len(ids)
+        status, _, _ = await request(app, "PATCH", "/api/users/bulk", json_body={
+            "ids": ids[start:start + 50], "update": {"full_name": f"Bulk {i}"}
+        })
+        expect(status, 200)
+
+    async def export(i):
+        status, _, _ = await request(app, "GET", "/api/users/export")
+        expect(status, 200)
+
+    async def bulk_import(i):
+        rows = [
+            {"username": f"bulk_{i}_{n}", "email": f"bulk_{i}_{n}@example.com", "password": STRONG_PASSWORD}
+            for n in range(20)
+        ]
+        status, _, _ = await request(app, "POST", "/api/users/bulk", json_body=rows)
+        expect(status, 200)
+
+    def credentials(i):
+        return {"username": users[i % len(users)]["username"], "password": STRONG_PASSWORD}
+
+    async def authenticate(i):
+        status, _, _ = await request(app, "POST", "/api/users/authenticate", json_body=credentials(i))
+        expect(status, 200)
+
+    tokens: List[str] = []
+
+    async def issue_token(i):
+        status, _, body = await request(app, "POST", "/api/users/token", json_body=credentials(i))
+        expect(status, 200)
+        tokens.append(json.loads(body)["data"]["access_token"])
+
+    async def introspect(i):
+        status, _, _ = await request(app, "POST", "/api/users/token/introspect", json_body={"token": tokens[i % len(tokens)]})
+        expect(status, 200)
+
+    async def revoke(i):
+        status, _, _ = await request(
+            app, "POST", "/api/users/token/revoke", headers={"Authorization": f"Bearer {tokens[i]}"}
+        )
+        expect(status, 200)
+
+    imported: List[str] = []
+
+    async def bulk_delete(i):
+        status, _, _ = await request(app, "POST", "/api/users/bulk-delete", json_body={"ids": imported[i * 50:i * 50 + 50]})
+        expect(status, 200)
+
+    created_for_delete: List[str] = []
+
+    async def delete(i):
+        status, _, _ = await request(app, "DELETE", f"/api/users/{created_for_delete[i]}")
+        expect(status, 204)
+
+    scenarios = [
+        ("POST /api/users/", create, requests),
+        ("POST /api/users/ (Idempotency-Key)", create_idempotent, requests),
+        ("POST /api/users/ (Idempotency-Key replay)", replay_idempotent, requests),
+        ("GET /api/users/{user_id}", get_by_id, requests),
+        ("GET /api/users/{user_id} (If-None-Match)", get_not_modified, requests),
+        ("GET /api/users/username/{username}", get_by_username, requests),
+        ("GET /api/users/availability (free)", availability_free, requests),
+        ("GET /api/users/availability (taken)", availability_taken, requests),
+        ("GET /api/users/search", search, requests),
+        ("PUT /api/users/{user_id}", update, requests),
+        ("GET /api/users/", list_page, requests),
+        ("POST /api/users/batch-get", batch_get, requests),
+        ("PATCH /api/users/bulk (50 ids)", bulk_update, requests),
+        ("GET /api/users/export", export, max(1, requests // 50)),
+        ("POST /api/users/bulk", bulk_import, max(1, requests // 20)),
+        ("POST /api/users/authenticate", authenticate, requests),
+        ("POST /api/users/token", issue_token, requests),
+        ("POST /api/users/token/introspect", introspect, requests),
+    ]
+    for name, call, count in scenarios:
+        results[name] = await drive(call, count, concurrency)
+
+    # Each token is revoked once
+    results["POST /api/users/token/revoke"] = await drive(revoke, len(tokens), concurrency)
+
+    # Delete the users created by the bulk import scenario, 50 per request
+    imported.extend(
+        str(doc["_id"]) for doc in fake_db[settings.USERS_COLLECTION].docs.values()
+        if doc["username"].startswith("bulk_")
+    )
+    results["POST /api/users/bulk-delete (50 ids)"] = await drive(bulk_delete, -(-len(imported) // 50), concurrency)
+
+    # Delete the users created by the create scenario
+    created_for_delete.extend(
+        str(doc["_id"]) for doc in fake_db[settings.USERS_COLLECTION].docs.values()
+        if doc["username"].startswith("load_user_")
+    )
+    results["DELETE /api/users/{user_id}"] = await drive(delete, len(created_for_delete), concurrency)
+    return results
+
+
+async def run_layers(users: List[Dict[str, Any]], iterations: int) -> Dict[str, Any]:
+    """Time a single-user read at each layer, sequentially."""
+    ids = [user["id"] for user in users]
+    repo = user_service.repo
+    document = await repo.get_by_id(ids[0])
+
+    async def route(i):
+        await request(app, "GET", f"/api/users/{ids[i % len(ids)]}")
+
+    async def service(i):
+        await user_service.get_user_by_id(ids[i % len(ids)])
+
+    async def repository(i):
+        await repo.get_by_id(ids[i % len(ids)])
+
+    async def helper(i):
+        user_helper(document)
+
+    return {
+        "route": await drive(route, iterations, 1),
+        "service": await drive(service, iterations, 1),
+        "repository": await drive(repository, iterations, 1),
+        "user_helper": await drive(helper, iterations, 1),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Seed data and run all benchmarks."""
+    if not args.cache:
+        user_service.cache.max_size = 0
+    users = await seed(args.users)
+    await availability_index.build()
+    await name_index.build()
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed_users": args.users,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            "cache_enabled": args.cache,
+            "fast_json_responses": settings.FAST_JSON_RESPONSES,
+        },
+        "routes": await run_routes(users, args.requests, args.concurrency),
+        "layers": await run_layers(users, args.requests),
+    }
+
+
+def print_table(title: str, rows: Dict[str, Dict[str, float]], previous: Dict[str, Dict[str, float]] = None) -> None:
+    """Print one results section, with changes against a previous run."""
+    print(f"\n{title}")
+    print(f"  {'name':<38} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, row in rows.items():
+        line = (
+            f"  {name:<38} {row['req_per_sec']:>10.1f} {row['p50_ms']:>9.3f}"
+            f" {row['p95_ms']:>9.3f} {row['p99_ms']:>9.3f}"
+        )
+        old = (previous or {}).get(name)
+        if old and old.get("p99_ms"):
+            change = (row["p99_ms"] - old["p99_ms"]) / old["p99_ms"] * 100
+            line += f"   p99 {change:+.1f}%"
+        print(line)
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Offline load test for the user API")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--users", type=int, default=1000, help="users to seed")
+    parser.add_argument("--cache", action="store_true", help="keep the user cache enabled")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--compare", help="previous JSON results to compare against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    previous = {}
+    if args.compare:
+        with open(args.compare) as handle:
+            previous = json.load(handle)
+
+    print_table("Routes", results["routes"], previous.get("routes"))
+    print_table("Layers (GET by id, sequential)", results["layers"], previous.get("layers"))
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(results, handle, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
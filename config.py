@@ -12,7 +12,32 @@ class Settings:
     MONGO_URI: str = os.getenv("MONGO_URL", "mongodb://localhost:27017")
     DB_NAME: str = "user_access_control"
     USERS_COLLECTION: str = "users"
-    
+    REVOKED_TOKENS_COLLECTION: str = "revoked_tokens"
+    IDEMPOTENCY_COLLECTION: str = "idempotency_keys"
+
+    # MongoDB Connection Pool (per worker process; total = workers x max pool size)
+    MONGO_MAX_POOL_SIZE: int = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+    MONGO_MIN_POOL_SIZE: int = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+    MONGO_MAX_IDLE_TIME_MS: int = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "60000"))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+    MONGO_CONNECT_TIMEOUT_MS: int = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+    MONGO_SOCKET_TIMEOUT_MS: int = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000"))
+    # Comma-separated wire compressors in preference order, e.g. "zstd,snappy,zlib"
+    # (zstd and snappy need their optional Python packages installed)
+    MONGO_COMPRESSORS: str = os.getenv("MONGO_COMPRESSORS", "")
+    # Read preference for listing, export and search; writes, logins and reads
+    # that fill the user cache or decide a write always go to the primary
+    MONGO_READ_PREFERENCE: str = os.getenv("MONGO_READ_PREFERENCE", "secondaryPreferred")
+    MONGO_MAX_STALENESS_SECONDS: int = int(os.getenv("MONGO_MAX_STALENESS_SECONDS", "-1"))
+    # Index creation at startup: "auto" (only missing), "always" or "skip" (run migrate.py)
+    DB_INDEX_BOOTSTRAP: str = os.getenv("DB_INDEX_BOOTSTRAP", "auto").lower()
+
+    # Health Checks (readiness is computed in the background and cached)
+    HEALTH_CHECK_INTERVAL: float = float(os.getenv("HEALTH_CHECK_INTERVAL", "5.0"))
+    HEALTH_CHECK_TIMEOUT: float = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2.0"))
+    HEALTH_FAILURE_THRESHOLD: int = int(os.getenv("HEALTH_FAILURE_THRESHOLD", "2"))
+
     # API Configuration
     API_TITLE: str = "User Access Control API"
     API_VERSION: str = "1.0.0"
@@ -21,8 +46,11 @@ class Settings:
     # CORS Configuration (Security: Don't allow all origins in production)
     CORS_ORIGINS: list = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:8080").split(",")
     CORS_ALLOW_CREDENTIALS: bool = False  # Set to True only if origins are specific
-    CORS_ALLOW_METHODS: list = ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
-    CORS_ALLOW_HEADERS: list = ["Content-Type", "Authorization"]
+    CORS_ALLOW_METHODS: list = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+    CORS_ALLOW_HEADERS: list = ["Content-Type", "Authorization", "Idempotency-Key"]
+    
+    # Response Rendering (serialize service payloads directly with orjson)
+    FAST_JSON_RESPONSES: bool = os.getenv("FAST_JSON_RESPONSES", "false").lower() == "true"
     
     # Password Configuration
     MIN_PASSWORD_LENGTH: int = 8
@@ -33,10 +61,85 @@ class Settings:
     # Logging Configuration
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    LOG_ASYNC: bool = os.getenv("LOG_ASYNC", "true").lower() == "true"
+    LOG_JSON: bool = os.getenv("LOG_JSON", "false").lower() == "true"
+    LOG_INFO_SAMPLE_RATE: float = float(os.getenv("LOG_INFO_SAMPLE_RATE", "1.0"))
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
     
     # Security
-    BCRYPT_ROUNDS: int = 12
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 
+    # Access Tokens (HMAC-signed with SECRET_KEY)
+    TOKEN_TTL_SECONDS: int = int(os.getenv("TOKEN_TTL_SECONDS", "900"))
+    TOKEN_REVOCATION_REFRESH_SECONDS: float = float(os.getenv("TOKEN_REVOCATION_REFRESH_SECONDS", "5.0"))
+
+    # Idempotency Keys for POST /api/users/
+    IDEMPOTENCY_BACKEND: str = os.getenv("IDEMPOTENCY_BACKEND", "memory")  # "memory" or "mongo" (shared by workers)
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_MAX_KEYS: int = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "100000"))
+    IDEMPOTENCY_WAIT_TIMEOUT: float = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "10.0"))
+    # How long a mongo-backend claim stays locked without renewal; the owner renews it while working
+    IDEMPOTENCY_LOCK_SECONDS: float = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60.0"))
+
+    # Username/Email Availability Filter (one Bloom filter key per username and per email)
+    AVAILABILITY_FILTER_ENABLED: bool = os.getenv("AVAILABILITY_FILTER_ENABLED", "true").lower() == "true"
+    AVAILABILITY_FILTER_CAPACITY: int = int(os.getenv("AVAILABILITY_FILTER_CAPACITY", "2000000"))
+    AVAILABILITY_FILTER_ERROR_RATE: float = float(os.getenv("AVAILABILITY_FILTER_ERROR_RATE", "0.01"))
+    AVAILABILITY_FILTER_REFRESH_SECONDS: float = float(os.getenv("AVAILABILITY_FILTER_REFRESH_SECONDS", "10.0"))
+    AVAILABILITY_FILTER_REBUILD_SECONDS: float = float(os.getenv("AVAILABILITY_FILTER_REBUILD_SECONDS", "3600"))  # 0 = never
+
+    # User Search (username/email prefixes use their indexes; full names use an in-memory index per worker)
+    SEARCH_DEFAULT_LIMIT: int = int(os.getenv("SEARCH_DEFAULT_LIMIT", "10"))
+    SEARCH_MAX_LIMIT: int = int(os.getenv("SEARCH_MAX_LIMIT", "50"))
+    SEARCH_NAME_INDEX_ENABLED: bool = os.getenv("SEARCH_NAME_INDEX_ENABLED", "true").lower() == "true"
+    SEARCH_NAME_INDEX_REFRESH_SECONDS: float = float(os.getenv("SEARCH_NAME_INDEX_REFRESH_SECONDS", "10.0"))
+    SEARCH_NAME_INDEX_REBUILD_SECONDS: float = float(os.getenv("SEARCH_NAME_INDEX_REBUILD_SECONDS", "3600"))  # 0 = never
+
+    # Password Hashing Executor
+    HASH_EXECUTOR: str = os.getenv("HASH_EXECUTOR", "process")  # "process" or "thread"
+    HASH_WORKERS: int = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+    HASH_MAX_PENDING: int = int(os.getenv("HASH_MAX_PENDING", "64"))
+    HASH_QUEUE_TIMEOUT: float = float(os.getenv("HASH_QUEUE_TIMEOUT", "5.0"))
+    HASH_BATCH_CHUNK_SIZE: int = int(os.getenv("HASH_BATCH_CHUNK_SIZE", "8"))  # passwords per bulk-hashing job
+
+    # User Cache Configuration (set either value to 0 to disable)
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+    USER_CACHE_TTL_SECONDS: float = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    USER_CACHE_BACKEND: str = os.getenv("USER_CACHE_BACKEND", "memory")  # "memory" (per worker) or "shm" (per host)
+    USER_CACHE_SHM_PATH: str = os.getenv(
+        "USER_CACHE_SHM_PATH",
+        os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else "/tmp", f"user_info-{DB_NAME}-users")
+    )
+    USER_CACHE_SHM_SLOTS: int = int(os.getenv("USER_CACHE_SHM_SLOTS", "32768"))
+    USER_CACHE_SHM_SLOT_BYTES: int = int(os.getenv("USER_CACHE_SHM_SLOT_BYTES", "512"))
+
+    # Cross-Worker Cache Invalidation
+    INVALIDATION_BUS: str = os.getenv("INVALIDATION_BUS", "none")  # "none", "local" (one host) or "mongo"
+    INVALIDATION_SOCKET_DIR: str = os.getenv("INVALIDATION_SOCKET_DIR", "/tmp/user_info-invalidation")
+    INVALIDATION_FALLBACK_TTL_SECONDS: float = float(os.getenv("INVALIDATION_FALLBACK_TTL_SECONDS", "1.0"))
+    INVALIDATION_RETRY_SECONDS: float = float(os.getenv("INVALIDATION_RETRY_SECONDS", "1.0"))
+
+    # Batch Lookup Configuration
+    BATCH_GET_MAX_IDS: int = int(os.getenv("BATCH_GET_MAX_IDS", "500"))
+    BATCH_LOADER_ENABLED: bool = os.getenv("BATCH_LOADER_ENABLED", "true").lower() == "true"
+    BATCH_LOADER_MAX_SIZE: int = int(os.getenv("BATCH_LOADER_MAX_SIZE", "1000"))
+
+    # Listing Configuration
+    LIST_DEFAULT_PAGE_SIZE: int = int(os.getenv("LIST_DEFAULT_PAGE_SIZE", "50"))
+    LIST_MAX_PAGE_SIZE: int = int(os.getenv("LIST_MAX_PAGE_SIZE", "200"))
+
+    # Export Configuration
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    EXPORT_CHUNK_BYTES: int = int(os.getenv("EXPORT_CHUNK_BYTES", "65536"))
+
+    # Bulk Import Configuration
+    BULK_IMPORT_CHUNK_SIZE: int = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "1000"))
+    BULK_IMPORT_MAX_ROWS: int = int(os.getenv("BULK_IMPORT_MAX_ROWS", "100000"))
+
+    # Bulk Update/Delete Configuration
+    BULK_WRITE_CHUNK_SIZE: int = int(os.getenv("BULK_WRITE_CHUNK_SIZE", "1000"))
+    BULK_WRITE_MAX_IDS: int = int(os.getenv("BULK_WRITE_MAX_IDS", "10000"))
+
 
 settings = Settings()
@@ -3,7 +3,11 @@ import functools
 import logging
 from typing import Callable, Any
 from fastapi import HTTPException
-from exceptions import UserNotFoundError, InvalidUserIDError, DuplicateUserError, InvalidUserDataError
+from exceptions import (
+    UserNotFoundError, InvalidUserIDError, DuplicateUserError, InvalidUserDataError,
+    HashingOverloadedError, AuthenticationError, PreconditionFailedError,
+    IdempotencyKeyConflictError, IdempotencyKeyInProgressError
+)
 
 logger = logging.getLogger(__name__)
 
@@ -23,21 +27,36 @@ def handle_exceptions(func: Callable) -> Callable:
         try:
             return await func(*args, **kwargs)
         except InvalidUserIDError as e:
-            logger.warning(f"Invalid user ID: {str(e)}")
+            logger.warning("Invalid user ID: %s", e)
             raise HTTPException(status_code=400, detail=str(e))
         except InvalidUserDataError as e:
-            logger.warning(f"Invalid user data: {str(e)}")
+            logger.warning("Invalid user data: %s", e)
             raise HTTPException(status_code=400, detail=str(e))
         except UserNotFoundError as e:
-            logger.warning(f"User not found: {str(e)}")
+            logger.warning("User not found: %s", e)
             raise HTTPException(status_code=404, detail=str(e))
         except DuplicateUserError as e:
-            logger.warning(f"Duplicate user: {str(e)}")
+            logger.warning("Duplicate user: %s", e)
             raise HTTPException(status_code=409, detail=str(e))
+        except IdempotencyKeyInProgressError as e:
+            logger.warning("Idempotency key in progress: %s", e)
+            raise HTTPException(status_code=409, detail=str(e))
+        except IdempotencyKeyConflictError as e:
+            logger.warning("Idempotency key conflict: %s", e)
+            raise HTTPException(status_code=422, detail=str(e))
+        except PreconditionFailedError as e:
+            logger.warning("Precondition failed: %s", e)
+            raise HTTPException(status_code=412, detail=str(e))
+        except AuthenticationError as e:
+            logger.warning("Authentication failed: %s", e)
+            raise HTTPException(status_code=401, detail=str(e))
+        except HashingOverloadedError as e:
+            logger.warning("Hashing overloaded: %s", e)
+            raise HTTPException(status_code=503, detail=str(e))
         except HTTPException:
             raise
         except Exception as e:
-            logger.error(f"Unexpected error: {str(e)}", exc_info=True)
+            logger.error("Unexpected error: %s", e, exc_info=True)
             raise HTTPException(status_code=500, detail="Internal server error")
     
     return wrapper
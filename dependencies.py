@@ -0,0 +1,34 @@
+"""FastAPI dependencies."""
+from typing import Any, Dict, Optional
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from exceptions import AuthenticationError
+from services.tokens import token_service
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+async def require_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)
+) -> Dict[str, Any]:
+    """
+    Validate the bearer token in the Authorization header.
+    
+    Verification happens in-process (signature, expiry, revocation list);
+    no database call is made.
+    
+    Args:
+        credentials: Parsed Authorization header
+        
+    Returns:
+        Token claims
+        
+    Raises:
+        HTTPException: 401 if the token is missing or invalid
+    """
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Missing bearer token", headers={"WWW-Authenticate": "Bearer"})
+    try:
+        return token_service.verify(credentials.credentials)
+    except AuthenticationError as e:
+        raise HTTPException(status_code=401, detail=str(e), headers={"WWW-Authenticate": "Bearer"})
@@ -32,3 +32,38 @@ class InvalidUserDataError(UserException):
     def __init__(self, message: str = "Invalid user data"):
         self.message = message
         super().__init__(self.message)
+
+
+class HashingOverloadedError(UserException):
+    """Raised when the password hashing queue is saturated."""
+    def __init__(self, message: str = "Password hashing queue is full, retry later"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class AuthenticationError(UserException):
+    """Raised when credentials do not match an active user."""
+    def __init__(self, message: str = "Invalid credentials"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class PreconditionFailedError(UserException):
+    """Raised when an If-Match precondition does not hold."""
+    def __init__(self, message: str = "User has been modified; fetch it again and retry"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class IdempotencyKeyConflictError(UserException):
+    """Raised when an Idempotency-Key is reused with a different request body."""
+    def __init__(self, message: str = "Idempotency-Key was already used with a different request"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class IdempotencyKeyInProgressError(UserException):
+    """Raised when the original request for an Idempotency-Key is still running."""
+    def __init__(self, message: str = "A request with this Idempotency-Key is still in progress, retry later"):
+        self.message = message
+        super().__init__(self.message)
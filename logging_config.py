@@ -0,0 +1,124 @@
+"""Logging setup: optional background-thread handler, JSON output and sampling."""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from config import settings
+from services.metrics import registry
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["NonBlockingQueueHandler"] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Serialize a record with its timestamp, level, logger and message."""
+        payload = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of INFO-and-below records; always keep warnings and errors."""
+
+    def __init__(self, rate: float):
+        """Initialize with the fraction of low-severity records to keep."""
+        super().__init__()
+        self.rate = max(0.0, min(1.0, rate))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Decide whether to keep a record."""
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Enqueue records for a background listener without formatting them.
+
+    The stock QueueHandler formats every record in the calling thread so it
+    can be pickled; the queue here never leaves the process, so formatting
+    is left to the listener thread. When the queue is full the record is
+    dropped and counted rather than blocking the event loop.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        """Initialize with the queue shared with the listener."""
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Pass the record through unformatted."""
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Put a record on the queue, dropping it if the queue is full."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging() -> None:
+    """
+    Configure the root logger from settings.
+
+    - LOG_ASYNC: hand records to a QueueListener thread that does the
+      formatting and stderr writes, off the event loop
+    - LOG_JSON: emit one JSON object per line instead of LOG_FORMAT text
+    - LOG_INFO_SAMPLE_RATE: fraction of INFO/DEBUG records to keep
+    """
+    global _listener, _queue_handler
+    stop_logging()
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if settings.LOG_JSON else logging.Formatter(settings.LOG_FORMAT))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.setLevel(settings.LOG_LEVEL)
+
+    if settings.LOG_ASYNC:
+        _queue_handler = NonBlockingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+        handler: logging.Handler = _queue_handler
+        _listener = QueueListener(_queue_handler.queue, output, respect_handler_level=True)
+        _listener.start()
+    else:
+        handler = output
+
+    if settings.LOG_INFO_SAMPLE_RATE < 1.0:
+        handler.addFilter(SamplingFilter(settings.LOG_INFO_SAMPLE_RATE))
+    root.addHandler(handler)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the background listener, if any."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+
+
+atexit.register(stop_logging)
+
+registry.callback(
+    "log_records_dropped_total", "Log records dropped because the logging queue was full", "counter",
+    lambda: _queue_handler.dropped if _queue_handler is not None else 0
+)
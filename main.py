@@ -1,16 +1,26 @@
 """FastAPI application entry point."""
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from routes.user_routes import router as user_router
-from services.db import connect_db, close_db_connection
+from services.db import connect_db, close_db_connection, pool_monitor
+from services.health import health_monitor
+from services.tokens import token_service
+from services.availability import availability_index
+from services.search import name_index
+from services.idempotency import idempotency_store
+from services.invalidation import invalidation_bus
+from services.hashing import password_hasher
+from services.cache import user_cache
+from services.metrics import registry
+from middleware import MetricsMiddleware
 from config import settings
+from logging_config import configure_logging, stop_logging
 import logging
+import time
 
 # Configure logging
-logging.basicConfig(
-    level=settings.LOG_LEVEL,
-    format=settings.LOG_FORMAT
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Create FastAPI application
@@ -32,6 +42,9 @@ app.add_middleware(
     allow_headers=settings.CORS_ALLOW_HEADERS,
 )
 
+# Record request metrics (outermost, so CORS handling is timed too)
+app.add_middleware(MetricsMiddleware)
+
 # Register routers
 app.include_router(user_router)
 
@@ -40,14 +53,32 @@ app.include_router(user_router)
 async def startup():
     """Initialize application on startup."""
     logger.info("Starting application...")
-    await connect_db()
+    start = time.perf_counter()
+    timings = await connect_db()
+    await health_monitor.start()
+    await token_service.start()
+    await availability_index.start()
+    await name_index.start()
+    await invalidation_bus.start()
+    logger.info(
+        "Startup complete in %.1f ms (%s)",
+        (time.perf_counter() - start) * 1000,
+        ", ".join("%s=%.1f" % item for item in timings.items())
+    )
 
 
 @app.on_event("shutdown")
 async def shutdown():
     """Clean up on shutdown."""
     logger.info("Shutting down application...")
+    await health_monitor.stop()
+    await token_service.stop()
+    await availability_index.stop()
+    await name_index.stop()
+    await invalidation_bus.stop()
     await close_db_connection()
+    password_hasher.shutdown()
+    stop_logging()
 
 
 @app.get("/", tags=["health"])
@@ -56,22 +87,77 @@ async def health():
     return {"status": "ok", "message": "Service is running"}
 
 
+@app.get("/livez", tags=["health"])
+async def livez():
+    """Liveness probe: the process is serving requests (no I/O)."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz", tags=["health"])
+async def readyz():
+    """Readiness probe served from the cached background health check."""
+    snapshot = health_monitor.snapshot()
+    return JSONResponse(snapshot, status_code=503 if snapshot["status"] == "not_ready" else 200)
+
+
 @app.get("/api/health", tags=["health"])
 async def api_health():
-    """API health check with database connection status."""
-    try:
-        from services.db import db
-        await db.command("ping")
-        logger.info("Health check passed")
+    """API health check with database connection status (cached, no I/O)."""
+    if health_monitor.ready:
         return {
             "status": "healthy",
             "database": "connected"
         }
-    except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        return {
-            "status": "unhealthy",
-            "database": "disconnected",
-            "error": str(e)
-        }
+    return {
+        "status": "unhealthy",
+        "database": "disconnected",
+        "error": health_monitor.last_error or "health check has not succeeded yet"
+    }
+
+
+@app.get("/api/diagnostics/cache", tags=["diagnostics"])
+async def cache_stats():
+    """User cache hit/miss/eviction counters."""
+    return user_cache.stats()
+
+
+@app.get("/api/diagnostics/invalidation", tags=["diagnostics"])
+async def invalidation_stats():
+    """Cache invalidation bus state, message counts and lag."""
+    return invalidation_bus.stats()
+
+
+@app.get("/api/diagnostics/pool", tags=["diagnostics"])
+async def pool_stats():
+    """MongoDB connection pool usage and checkout wait times."""
+    return pool_monitor.stats()
+
+
+@app.get("/api/diagnostics/tokens", tags=["diagnostics"])
+async def token_stats():
+    """Revocation list size and refresh state."""
+    return token_service.revocations.stats()
+
+
+@app.get("/api/diagnostics/idempotency", tags=["diagnostics"])
+async def idempotency_stats():
+    """Stored and in-flight Idempotency-Key counts."""
+    return idempotency_store.stats()
+
+
+@app.get("/api/diagnostics/availability", tags=["diagnostics"])
+async def availability_stats():
+    """Availability filter memory footprint and false-positive rates."""
+    return availability_index.stats()
+
+
+@app.get("/api/diagnostics/search", tags=["diagnostics"])
+async def search_stats():
+    """Name search index size, memory footprint and stale candidates."""
+    return name_index.stats()
+
 
+@app.get("/metrics", tags=["diagnostics"], response_class=PlainTextResponse)
+async def metrics():
+    """Metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,46 @@
+"""ASGI middleware for request instrumentation."""
+import time
+from typing import Any, Dict
+from services.metrics import http_in_flight, http_request_duration, http_requests
+
+
+class MetricsMiddleware:
+    """
+    Record per-route latency, status codes and in-flight requests.
+
+    Implemented as plain ASGI rather than BaseHTTPMiddleware so it adds no
+    extra task or body buffering per request. Routes are labelled by their
+    path template (e.g. ``/api/users/{user_id}``) to keep label cardinality
+    bounded; requests that match no route are labelled ``unmatched``.
+    """
+
+    def __init__(self, app: Any, exclude_paths: tuple = ("/metrics",)):
+        """Wrap an ASGI application."""
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        """Time one request and record its outcome."""
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+        http_in_flight.inc()
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_request_duration.observe(time.perf_counter() - start, method, path)
+            http_requests.inc(method, path, str(status_code))
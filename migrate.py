@@ -0,0 +1,64 @@
+"""
+Create the MongoDB indexes the service relies on.
+
+Run once per deployment (or whenever REQUIRED_INDEXES changes) so application
+workers can start with DB_INDEX_BOOTSTRAP=skip:
+
+    python migrate.py            # create any missing indexes
+    python migrate.py --check    # report missing indexes, exit 1 if any
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from config import settings
+from logging_config import configure_logging, stop_logging
+from services.db import DB_NAME, create_client, create_indexes, missing_indexes
+
+logger = logging.getLogger("migrate")
+
+
+async def run(check: bool) -> int:
+    """
+    Check or create the indexes in REQUIRED_INDEXES.
+
+    Args:
+        check: Only report missing indexes instead of creating them
+
+    Returns:
+        Process exit code
+    """
+    client = create_client()
+    try:
+        database = client[DB_NAME]
+        missing = await missing_indexes(database)
+        if check:
+            for name, keys, options in missing:
+                logger.warning("Missing index on %s: %s %s", name, keys, options)
+            logger.info("%d of the required indexes are missing", len(missing))
+            return 1 if missing else 0
+
+        created = await create_indexes(database, only_missing=True)
+        logger.info("Migration complete: %d index(es) created on %s", created, DB_NAME)
+        return 0
+    finally:
+        client.close()
+
+
+def main() -> None:
+    """Parse arguments and run the migration."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="report missing indexes without creating them")
+    args = parser.parse_args()
+
+    configure_logging()
+    logger.info("Migrating %s on %s", DB_NAME, settings.MONGO_URI.split("@")[-1])
+    try:
+        code = asyncio.run(run(args.check))
+    finally:
+        stop_logging()
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,30 @@
 """User data model and helper functions."""
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Sequence
 
+# Fields exposed in user responses, in response order
+USER_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "full_name",
+    "is_active",
+    "mobile",
+    "created_at",
+    "updated_at",
+)
+
+
+def user_helper(user: Dict[str, Any], fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Transform MongoDB user document to response format (excludes password).
+
+    When ``fields`` is given only those response fields are produced, which
+    allows documents fetched with a narrowed projection.
+    """
+    if fields is not None:
+        return select_fields(user_helper_partial(user), fields)
 
-def user_helper(user: Dict[str, Any]) -> Dict[str, Any]:
-    """Transform MongoDB user document to response format (excludes password)."""
     return {
         "id": str(user["_id"]),
         "username": user["username"],
@@ -14,4 +34,32 @@ def user_helper(user: Dict[str, Any]) -> Dict[str, Any]:
         "mobile": user.get("mobile"),
         "created_at": user.get("created_at"),
         "updated_at": user.get("updated_at"),
-    }
\ No newline at end of file
+    }
+
+
+def user_helper_partial(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Transform a possibly projected document, skipping absent fields."""
+    result = {}
+    for field in USER_FIELDS:
+        if field == "id":
+            if "_id" in user:
+                result["id"] = str(user["_id"])
+        elif field == "is_active":
+            result["is_active"] = user.get("is_active", True)
+        elif field in user:
+            result[field] = user[field]
+    return result
+
+
+def select_fields(user: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    """Narrow a response payload to the requested fields."""
+    return {field: user.get(field) for field in fields}
+
+
+def fields_projection(fields: Sequence[str]) -> Dict[str, int]:
+    """Build the MongoDB inclusion projection for response fields."""
+    projection = {"_id": 1 if "id" in fields else 0}
+    for field in fields:
+        if field != "id":
+            projection[field] = 1
+    return projection
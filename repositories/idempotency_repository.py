@@ -0,0 +1,124 @@
+"""Repository for stored Idempotency-Key outcomes."""
+from datetime import datetime
+from typing import Any, Dict, Optional
+from pymongo.errors import DuplicateKeyError
+from config import settings
+from services.db import get_database
+from services.metrics import timed, db_operation_duration
+
+
+class IdempotencyRepository:
+    """
+    Store idempotency keys in MongoDB so every worker sees the same outcome.
+
+    A key starts as a ``pending`` claim held until ``locked_until`` and
+    becomes ``completed`` with the stored ``outcome``. ``expires_at`` drives
+    a TTL index, so completed keys disappear after the retention period and
+    claims left behind by a crashed worker disappear once their lock ends.
+    """
+
+    def __init__(self):
+        """Initialize; the collection is resolved on first use, after connect_db()."""
+        self._database = None
+        self._collection = None
+
+    @property
+    def collection(self):
+        """Idempotency keys collection."""
+        database = get_database()
+        if database is not self._database:
+            # First use, or the client was replaced by a reconnect
+            self._collection = database[settings.IDEMPOTENCY_COLLECTION]
+            self._database = database
+        return self._collection
+
+    @timed(db_operation_duration, "idempotency_claim")
+    async def claim(self, key: str, fingerprint: str, locked_until: datetime) -> Optional[Dict[str, Any]]:
+        """
+        Claim a key for a new request.
+
+        Args:
+            key: Idempotency key
+            fingerprint: Fingerprint of the request body
+            locked_until: When the claim may be taken over if still pending
+
+        Returns:
+            None if the key was claimed, otherwise the existing entry
+        """
+        try:
+            await self.collection.insert_one({
+                "_id": key,
+                "fingerprint": fingerprint,
+                "status": "pending",
+                "locked_until": locked_until,
+                "expires_at": locked_until,
+            })
+            return None
+        except DuplicateKeyError:
+            existing = await self.collection.find_one({"_id": key})
+            # The entry may have expired between the insert and the read
+            return existing or {"_id": key, "fingerprint": fingerprint, "status": "pending", "locked_until": locked_until}
+
+    @timed(db_operation_duration, "idempotency_take_over")
+    async def take_over(self, key: str, stale_until: datetime, fingerprint: str, locked_until: datetime) -> bool:
+        """
+        Take over a pending claim whose lock has run out.
+
+        Args:
+            key: Idempotency key
+            stale_until: ``locked_until`` of the claim being replaced
+            fingerprint: Fingerprint of the request body
+            locked_until: New lock expiry
+
+        Returns:
+            True if this caller now holds the claim
+        """
+        result = await self.collection.update_one(
+            {"_id": key, "status": "pending", "locked_until": stale_until},
+            {"$set": {"fingerprint": fingerprint, "locked_until": locked_until, "expires_at": locked_until}}
+        )
+        return result.modified_count > 0
+
+    @timed(db_operation_duration, "idempotency_renew")
+    async def renew(self, key: str, fingerprint: str, locked_until: datetime) -> bool:
+        """
+        Extend the lock of a pending claim that is still being worked on.
+
+        Args:
+            key: Idempotency key
+            fingerprint: Fingerprint of the claim's request body
+            locked_until: New lock expiry
+
+        Returns:
+            False if the claim is gone or no longer pending
+        """
+        result = await self.collection.update_one(
+            {"_id": key, "status": "pending", "fingerprint": fingerprint},
+            {"$set": {"locked_until": locked_until, "expires_at": locked_until}}
+        )
+        return result.matched_count > 0
+
+    @timed(db_operation_duration, "idempotency_complete")
+    async def complete(self, key: str, outcome: Dict[str, Any], expires_at: datetime) -> None:
+        """
+        Store the outcome of a claimed key.
+
+        Args:
+            key: Idempotency key
+            outcome: Stored result or error
+            expires_at: When the key may be reused
+        """
+        await self.collection.update_one(
+            {"_id": key},
+            {"$set": {"status": "completed", "outcome": outcome, "expires_at": expires_at}}
+        )
+
+    @timed(db_operation_duration, "idempotency_release")
+    async def release(self, key: str) -> None:
+        """
+        Drop a pending claim so the request can be retried.
+
+        Args:
+            key: Idempotency key
+        """
+        await self.collection.delete_one({"_id": key, "status": "pending"})
@@ -0,0 +1,84 @@
+"""Repository for revoked access tokens."""
+from datetime import datetime
+from typing import Any, Dict, List
+from pymongo import UpdateOne
+from config import settings
+from services.db import get_database
+from services.metrics import timed, db_operation_duration
+
+
+class RevocationRepository:
+    """
+    Store token revocations in MongoDB.
+
+    Each entry is either a single token (``_id`` = ``token:<jti>``) or every
+    token of a user issued up to ``revoked_at`` (``_id`` = ``user:<id>``).
+    ``expires_at`` is the latest moment a covered token can still be valid;
+    a TTL index removes the entry after that.
+    """
+
+    def __init__(self):
+        """Initialize; the collection is resolved on first use, after connect_db()."""
+        self._database = None
+        self._collection = None
+
+    @property
+    def collection(self):
+        """Revoked tokens collection."""
+        database = get_database()
+        if database is not self._database:
+            # First use, or the client was replaced by a reconnect
+            self._collection = database[settings.REVOKED_TOKENS_COLLECTION]
+            self._database = database
+        return self._collection
+
+    @timed(db_operation_duration, "revoke")
+    async def revoke(self, key: str, revoked_at: datetime, expires_at: datetime) -> None:
+        """
+        Record a revocation, replacing any earlier entry with the same key.
+
+        Args:
+            key: ``token:<jti>`` or ``user:<user id>``
+            revoked_at: Time of revocation
+            expires_at: When the entry is no longer needed
+        """
+        await self.collection.update_one(
+            {"_id": key},
+            {"$set": {"revoked_at": revoked_at, "expires_at": expires_at}},
+            upsert=True
+        )
+
+    @timed(db_operation_duration, "revoke_many")
+    async def revoke_many(self, keys: List[str], revoked_at: datetime, expires_at: datetime) -> None:
+        """
+        Record many revocations with one unordered bulk write.
+
+        Args:
+            keys: ``token:<jti>`` or ``user:<user id>`` keys
+            revoked_at: Time of revocation
+            expires_at: When the entries are no longer needed
+        """
+        if not keys:
+            return
+        await self.collection.bulk_write(
+            [
+                UpdateOne({"_id": key}, {"$set": {"revoked_at": revoked_at, "expires_at": expires_at}}, upsert=True)
+                for key in keys
+            ],
+            ordered=False
+        )
+
+    @timed(db_operation_duration, "load_revocations")
+    async def load_active(self, now: datetime) -> List[Dict[str, Any]]:
+        """
+        Fetch every revocation that still covers an unexpired token.
+
+        Args:
+            now: Current time; entries that expired earlier are skipped even if
+                the TTL monitor has not removed them yet
+
+        Returns:
+            Revocation documents
+        """
+        cursor = self.collection.find({"expires_at": {"$gt": now}})
+        return await cursor.to_list(length=None)
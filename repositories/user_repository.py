@@ -1,51 +1,171 @@
 """User repository for database operations."""
+import re
 from bson import ObjectId
-from services.db import get_user_collection
-from typing import Optional, Dict, Any
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from services.db import get_database, get_user_collection, get_user_read_collection
+from services.singleflight import SingleFlight
+from services.loader import BatchLoader
+from services.metrics import timed, db_operation_duration
+from config import settings
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+from datetime import datetime
 from exceptions import DuplicateUserError
+from utils import prefix_range
+
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Reads never fetch the password hash unless a caller asks for it explicitly
+DEFAULT_PROJECTION: Dict[str, Any] = {"password": 0}
+# Just enough of a user to check a login
+CREDENTIALS_PROJECTION: Dict[str, Any] = {"username": 1, "password": 1, "is_active": 1}
+_INDEX_NAME_PATTERN = re.compile(r"index: (\w+?)_\d")
+
+
+def _projection_key(projection: Dict[str, Any]) -> Tuple:
+    """Hashable form of a projection for request coalescing."""
+    return tuple(sorted(projection.items()))
+
+
+def duplicate_field(error: Dict[str, Any]) -> Optional[str]:
+    """
+    Identify which unique field caused a duplicate key error.
+    
+    Args:
+        error: Error details (a write error entry or DuplicateKeyError.details)
+        
+    Returns:
+        Name of the colliding field, or None if it cannot be determined
+    """
+    key_pattern = error.get("keyPattern") or error.get("keyValue")
+    if key_pattern:
+        return next(iter(key_pattern))
+
+    match = _INDEX_NAME_PATTERN.search(error.get("errmsg", ""))
+    return match.group(1) if match else None
 
 
 class UserRepository:
     """Repository class for user database operations."""
 
     def __init__(self):
-        """Initialize with user collection."""
-        self.collection = get_user_collection()
+        """Initialize; collections are resolved on first use, after connect_db()."""
+        self._database = None
+        self._collection = None
+        self._read_collection = None
+        self.inflight = SingleFlight()
+        self.loader = BatchLoader(self._load_by_ids, max_batch_size=settings.BATCH_LOADER_MAX_SIZE)
+        self.primary_loader = BatchLoader(
+            lambda object_ids: self._load_by_ids(object_ids, primary=True),
+            max_batch_size=settings.BATCH_LOADER_MAX_SIZE
+        )
+
+    def _resolve(self) -> None:
+        """Resolve the collections again whenever the database handle changed (e.g. after a reconnect)."""
+        database = get_database()
+        if database is not self._database:
+            self._collection = get_user_collection()
+            self._read_collection = get_user_read_collection()
+            self._database = database
+
+    @property
+    def collection(self):
+        """Users collection on the primary (writes)."""
+        self._resolve()
+        return self._collection
+
+    @property
+    def read_collection(self):
+        """Users collection with the configured read preference (listing, export, search)."""
+        self._resolve()
+        return self._read_collection
 
+    def _reader(self, primary: bool):
+        """Collection to read from: the primary, or the configured read preference."""
+        return self.collection if primary else self.read_collection
+
+    @timed(db_operation_duration)
     async def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Create a new user after checking for duplicates.
+        Create a new user in a single round trip.
+        
+        Uniqueness is enforced by the username/email unique indexes rather
+        than a separate lookup, which also closes the check-then-insert race.
         
         Args:
             data: User data dictionary
             
         Returns:
-            Created user document
+            Created user document (the inserted data with its ``_id``)
             
         Raises:
             DuplicateUserError: If user with same email/username exists
         """
-        # Check for duplicate username or email
-        existing_user = await self.collection.find_one({
-            "$or": [
-                {"email": data["email"]},
-                {"username": data["username"]}
-            ]
-        })
-
-        if existing_user:
+        try:
+            result = await self.collection.insert_one(data)
+        except DuplicateKeyError as e:
+            field = duplicate_field(e.details or {})
+            if field in ("username", "email"):
+                raise DuplicateUserError(f"User with this {field} already exists")
             raise DuplicateUserError("User with this email or username already exists")
 
-        result = await self.collection.insert_one(data)
-        user = await self.collection.find_one({"_id": result.inserted_id})
-        return user
+        return {**data, "_id": result.inserted_id}
+
+    @timed(db_operation_duration)
+    async def insert_many(self, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insert many users in one unordered batch.
+        
+        Duplicates are detected by the unique username/email indexes; a
+        failing document does not stop the rest of the batch.
+        
+        Args:
+            documents: User documents to insert
+            
+        Returns:
+            One outcome per document, in order: ``{"status": "created", "id": ...}``,
+            ``{"status": "duplicate", "field": ...}`` or ``{"status": "invalid", "error": ...}``
+        """
+        if not documents:
+            return []
+
+        errors: Dict[int, Dict[str, Any]] = {}
+        try:
+            await self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                errors[error["index"]] = error
 
-    async def get_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        outcomes = []
+        for index, document in enumerate(documents):
+            error = errors.get(index)
+            if error is None:
+                outcomes.append({"status": "created", "id": str(document["_id"])})
+            elif error.get("code") == DUPLICATE_KEY_ERROR:
+                outcomes.append({"status": "duplicate", "field": duplicate_field(error)})
+            else:
+                outcomes.append({"status": "invalid", "error": error.get("errmsg", "Write failed")})
+        return outcomes
+
+    @timed(db_operation_duration)
+    async def get_by_id(
+        self,
+        user_id: str,
+        projection: Optional[Dict[str, Any]] = None,
+        primary: bool = False
+    ) -> Optional[Dict[str, Any]]:
         """
         Get user by ID.
         
+        Concurrent lookups for the same ID share a single query, and when
+        the batch loader is enabled, default-projection lookups issued in
+        the same event-loop tick are combined into one ``$in`` query.
+        
         Args:
             user_id: User ID as string
+            projection: MongoDB projection (defaults to excluding password)
+            primary: Read from the primary instead of the GET read preference,
+                for reads that decide a write or fill the cache
             
         Returns:
             User document or None if not found
@@ -53,54 +173,263 @@ class UserRepository:
         if not ObjectId.is_valid(user_id):
             return None
 
-        return await self.collection.find_one({"_id": ObjectId(user_id)})
+        object_id = ObjectId(user_id)
+        if projection is None and settings.BATCH_LOADER_ENABLED:
+            loader = self.primary_loader if primary else self.loader
+            return await self.inflight.do(("id", object_id, primary), lambda: loader.load(object_id))
+
+        projection = projection or DEFAULT_PROJECTION
+        return await self.inflight.do(
+            ("id", object_id, _projection_key(projection), primary),
+            lambda: self._reader(primary).find_one({"_id": object_id}, projection)
+        )
+
+    @timed(db_operation_duration)
+    async def get_many(self, user_ids: List[str], primary: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Get many users by ID with a single ``$in`` query.
+        
+        Args:
+            user_ids: User IDs as strings (invalid IDs are ignored)
+            primary: Read from the primary instead of the GET read preference
+            
+        Returns:
+            Mapping of user ID string to user document for the users found
+        """
+        object_ids = list({ObjectId(user_id) for user_id in user_ids if ObjectId.is_valid(user_id)})
+        if not object_ids:
+            return {}
+
+        users = await self._load_by_ids(object_ids, primary)
+        return {str(object_id): user for object_id, user in users.items()}
+
+    async def _load_by_ids(self, object_ids: List[ObjectId], primary: bool = False) -> Dict[ObjectId, Dict[str, Any]]:
+        """Fetch users for a list of ObjectIds keyed by ``_id``."""
+        cursor = self._reader(primary).find({"_id": {"$in": object_ids}}, DEFAULT_PROJECTION)
+        return {user["_id"]: user async for user in cursor}
+
+    @timed(db_operation_duration)
+    async def list_page(
+        self,
+        limit: int,
+        after: Optional[Tuple[Optional[datetime], ObjectId]] = None,
+        is_active: Optional[bool] = None,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get one page of users, newest first, using keyset pagination.
+        
+        Users are ordered by (created_at, _id) descending and the page
+        starts strictly after the ``after`` position, so every page is a
+        bounded index range scan instead of a skip over earlier pages.
+        
+        Args:
+            limit: Maximum number of users to return
+            after: (created_at, _id) of the last user on the previous page
+            is_active: Optional active-status filter
+            projection: MongoDB projection (defaults to excluding password;
+                _id and created_at are always included for the cursor)
+            
+        Returns:
+            List of user documents
+        """
+        query: Dict[str, Any] = {}
+        if is_active is not None:
+            query["is_active"] = is_active
+
+        if after is not None:
+            created_at, last_id = after
+            if created_at is None:
+                # Users without a timestamp sort last; continue by _id among them
+                query["created_at"] = None
+                query["_id"] = {"$lt": last_id}
+            else:
+                query["$or"] = [
+                    {"created_at": {"$lt": created_at}},
+                    {"created_at": created_at, "_id": {"$lt": last_id}},
+                    {"created_at": None}
+                ]
+
+        if projection is None:
+            projection = DEFAULT_PROJECTION
+        elif any(projection.values()):
+            projection = {**projection, "_id": 1, "created_at": 1}
+
+        cursor = self.read_collection.find(query, projection).sort([("created_at", -1), ("_id", -1)]).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def iter_users(
+        self,
+        query: Dict[str, Any],
+        projection: Dict[str, Any] = DEFAULT_PROJECTION,
+        batch_size: int = settings.EXPORT_BATCH_SIZE,
+        sort: Optional[str] = "_id",
+        primary: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream users matching a query straight from the database cursor.
+        
+        Args:
+            query: MongoDB filter
+            projection: MongoDB projection (defaults to excluding password)
+            batch_size: Documents fetched per cursor round trip
+            sort: Field to sort on ascending, or None for natural order
+            primary: Read from the primary instead of the GET read preference
+            
+        Yields:
+            User documents in ``sort`` order
+        """
+        cursor = self._reader(primary).find(query, projection)
+        if sort is not None:
+            cursor = cursor.sort(sort, 1)
+        cursor = cursor.batch_size(batch_size)
+        async for user in cursor:
+            yield user
 
-    async def get_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+    @timed(db_operation_duration)
+    async def get_by_username(
+        self,
+        username: str,
+        projection: Optional[Dict[str, Any]] = None,
+        primary: bool = False
+    ) -> Optional[Dict[str, Any]]:
         """
         Get user by username.
         
+        Concurrent lookups for the same username share a single query.
+        
         Args:
             username: Username string
+            projection: MongoDB projection (defaults to excluding password)
+            primary: Read from the primary instead of the GET read preference
             
         Returns:
             User document or None if not found
         """
-        return await self.collection.find_one({"username": username})
+        projection = projection or DEFAULT_PROJECTION
+        return await self.inflight.do(
+            ("username", username, _projection_key(projection), primary),
+            lambda: self._reader(primary).find_one({"username": username}, projection)
+        )
 
-    async def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+    @timed(db_operation_duration)
+    async def get_by_email(
+        self,
+        email: str,
+        projection: Optional[Dict[str, Any]] = None,
+        primary: bool = False
+    ) -> Optional[Dict[str, Any]]:
         """
         Get user by email.
         
         Args:
             email: Email string
+            projection: MongoDB projection (defaults to excluding password)
+            primary: Read from the primary instead of the GET read preference
             
         Returns:
             User document or None if not found
         """
-        return await self.collection.find_one({"email": email})
+        return await self._reader(primary).find_one({"email": email}, projection or DEFAULT_PROJECTION)
 
-    async def update(self, user_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    @timed(db_operation_duration)
+    async def search_prefix(
+        self,
+        field: str,
+        prefix: str,
+        limit: int,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get users whose value in a normalized, indexed field starts with ``prefix``.
+        
+        The prefix becomes a ``$gte``/``$lt`` range sorted on the same
+        field, so the query walks at most ``limit`` index entries.
+        
+        Args:
+            field: "username" or "email"
+            prefix: Normalized prefix
+            limit: Maximum number of users
+            projection: MongoDB projection (defaults to excluding password)
+            
+        Returns:
+            Matching user documents ordered by ``field``
+        """
+        cursor = self.read_collection.find(
+            {field: prefix_range(prefix)}, projection or DEFAULT_PROJECTION
+        ).sort(field, 1).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    @timed(db_operation_duration)
+    async def exists(self, field: str, value: str, primary: bool = False) -> bool:
+        """
+        Check whether any user has a value in a unique indexed field.
+        
+        Args:
+            field: "username" or "email"
+            value: Normalized value
+            primary: Read from the primary instead of the GET read preference
+            
+        Returns:
+            True if a user has the value
+        """
+        return await self._reader(primary).find_one({field: value}, {"_id": 1}) is not None
+
+    @timed(db_operation_duration)
+    async def update(
+        self,
+        user_id: str,
+        data: Dict[str, Any],
+        projection: Optional[Dict[str, Any]] = None,
+        match: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Update user by ID.
         
         Args:
             user_id: User ID as string
             data: Data to update
+            projection: MongoDB projection (defaults to excluding password)
+            match: Extra filter conditions the document must satisfy
             
         Returns:
-            Updated user document or None if not found
+            Updated user document or None if not found (or ``match`` failed)
         """
         if not ObjectId.is_valid(user_id):
             return None
 
         result = await self.collection.find_one_and_update(
-            {"_id": ObjectId(user_id)},
+            {**(match or {}), "_id": ObjectId(user_id)},
             {"$set": data},
+            projection=projection or DEFAULT_PROJECTION,
             return_document=True
         )
         return result
 
-    async def delete(self, user_id: str) -> bool:
+    @timed(db_operation_duration)
+    async def replace_password_hash(self, user_id: Any, old_hash: str, new_hash: str) -> bool:
+        """
+        Swap a stored password hash, only if it is still ``old_hash``.
+        
+        The updated_at timestamp is left alone: rehashing at a new cost does
+        not change anything visible about the user.
+        
+        Args:
+            user_id: User ObjectId
+            old_hash: Hash that was verified
+            new_hash: Replacement hash
+            
+        Returns:
+            True if the hash was replaced
+        """
+        result = await self.collection.update_one(
+            {"_id": user_id, "password": old_hash},
+            {"$set": {"password": new_hash}}
+        )
+        return result.modified_count > 0
+
+    @timed(db_operation_duration)
+    async def delete(self, user_id: str) -> Optional[Dict[str, Any]]:
         """
         Delete user by ID.
         
@@ -108,10 +437,52 @@ class UserRepository:
             user_id: User ID as string
             
         Returns:
-            True if deleted, False otherwise
+            The deleted user's ``_id``, ``username``, ``email`` and
+            ``full_name``, or None if not found
         """
         if not ObjectId.is_valid(user_id):
-            return False
+            return None
+
+        return await self.collection.find_one_and_delete(
+            {"_id": ObjectId(user_id)},
+            projection={"_id": 1, "username": 1, "email": 1, "full_name": 1}
+        )
 
-        result = await self.collection.delete_one({"_id": ObjectId(user_id)})
-        return result.deleted_count > 0
\ No newline at end of file
+    @timed(db_operation_duration)
+    async def update_many(
+        self,
+        user_ids: List[ObjectId],
+        data: Dict[str, Any],
+        match: Optional[Dict[str, Any]] = None
+    ) -> Tuple[int, int]:
+        """
+        Set the same fields on many users.
+        
+        Args:
+            user_ids: User ObjectIds
+            data: Fields to set
+            match: Extra filter conditions every user must still satisfy
+            
+        Returns:
+            Tuple of (matched count, modified count)
+        """
+        result = await self.collection.update_many(
+            {**(match or {}), "_id": {"$in": user_ids}},
+            {"$set": data}
+        )
+        return result.matched_count, result.modified_count
+
+    @timed(db_operation_duration)
+    async def delete_many(self, user_ids: List[ObjectId], match: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Delete many users.
+        
+        Args:
+            user_ids: User ObjectIds
+            match: Extra filter conditions every user must still satisfy
+            
+        Returns:
+            Number of users deleted
+        """
+        result = await self.collection.delete_many({**(match or {}), "_id": {"$in": user_ids}})
+        return result.deleted_count
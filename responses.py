@@ -0,0 +1,145 @@
+"""Response rendering helpers for API routes."""
+import json
+from datetime import date, datetime
+from types import UnionType
+from typing import Any, Dict, Optional, Type, Union, get_args, get_origin
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize values the stdlib encoder does not handle."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _with_defaults(value: Any, annotation: Any, nested: bool = True) -> Any:
+    """
+    Fill in the defaults of missing optional fields, as validation would.
+
+    Follows nested models, including inside ``List[...]`` and
+    ``Optional[...]``, unless ``nested`` is False. Payload dicts can be
+    shared (cached users, for one), so any dict that gains a field is
+    copied rather than changed.
+
+    Args:
+        value: Payload, or part of one
+        annotation: Type the payload is rendered as
+        nested: Whether to descend below the top-level model
+
+    Returns:
+        ``value`` itself when nothing was missing, otherwise a filled copy
+    """
+    origin = get_origin(annotation)
+    if origin is list:
+        if not isinstance(value, list):
+            return value
+        items = [_with_defaults(item, get_args(annotation)[0]) for item in value]
+        return value if all(new is old for new, old in zip(items, value)) else items
+    if origin is Union or origin is UnionType:
+        for arg in get_args(annotation):
+            if arg is not type(None):
+                value = _with_defaults(value, arg)
+        return value
+    if not (isinstance(annotation, type) and issubclass(annotation, BaseModel) and isinstance(value, dict)):
+        return value
+
+    filled: Optional[Dict[str, Any]] = None
+    for name, field in annotation.model_fields.items():
+        if name in value:
+            if nested:
+                item = _with_defaults(value[name], field.annotation)
+                if item is not value[name]:
+                    filled = filled if filled is not None else dict(value)
+                    filled[name] = item
+        elif not field.is_required():
+            filled = filled if filled is not None else dict(value)
+            filled[name] = field.get_default(call_default_factory=True)
+    return value if filled is None else filled
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response rendered straight from trusted service payloads.
+
+    Uses orjson when it is installed and the stdlib encoder otherwise.
+    Neither path runs pydantic validation or ``jsonable_encoder``.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        """Serialize content to JSON bytes."""
+        if orjson is not None:
+            return orjson.dumps(content, default=str)
+        return json.dumps(content, default=_json_default, separators=(",", ":")).encode("utf-8")
+
+
+def render(
+    content: Dict[str, Any],
+    model: Optional[Type[BaseModel]] = None,
+    status_code: int = 200,
+    sparse: bool = False
+) -> Any:
+    """
+    Return a route result using the configured response path.
+
+    With settings.FAST_JSON_RESPONSES enabled the payload is serialized
+    directly, skipping response-model revalidation; missing fields of
+    ``model`` and of the models nested in it are filled with their
+    defaults so the body matches the validated path (only top-level
+    fields for ``sparse`` payloads, whose user objects are narrowed on
+    purpose). Otherwise the content is returned for FastAPI to validate
+    against the route's response model, except for ``sparse`` payloads,
+    which the full model would reject.
+
+    Args:
+        content: Response body built from service payloads
+        model: Response model the route declares
+        status_code: HTTP status code for directly rendered responses
+        sparse: Whether user objects were narrowed with ``fields``
+
+    Returns:
+        A Response, or the content itself for response-model handling
+    """
+    if settings.FAST_JSON_RESPONSES:
+        if model is not None:
+            content = _with_defaults(content, model, nested=not sparse)
+        return FastJSONResponse(content, status_code=status_code)
+
+    if sparse:
+        return JSONResponse(jsonable_encoder(content), status_code=status_code)
+
+    return content
+
+
+def with_headers(result: Any, response: Response, headers: Dict[str, str]) -> Any:
+    """
+    Attach headers to a ``render`` result.
+
+    Directly rendered responses carry the headers themselves; plain content
+    gets them through the ``Response`` FastAPI injected into the route.
+
+    Args:
+        result: Return value of ``render``
+        response: Response parameter injected into the route
+        headers: Headers to set
+
+    Returns:
+        ``result`` unchanged
+    """
+    target = result if isinstance(result, Response) else response
+    target.headers.update(headers)
+    return result
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response for a matching If-None-Match."""
+    return Response(status_code=304, headers={"ETag": etag})
@@ -1,12 +1,36 @@
 """User routes for API endpoints."""
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import Any, Dict, Literal, Optional
 from schemas.user_schema import (
     UserCreateSchema, 
     UserResponseSchema, 
     UserApiResponse,
-    UserUpdateSchema
+    UserUpdateSchema,
+    UserBatchGetSchema,
+    UserBatchApiResponse,
+    UserListApiResponse,
+    UserBulkImportApiResponse,
+    UserAuthenticateSchema,
+    UserAuthenticateApiResponse,
+    UserTokenApiResponse,
+    TokenIntrospectSchema,
+    TokenIntrospectionApiResponse,
+    UserAvailabilityApiResponse,
+    UserBulkUpdateSchema,
+    UserBulkUpdateApiResponse,
+    UserBulkDeleteSchema,
+    UserBulkDeleteApiResponse,
+    UserSearchApiResponse
 )
+from exceptions import InvalidUserDataError
+from utils import parse_json_rows, parse_fields, etag_matches, user_etag
+from responses import render, with_headers, not_modified
+from config import settings
 from services.user_service import UserService
+from services.tokens import token_service
+from dependencies import require_token
 from decorators import handle_exceptions
 import logging
 
@@ -15,6 +39,8 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/users", tags=["users"])
 user_service = UserService()
 
+FIELDS_DESCRIPTION = "Comma-separated response fields to return (e.g. id,username,email)"
+
 
 @router.post(
     "/", 
@@ -22,12 +48,20 @@ user_service = UserService()
     response_model=UserApiResponse,
     summary="Create a new user",
     responses={
-        201: {"description": "User created successfully"},
-        409: {"description": "User already exists"}
+        201: {"description": "User created successfully (or replayed for a repeated Idempotency-Key)"},
+        409: {"description": "User already exists, or the Idempotency-Key is still being processed"},
+        422: {"description": "Idempotency-Key was already used with a different body"}
     }
 )
 @handle_exceptions
-async def create_user(user: UserCreateSchema):
+async def create_user(
+    user: UserCreateSchema,
+    response: Response,
+    idempotency_key: Optional[str] = Header(
+        None, alias="Idempotency-Key", min_length=1, max_length=255,
+        description="Unique key per logical request; retries with the same key replay the first outcome"
+    )
+):
     """
     Create a new user.
     
@@ -36,14 +70,371 @@ async def create_user(user: UserCreateSchema):
     - **password**: Strong password (min 8 chars, uppercase, digit, special char)
     - **full_name**: Optional full name
     - **mobile**: Optional 10-digit phone number
+    
+    Send an **Idempotency-Key** header to make retries safe: repeats of the
+    same request return the stored response with ``Idempotent-Replayed: true``.
     """
-    new_user = await user_service.add_user(user)
-    logger.info(f"New user created: {user.username}")
-    return {
+    if idempotency_key is None:
+        new_user, replayed = await user_service.add_user(user), False
+    else:
+        new_user, replayed = await user_service.add_user_idempotent(user, idempotency_key)
+    if not replayed:
+        logger.info("New user created: %s", user.username)
+    result = render({
         "status": "success",
         "message": "User created successfully",
         "data": new_user
+    }, UserApiResponse, status_code=status.HTTP_201_CREATED)
+    if replayed:
+        return with_headers(result, response, {"Idempotent-Replayed": "true"})
+    return result
+
+
+@router.get(
+    "/",
+    response_model=UserListApiResponse,
+    summary="List users",
+    responses={
+        200: {"description": "Page of users"},
+        400: {"description": "Invalid pagination cursor"}
+    }
+)
+@handle_exceptions
+async def list_users(
+    limit: int = Query(settings.LIST_DEFAULT_PAGE_SIZE, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    is_active: Optional[bool] = Query(None, description="Filter by active status"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
+    """
+    List users newest first with keyset pagination.
+    
+    - **limit**: Page size (1 to the configured maximum)
+    - **cursor**: Opaque token returned as next_cursor by the previous page
+    - **is_active**: Optional active-status filter
+    - **fields**: Optional comma-separated list of fields to return
+    """
+    logger.info("Listing users (limit=%d, is_active=%s)", limit, is_active)
+    selected = parse_fields(fields)
+    page = await user_service.list_users(limit=limit, cursor=cursor, is_active=is_active, fields=selected)
+    content = {
+        "status": "success",
+        "data": page["users"],
+        "next_cursor": page["next_cursor"]
+    }
+    return render(content, UserListApiResponse, sparse=bool(selected))
+
+
+@router.get(
+    "/export",
+    summary="Export users as NDJSON",
+    response_class=StreamingResponse,
+    responses={
+        200: {"description": "Newline-delimited JSON stream of users", "content": {"application/x-ndjson": {}}}
+    }
+)
+@handle_exceptions
+async def export_users(
+    gzip: bool = Query(False, description="Gzip-compress the stream"),
+    created_after: Optional[datetime] = Query(None, description="Only users created at or after this time"),
+    created_before: Optional[datetime] = Query(None, description="Only users created before this time"),
+    updated_after: Optional[datetime] = Query(None, description="Only users updated at or after this time"),
+    updated_before: Optional[datetime] = Query(None, description="Only users updated before this time")
+):
+    """
+    Stream every user (without passwords) as newline-delimited JSON.
+    
+    - **gzip**: Compress the response body (sent with Content-Encoding: gzip)
+    - **created_after / created_before**: Creation time range for incremental exports
+    - **updated_after / updated_before**: Update time range for incremental exports
+    """
+    logger.info("Starting user export")
+    stream = user_service.export_users(
+        created_after=created_after,
+        created_before=created_before,
+        updated_after=updated_after,
+        updated_before=updated_before,
+        compress=gzip
+    )
+    headers = {"Content-Disposition": "attachment; filename=users.ndjson"}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(stream, media_type="application/x-ndjson", headers=headers)
+
+
+@router.get(
+    "/search",
+    response_model=UserSearchApiResponse,
+    summary="Search users by prefix",
+    responses={
+        200: {"description": "Users whose username, email or full name starts with the query"},
+        400: {"description": "Blank query"}
+    }
+)
+@handle_exceptions
+async def search_users(
+    q: str = Query(..., min_length=1, max_length=100, description="Prefix to match (case-insensitive)"),
+    limit: int = Query(
+        settings.SEARCH_DEFAULT_LIMIT, ge=1, le=settings.SEARCH_MAX_LIMIT,
+        description=f"Maximum results (max {settings.SEARCH_MAX_LIMIT})"
+    ),
+    field: Optional[Literal["username", "email", "full_name"]] = Query(
+        None, description="Search only this field"
+    )
+):
+    """
+    Typeahead search over usernames, emails and full names.
+    
+    - **q**: Matches the start of a username or email, or the start of any
+      word in a full name ("lov" finds "Ada Lovelace"); accents in names are ignored
+    - **limit**: Maximum number of users; username matches come first, then
+      email, then full name
+    """
+    users = await user_service.search_users(q, limit=limit, field=field)
+    return render({
+        "status": "success",
+        "data": users
+    }, UserSearchApiResponse)
+
+
+@router.get(
+    "/availability",
+    response_model=UserAvailabilityApiResponse,
+    summary="Check username/email availability",
+    responses={
+        200: {"description": "Availability of each value that was given"},
+        400: {"description": "Neither username nor email given"}
+    }
+)
+@handle_exceptions
+async def check_availability(
+    username: Optional[str] = Query(None, max_length=50, description="Username to check"),
+    email: Optional[str] = Query(None, max_length=254, description="Email to check")
+):
+    """
+    Check whether a username and/or email can still be registered.
+    
+    Values that were never registered are answered from memory; only
+    possible matches are confirmed against the database.
+    """
+    availability = await user_service.check_availability(username=username, email=email)
+    return render({
+        "status": "success",
+        "data": availability
+    }, UserAvailabilityApiResponse)
+
+
+@router.post(
+    "/batch-get",
+    response_model=UserBatchApiResponse,
+    summary="Get many users by ID",
+    responses={
+        200: {"description": "Users fetched; missing or invalid IDs are marked per item"}
+    }
+)
+@handle_exceptions
+async def batch_get_users(request: UserBatchGetSchema):
+    """
+    Get many users in one request with a single database query.
+    
+    - **ids**: List of MongoDB ObjectIds; results are returned in the same order
+      with a per-item status of found, not_found or invalid_id
+    """
+    logger.info("Batch fetching %d users", len(request.ids))
+    users = await user_service.get_users_by_ids(request.ids)
+    return render({
+        "status": "success",
+        "data": users
+    }, UserBatchApiResponse)
+
+
+@router.post(
+    "/bulk",
+    response_model=UserBulkImportApiResponse,
+    summary="Bulk create users",
+    responses={
+        200: {"description": "Import processed; see per-row results"},
+        400: {"description": "Malformed body or too many rows"}
+    },
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": UserCreateSchema.model_json_schema()}},
+                "application/x-ndjson": {"schema": {"type": "string"}}
+            }
+        }
+    }
+)
+@handle_exceptions
+async def bulk_create_users(request: Request):
+    """
+    Create many users from a JSON array or newline-delimited JSON body.
+    
+    Every row is validated like a single create. Invalid and duplicate rows
+    are reported individually and do not abort the rest of the import; rows
+    that could not be hashed under load are reported as `retryable`.
+    """
+    rows = parse_json_rows(await request.body())
+    if len(rows) > settings.BULK_IMPORT_MAX_ROWS:
+        raise InvalidUserDataError(f"Bulk import is limited to {settings.BULK_IMPORT_MAX_ROWS} rows")
+    
+    logger.info("Bulk importing %d users", len(rows))
+    report = await user_service.import_users(rows)
+    return render({
+        "status": "success",
+        "message": "Bulk import processed",
+        "summary": report["summary"],
+        "data": report["results"]
+    }, UserBulkImportApiResponse)
+
+
+@router.patch(
+    "/bulk",
+    response_model=UserBulkUpdateApiResponse,
+    summary="Bulk update users",
+    responses={
+        200: {"description": "Update applied; matched/modified counts returned"},
+        400: {"description": "Nothing to update"}
+    }
+)
+@handle_exceptions
+async def bulk_update_users(request: UserBulkUpdateSchema):
+    """
+    Set the same fields on many users selected by ID or by filter.
+    
+    - **ids**: User IDs, or
+    - **filter**: is_active and/or created/updated time bounds (at least one)
+    - **update**: Fields to set (full_name, mobile, is_active)
+    
+    Returns counts instead of documents.
+    """
+    logger.info("Bulk updating users by %s", "ids" if request.ids is not None else "filter")
+    counts = await user_service.bulk_update_users(
+        request.update.model_dump(exclude_unset=True),
+        user_ids=request.ids,
+        filters=request.filter.model_dump(exclude_none=True) if request.filter else None
+    )
+    return render({
+        "status": "success",
+        "message": "Bulk update processed",
+        "data": counts
+    }, UserBulkUpdateApiResponse)
+
+
+@router.post(
+    "/bulk-delete",
+    response_model=UserBulkDeleteApiResponse,
+    summary="Bulk delete users",
+    responses={
+        200: {"description": "Delete applied; deleted count returned"}
     }
+)
+@handle_exceptions
+async def bulk_delete_users(request: UserBulkDeleteSchema):
+    """
+    Delete many users selected by ID or by filter.
+    
+    - **ids**: User IDs, or
+    - **filter**: is_active and/or created/updated time bounds (at least one)
+    """
+    logger.info("Bulk deleting users by %s", "ids" if request.ids is not None else "filter")
+    counts = await user_service.bulk_delete_users(
+        user_ids=request.ids,
+        filters=request.filter.model_dump(exclude_none=True) if request.filter else None
+    )
+    return render({
+        "status": "success",
+        "message": "Bulk delete processed",
+        "data": counts
+    }, UserBulkDeleteApiResponse)
+
+
+@router.post(
+    "/authenticate",
+    response_model=UserAuthenticateApiResponse,
+    summary="Verify user credentials",
+    responses={
+        200: {"description": "Credentials are valid"},
+        401: {"description": "Invalid credentials or inactive user"},
+        503: {"description": "Password hashing queue is full"}
+    }
+)
+@handle_exceptions
+async def authenticate_user(credentials: UserAuthenticateSchema):
+    """
+    Check a username or email and password.
+    
+    - **username** or **email**: Exactly one login identifier
+    - **password**: Plain text password
+    """
+    user = await user_service.authenticate(credentials)
+    return render({
+        "status": "success",
+        "message": "Authenticated",
+        "data": user
+    }, UserAuthenticateApiResponse)
+
+
+@router.post(
+    "/token",
+    response_model=UserTokenApiResponse,
+    summary="Issue an access token",
+    responses={
+        200: {"description": "Token issued"},
+        401: {"description": "Invalid credentials or inactive user"},
+        503: {"description": "Password hashing queue is full"}
+    }
+)
+@handle_exceptions
+async def issue_token(credentials: UserAuthenticateSchema):
+    """
+    Exchange a username or email and password for a short-lived signed token.
+    
+    The token carries the user's id, username and active flag, so callers
+    can confirm identity with `/token/introspect` or locally without a
+    user lookup.
+    """
+    user = await user_service.authenticate(credentials)
+    return render({
+        "status": "success",
+        "message": "Token issued",
+        "data": token_service.issue({**user, "is_active": True})
+    }, UserTokenApiResponse)
+
+
+@router.post(
+    "/token/introspect",
+    response_model=TokenIntrospectionApiResponse,
+    summary="Validate an access token",
+    responses={200: {"description": "Token state (inactive tokens include a reason)"}}
+)
+@handle_exceptions
+async def introspect_token(request: TokenIntrospectSchema):
+    """
+    Check a token's signature, expiry and revocation status in-process.
+    
+    No database call is made.
+    """
+    return render({
+        "status": "success",
+        "data": token_service.introspect(request.token)
+    }, TokenIntrospectionApiResponse)
+
+
+@router.post(
+    "/token/revoke",
+    summary="Revoke the presented access token",
+    responses={
+        200: {"description": "Token revoked"},
+        401: {"description": "Missing or invalid token"}
+    }
+)
+@handle_exceptions
+async def revoke_token(claims: Dict[str, Any] = Depends(require_token)):
+    """Revoke the bearer token sent in the Authorization header."""
+    await token_service.revoke(claims)
+    return {"status": "success", "message": "Token revoked"}
 
 
 @router.get(
@@ -52,23 +443,37 @@ async def create_user(user: UserCreateSchema):
     summary="Get user by ID",
     responses={
         200: {"description": "User found"},
+        304: {"description": "User unchanged since the If-None-Match ETag"},
         400: {"description": "Invalid user ID format"},
         404: {"description": "User not found"}
     }
 )
 @handle_exceptions
-async def get_user(user_id: str):
+async def get_user(
+    user_id: str,
+    response: Response,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    if_none_match: Optional[str] = Header(None)
+):
     """
     Get user by MongoDB ObjectId.
     
     - **user_id**: MongoDB ObjectId as string (24 hex characters)
+    - **fields**: Optional comma-separated list of fields to return
+    
+    Responses carry an ETag; send it back in If-None-Match to get an empty
+    304 when the user has not changed.
     """
-    logger.info(f"Fetching user: {user_id}")
-    user = await user_service.get_user_by_id(user_id)
-    return {
+    logger.info("Fetching user: %s", user_id)
+    selected = parse_fields(fields)
+    user, etag = await user_service.get_user_with_etag(user_id, fields=selected)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    content = {
         "status": "success",
         "data": user
     }
+    return with_headers(render(content, UserApiResponse, sparse=bool(selected)), response, {"ETag": etag})
 
 
 @router.get(
@@ -77,22 +482,36 @@ async def get_user(user_id: str):
     summary="Get user by username",
     responses={
         200: {"description": "User found"},
+        304: {"description": "User unchanged since the If-None-Match ETag"},
+        400: {"description": "Invalid fields selection"},
         404: {"description": "User not found"}
     }
 )
 @handle_exceptions
-async def get_user_by_username(username: str):
+async def get_user_by_username(
+    username: str,
+    response: Response,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    if_none_match: Optional[str] = Header(None)
+):
     """
     Get user by username.
     
     - **username**: Username string
+    - **fields**: Optional comma-separated list of fields to return
+    
+    Supports If-None-Match like `GET /{user_id}`.
     """
-    logger.info(f"Fetching user by username: {username}")
-    user = await user_service.get_user_by_username(username)
-    return {
+    logger.info("Fetching user by username: %s", username)
+    selected = parse_fields(fields)
+    user, etag = await user_service.get_user_by_username_with_etag(username, fields=selected)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    content = {
         "status": "success",
         "data": user
     }
+    return with_headers(render(content, UserApiResponse, sparse=bool(selected)), response, {"ETag": etag})
 
 
 @router.put(
@@ -102,24 +521,37 @@ async def get_user_by_username(username: str):
     responses={
         200: {"description": "User updated successfully"},
         400: {"description": "Invalid user ID format"},
-        404: {"description": "User not found"}
+        404: {"description": "User not found"},
+        412: {"description": "If-Match does not match the current user"}
     }
 )
 @handle_exceptions
-async def update_user(user_id: str, update_data: UserUpdateSchema):
+async def update_user(
+    user_id: str,
+    update_data: UserUpdateSchema,
+    response: Response,
+    if_match: Optional[str] = Header(None)
+):
     """
     Update user information.
     
     - **user_id**: MongoDB ObjectId as string
     - **update_data**: Fields to update (full_name, mobile, is_active)
+    
+    Send the ETag from a previous GET in If-Match to update only if the user
+    has not changed since; otherwise the request fails with 412. Weak
+    (`W/`) tags never match.
     """
-    logger.info(f"Updating user: {user_id}")
-    updated_user = await user_service.update_user(user_id, update_data.model_dump(exclude_unset=True))
-    return {
+    logger.info("Updating user: %s", user_id)
+    updated_user = await user_service.update_user(
+        user_id, update_data.model_dump(exclude_unset=True), if_match=if_match
+    )
+    etag = user_etag(updated_user["id"], updated_user.get("updated_at"))
+    return with_headers(render({
         "status": "success",
         "message": "User updated successfully",
         "data": updated_user
-    }
+    }, UserApiResponse), response, {"ETag": etag})
 
 
 @router.delete(
@@ -139,6 +571,6 @@ async def delete_user(user_id: str):
     
     - **user_id**: MongoDB ObjectId as string
     """
-    logger.info(f"Deleting user: {user_id}")
+    logger.info("Deleting user: %s", user_id)
     result = await user_service.delete_user(user_id)
     return result
\ No newline at end of file
@@ -1,7 +1,9 @@
 """Pydantic schemas for request/response validation."""
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, Generic, TypeVar
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
+from typing import Optional, Generic, TypeVar, List, Literal
 from datetime import datetime
+from config import settings
+from services.hashing import BCRYPT_MAX_PASSWORD_BYTES
 
 T = TypeVar('T')
 
@@ -10,11 +12,21 @@ class UserCreateSchema(BaseModel):
     """Schema for creating a new user."""
     username: str = Field(..., min_length=3, max_length=50, description="Username (3-50 chars)")
     email: EmailStr = Field(..., description="Valid email address")
-    password: str = Field(..., min_length=8, description="Password (minimum 8 chars)")
+    password: str = Field(
+        ..., min_length=8, description=f"Password (minimum 8 chars, at most {BCRYPT_MAX_PASSWORD_BYTES} bytes)"
+    )
     full_name: Optional[str] = Field(None, max_length=100, description="Full name")
     mobile: Optional[str] = Field(None, pattern=r"^\d{10}$", description="10-digit phone number")
     is_active: Optional[bool] = Field(True, description="User active status")
 
+    @field_validator("password")
+    @classmethod
+    def check_password_bytes(cls, value: str) -> str:
+        """Refuse passwords bcrypt would silently cut short."""
+        if len(value.encode("utf-8")) > BCRYPT_MAX_PASSWORD_BYTES:
+            raise ValueError(f"Password must be at most {BCRYPT_MAX_PASSWORD_BYTES} bytes (UTF-8 encoded)")
+        return value
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -88,4 +100,251 @@ class UserUpdateSchema(BaseModel):
                 "mobile": "9876543210",
                 "is_active": True
             }
-        }
\ No newline at end of file
+        }
+
+
+class UserAuthenticateSchema(BaseModel):
+    """Schema for verifying a user's credentials (exactly one of username or email)."""
+    username: Optional[str] = Field(None, min_length=3, max_length=50, description="Username")
+    email: Optional[EmailStr] = Field(None, description="Email address")
+    password: str = Field(..., min_length=1, max_length=128, description="Password")
+
+    @model_validator(mode="after")
+    def check_identifier(self):
+        """Require exactly one login identifier."""
+        if (self.username is None) == (self.email is None):
+            raise ValueError("Provide exactly one of username or email")
+        return self
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "username": "username",
+                "password": "SecurePass123!"
+            }
+        }
+
+
+class UserIdentitySchema(BaseModel):
+    """Identity of an authenticated user."""
+    id: str = Field(..., description="User ID")
+    username: str = Field(..., description="Username")
+
+
+class UserAuthenticateApiResponse(BaseModel):
+    """API response for a successful credential check."""
+    status: str = Field(..., description="Response status")
+    message: Optional[str] = Field(None, description="Optional message")
+    data: UserIdentitySchema = Field(..., description="Authenticated user")
+
+
+class UserTokenSchema(BaseModel):
+    """Signed access token."""
+    access_token: str = Field(..., description="HS256-signed token")
+    token_type: Literal["bearer"] = Field("bearer", description="Token type for the Authorization header")
+    expires_in: int = Field(..., description="Lifetime in seconds")
+    expires_at: datetime = Field(..., description="Expiry timestamp (UTC)")
+
+
+class UserTokenApiResponse(BaseModel):
+    """API response for an issued token."""
+    status: str = Field(..., description="Response status")
+    message: Optional[str] = Field(None, description="Optional message")
+    data: UserTokenSchema = Field(..., description="Access token")
+
+
+class TokenIntrospectSchema(BaseModel):
+    """Schema for introspecting a token."""
+    token: str = Field(..., min_length=1, max_length=4096, description="Access token to check")
+
+
+class TokenIntrospectionSchema(BaseModel):
+    """Token state; claims are present only for active tokens."""
+    active: bool = Field(..., description="Whether the token is valid and its user active")
+    reason: Optional[str] = Field(None, description="Why the token is not active")
+    sub: Optional[str] = Field(None, description="User ID")
+    username: Optional[str] = Field(None, description="Username")
+    is_active: Optional[bool] = Field(None, description="User active status at issue time")
+    iat: Optional[int] = Field(None, description="Issued-at (epoch seconds)")
+    exp: Optional[int] = Field(None, description="Expiry (epoch seconds)")
+    jti: Optional[str] = Field(None, description="Token ID")
+
+
+class TokenIntrospectionApiResponse(BaseModel):
+    """API response for token introspection."""
+    status: str = Field(..., description="Response status")
+    message: Optional[str] = Field(None, description="Optional message")
+    data: TokenIntrospectionSchema = Field(..., description="Token state")
+
+
+class UserBatchGetSchema(BaseModel):
+    """Schema for fetching many users by ID."""
+    ids: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.BATCH_GET_MAX_IDS,
+        description=f"User IDs to fetch (max {settings.BATCH_GET_MAX_IDS})"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "ids": ["507f1f77bcf86cd799439011", "507f1f77bcf86cd799439012"]
+            }
+        }
+
+
+class UserBatchItemSchema(BaseModel):
+    """Result for one requested ID in a batch fetch."""
+    id: str = Field(..., description="Requested user ID")
+    status: Literal["found", "not_found", "invalid_id"] = Field(..., description="Lookup outcome")
+    data: Optional[UserResponseSchema] = Field(None, description="User data when found")
+
+
+class UserBatchApiResponse(BaseModel):
+    """API response for a batch fetch, in request order."""
+    status: str = Field(..., description="Response status")
+    message: Optional[str] = Field(None, description="Optional message")
+    data: List[UserBatchItemSchema] = Field(..., description="One result per requested ID")
+
+
+class UserListApiResponse(BaseModel):
+    """API response for one page of users."""
+    status: str = Field(..., description="Response status")
+    message: Optional[str] = Field(None, description="Optional message")
+    data: List[UserResponseSchema] = Field(..., description="Users on this page")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, null on the last page")
+
+
+class UserSearchApiResponse(BaseModel):
+    """API response for a prefix search."""
+    status: str = Field(..., description="Response status")
+    message: Optional[str] = Field(None, description="Optional message")
+    data: List[UserResponseSchema] = Field(..., description="Matching users: username, then email, then full name matches")
+
+
+class UserBulkImportResultSchema(BaseModel):
+    """Outcome of one row in a bulk import."""
+    index: int = Field(..., description="Zero-based position of the row in the request")
+    status: Literal["created", "duplicate", "invalid", "retryable"] = Field(
+        ..., description="Row outcome; retryable rows were not written and can be sent again"
+    )
+    id: Optional[str] = Field(None, description="ID of the created user")
+    field: Optional[str] = Field(None, description="Unique field that collided for duplicates")
+    error: Optional[str] = Field(None, description="Why an invalid or retryable row was not created")
+
+
+class UserBulkImportSummarySchema(BaseModel):
+    """Row counts for a bulk import."""
+    created: int = Field(..., description="Users created")
+    duplicate: int = Field(..., description="Rows rejected as duplicates")
+    invalid: int = Field(..., description="Rows rejected as invalid")
+    retryable: int = Field(..., description="Rows not written because the hashing pool was saturated")
+
+
+class UserBulkImportApiResponse(BaseModel):
+    """API response for a bulk import."""
+    status: str = Field(..., description="Response status")
+    message: Optional[str] = Field(None, description="Optional message")
+    summary: UserBulkImportSummarySchema = Field(..., description="Row counts")
+    data: List[UserBulkImportResultSchema] = Field(..., description="One result per row, in request order")
+
+
+class UserBulkFilterSchema(BaseModel):
+    """Constrained filter selecting the users a bulk operation applies to."""
+    is_active: Optional[bool] = Field(None, description="Only users with this active status")
+    created_after: Optional[datetime] = Field(None, description="Only users created at or after this time")
+    created_before: Optional[datetime] = Field(None, description="Only users created before this time")
+    updated_after: Optional[datetime] = Field(None, description="Only users updated at or after this time")
+    updated_before: Optional[datetime] = Field(None, description="Only users updated before this time")
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        """Refuse an empty filter, which would select every user."""
+        if not self.model_dump(exclude_none=True):
+            raise ValueError("Filter needs at least one condition")
+        return self
+
+
+class UserBulkTargetSchema(BaseModel):
+    """Users selected either by ID or by filter (exactly one)."""
+    ids: Optional[List[str]] = Field(
+        None,
+        min_length=1,
+        max_length=settings.BULK_WRITE_MAX_IDS,
+        description=f"User IDs (max {settings.BULK_WRITE_MAX_IDS})"
+    )
+    filter: Optional[UserBulkFilterSchema] = Field(None, description="Filter selecting the users")
+
+    @model_validator(mode="after")
+    def check_target(self):
+        """Require exactly one of ids or filter."""
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Provide exactly one of ids or filter")
+        return self
+
+
+class UserBulkUpdateSchema(UserBulkTargetSchema):
+    """Schema for updating many users at once."""
+    update: UserUpdateSchema = Field(..., description="Fields to set on every selected user")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "filter": {"is_active": True, "created_before": "2024-01-01T00:00:00Z"},
+                "update": {"is_active": False}
+            }
+        }
+
+
+class UserBulkDeleteSchema(UserBulkTargetSchema):
+    """Schema for deleting many users at once."""
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "ids": ["507f1f77bcf86cd799439011", "507f1f77bcf86cd799439012"]
+            }
+        }
+
+
+class UserBulkUpdateResultSchema(BaseModel):
+    """Counts for a bulk update."""
+    matched: int = Field(..., description="Users matched by the selection")
+    modified: int = Field(..., description="Users actually changed")
+    invalid_ids: List[str] = Field(default_factory=list, description="Requested IDs that are not valid ObjectIds")
+
+
+class UserBulkUpdateApiResponse(BaseModel):
+    """API response for a bulk update."""
+    status: str = Field(..., description="Response status")
+    message: Optional[str] = Field(None, description="Optional message")
+    data: UserBulkUpdateResultSchema = Field(..., description="Counts")
+
+
+class UserBulkDeleteResultSchema(BaseModel):
+    """Counts for a bulk delete."""
+    deleted: int = Field(..., description="Users deleted")
+    invalid_ids: List[str] = Field(default_factory=list, description="Requested IDs that are not valid ObjectIds")
+
+
+class UserBulkDeleteApiResponse(BaseModel):
+    """API response for a bulk delete."""
+    status: str = Field(..., description="Response status")
+    message: Optional[str] = Field(None, description="Optional message")
+    data: UserBulkDeleteResultSchema = Field(..., description="Counts")
+
+
+class UserAvailabilitySchema(BaseModel):
+    """Availability of a username and/or email."""
+    username: Optional[str] = Field(None, description="Normalized username that was checked")
+    username_available: Optional[bool] = Field(None, description="Whether the username is free")
+    email: Optional[str] = Field(None, description="Normalized email that was checked")
+    email_available: Optional[bool] = Field(None, description="Whether the email is free")
+
+
+class UserAvailabilityApiResponse(BaseModel):
+    """API response for an availability check."""
+    status: str = Field(..., description="Response status")
+    message: Optional[str] = Field(None, description="Optional message")
+    data: UserAvailabilitySchema = Field(..., description="Availability")
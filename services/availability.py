@@ -0,0 +1,291 @@
+"""Username/email availability answered from an in-memory Bloom filter."""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from config import settings
+from repositories.user_repository import UserRepository
+from services.bloom import CountingBloomFilter
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Documents created this close to the refresh watermark are read again on
+# the next refresh, to tolerate clock skew between application servers.
+REFRESH_OVERLAP = timedelta(seconds=5)
+AVAILABILITY_PROJECTION = {"_id": 0, "username": 1, "email": 1, "created_at": 1}
+
+
+def _key(field: str, value: str) -> str:
+    """Filter key for a normalized username or email."""
+    return f"{field}:{value}"
+
+
+class AvailabilityIndex:
+    """
+    Track taken usernames and emails in a counting Bloom filter.
+
+    A value that is not in the filter is definitely available and is
+    answered without touching MongoDB; a possible hit is confirmed with an
+    indexed ``find_one`` on the primary. The filter is built at startup
+    from a projected cursor, updated by this worker's creates and deletes,
+    and topped up every AVAILABILITY_FILTER_REFRESH_SECONDS with users
+    created by other workers (an indexed ``created_at`` range query on the
+    primary, from a watermark that only rows read back advance). Deletes
+    made by other workers, and local deletes of keys this filter cannot
+    prove it inserted, only leave stale entries, which cost a confirming
+    query until the rebuild every AVAILABILITY_FILTER_REBUILD_SECONDS.
+
+    Until the first build completes every check goes to MongoDB. False
+    negatives are harmless beyond a wrong answer here: the unique indexes
+    still reject a duplicate on create.
+    """
+
+    def __init__(
+        self,
+        repo: UserRepository,
+        capacity: int = settings.AVAILABILITY_FILTER_CAPACITY,
+        error_rate: float = settings.AVAILABILITY_FILTER_ERROR_RATE,
+        refresh_interval: float = settings.AVAILABILITY_FILTER_REFRESH_SECONDS,
+        rebuild_interval: float = settings.AVAILABILITY_FILTER_REBUILD_SECONDS
+    ):
+        """Initialize with an empty, not-yet-ready filter."""
+        self.repo = repo
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.filter = CountingBloomFilter(capacity, error_rate)
+        self.ready = False
+        self._watermark: Optional[datetime] = None
+        # Keys inserted near the watermark, per filter: refreshes skip them,
+        # and they are the only keys a delete may take out again
+        self._recent: Dict[str, datetime] = {}
+        self._building: Optional[Tuple[CountingBloomFilter, Dict[str, datetime]]] = None
+        self._built_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.checks = 0
+        self.negatives = 0
+        self.confirmed = 0
+        self.false_positives = 0
+        self.build_seconds: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the filter is turned on."""
+        return settings.AVAILABILITY_FILTER_ENABLED
+
+    def _targets(self) -> List[Tuple[CountingBloomFilter, Dict[str, datetime]]]:
+        """The live filter and its recent keys, plus the pair being rebuilt if any."""
+        if self._building is None:
+            return [(self.filter, self._recent)]
+        return [(self.filter, self._recent), self._building]
+
+    def _add(
+        self, target: CountingBloomFilter, recent: Dict[str, datetime], key: str, created_at: Optional[datetime]
+    ) -> None:
+        """Insert a key once, remembering recent ones so refreshes skip them."""
+        if created_at is not None and (self._watermark is None or created_at >= self._watermark - REFRESH_OVERLAP):
+            if key in recent:
+                return
+            recent[key] = created_at
+        target.add(key)
+
+    def _insert(self, user: Dict[str, Any], targets: List[Tuple[CountingBloomFilter, Dict[str, datetime]]]) -> None:
+        """Insert a user's username and email into each target filter."""
+        created_at = user.get("created_at")
+        for field in ("username", "email"):
+            if user.get(field):
+                key = _key(field, user[field])
+                for target, recent in targets:
+                    self._add(target, recent, key, created_at)
+
+    def add_user(self, user: Dict[str, Any]) -> None:
+        """
+        Mark a user created by this worker as taken.
+
+        The refresh watermark is left alone: it only follows rows read back
+        from the database, so this worker's clock cannot move it past users
+        other workers have not yet written.
+
+        Args:
+            user: Document with normalized ``username``/``email`` and ``created_at``
+        """
+        self._insert(user, self._targets())
+
+    def add_users(self, users: Iterable[Dict[str, Any]]) -> None:
+        """Mark many users as taken."""
+        for user in users:
+            self.add_user(user)
+
+    def remove_user(self, user: Dict[str, Any]) -> None:
+        """
+        Release a deleted user's username and email.
+
+        Counters are only decremented for keys a filter is known to have
+        inserted (its recent keys). Decrementing any other key could lower
+        counters shared with real users and turn them into false
+        negatives; such keys stay as stale entries until the next rebuild.
+
+        Args:
+            user: Deleted document with ``username`` and ``email``
+        """
+        for field in ("username", "email"):
+            if user.get(field):
+                key = _key(field, user[field])
+                for target, recent in self._targets():
+                    if recent.pop(key, None) is not None:
+                        target.remove(key)
+
+    async def is_taken(self, field: str, value: str) -> bool:
+        """
+        Whether a normalized username or email is already in use.
+
+        Args:
+            field: "username" or "email"
+            value: Normalized value
+
+        Returns:
+            True if a user has this value
+        """
+        self.checks += 1
+        if self.enabled and self.ready and _key(field, value) not in self.filter:
+            self.negatives += 1
+            return False
+
+        taken = await self.repo.exists(field, value, primary=True)
+        if taken:
+            self.confirmed += 1
+        elif self.ready:
+            self.false_positives += 1
+        return taken
+
+    def _advance(self, created_at: Optional[datetime]) -> None:
+        """Move the refresh watermark forward to a row read from the database."""
+        if created_at is not None and (self._watermark is None or created_at > self._watermark):
+            self._watermark = created_at
+
+    async def build(self) -> None:
+        """Load every username and email with one projected cursor, then swap the result in."""
+        if not self.enabled:
+            return
+        start = time.perf_counter()
+        building = (CountingBloomFilter(self.filter.capacity, self.error_rate), {})
+        self._building = building
+        try:
+            async for user in self.repo.iter_users({}, AVAILABILITY_PROJECTION, sort=None, primary=True):
+                self._insert(user, [building])
+                self._advance(user.get("created_at"))
+        finally:
+            self._building = None
+        self.filter, self._recent = building
+        if self.filter.count > self.filter.capacity:
+            logger.warning(
+                "Availability filter holds %d keys for a capacity of %d; raise AVAILABILITY_FILTER_CAPACITY",
+                self.filter.count, self.filter.capacity
+            )
+        self._prune_recent()
+        self.ready = True
+        self._built_at = time.monotonic()
+        self.build_seconds = time.perf_counter() - start
+        logger.info(
+            "Availability filter built: %d keys, %.1f MiB, %.1f ms",
+            self.filter.count, self.filter.stats()["memory_bytes"] / 2 ** 20, self.build_seconds * 1000
+        )
+
+    async def refresh(self) -> None:
+        """Add users created since the last build or refresh (by any worker)."""
+        if self._watermark is None:
+            return
+        since = self._watermark - REFRESH_OVERLAP
+        query = {"created_at": {"$gte": since}}
+        async for user in self.repo.iter_users(query, AVAILABILITY_PROJECTION, sort=None, primary=True):
+            self._insert(user, self._targets())
+            self._advance(user.get("created_at"))
+        self._prune_recent()
+
+    def _prune_recent(self) -> None:
+        """Forget keys old enough that no refresh will read them again."""
+        if self._watermark is not None:
+            cutoff = self._watermark - REFRESH_OVERLAP
+            self._recent = {key: created for key, created in self._recent.items() if created >= cutoff}
+
+    def _rebuild_due(self) -> bool:
+        """Whether the periodic rebuild should run now."""
+        return bool(self.rebuild_interval) and time.monotonic() - self._built_at >= self.rebuild_interval
+
+    async def _run(self) -> None:
+        """Build the filter, then refresh and periodically rebuild it until cancelled."""
+        while not self.ready:
+            try:
+                await self.build()
+            except Exception as e:
+                # Checks keep working against MongoDB until a build succeeds
+                logger.warning("Availability filter build failed: %s", e)
+                await asyncio.sleep(self.refresh_interval)
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                if self._rebuild_due():
+                    await self.build()
+                else:
+                    await self.refresh()
+            except Exception as e:
+                logger.warning("Availability filter refresh failed: %s", e)
+
+    async def start(self) -> None:
+        """
+        Build the filter and keep it topped up in a background task.
+
+        The build does not hold up startup; checks go to MongoDB until it
+        finishes.
+        """
+        if self.enabled and self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the background refresh."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return filter sizing, memory footprint and observed hit rates."""
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "rebuilding": self._building is not None,
+            "build_ms": self.build_seconds * 1000 if self.build_seconds is not None else None,
+            **self.filter.stats(),
+            "checks": self.checks,
+            "answered_from_filter": self.negatives,
+            "confirmed_taken": self.confirmed,
+            "false_positives": self.false_positives,
+            "observed_false_positive_rate": (
+                self.false_positives / (self.false_positives + self.negatives)
+                if self.false_positives + self.negatives else 0.0
+            ),
+        }
+
+
+availability_index = AvailabilityIndex(UserRepository())
+
+registry.callback(
+    "availability_checks_total", "Availability checks by outcome", "counter",
+    lambda: {
+        ("filter_negative",): availability_index.negatives,
+        ("confirmed_taken",): availability_index.confirmed,
+        ("false_positive",): availability_index.false_positives,
+    },
+    ("result",)
+)
+registry.callback(
+    "availability_filter_bytes", "Memory used by the availability Bloom filter", "gauge",
+    lambda: availability_index.filter.stats()["memory_bytes"]
+)
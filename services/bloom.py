@@ -0,0 +1,84 @@
+"""Counting Bloom filter for fast negative membership checks."""
+import hashlib
+import math
+from typing import Any, Dict
+
+
+class CountingBloomFilter:
+    """
+    Bloom filter with 8-bit counters instead of bits, so items can be removed.
+
+    ``item in filter`` is False only if the item was never added (or has
+    been removed); True means "possibly present". Sizing follows the usual
+    formulas for ``capacity`` items at ``error_rate`` false positives.
+    Positions come from double hashing a single 128-bit BLAKE2b digest.
+    Counters saturate at 255 and are then never decremented, which can
+    only cause extra false positives, never false negatives.
+    """
+
+    MAX_COUNT = 255
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """Size the filter for ``capacity`` items at ``error_rate``."""
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate in (0, 1)")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.count = 0
+        self._counters = bytearray(self.size)
+
+    def _positions(self, item: str):
+        """Yield the counter indexes for an item."""
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % size
+
+    def add(self, item: str) -> None:
+        """Insert an item."""
+        counters = self._counters
+        for position in self._positions(item):
+            if counters[position] < self.MAX_COUNT:
+                counters[position] += 1
+        self.count += 1
+
+    def remove(self, item: str) -> None:
+        """
+        Remove an item that was previously added.
+
+        Removing an item that was never added corrupts the filter, so callers
+        must only remove items they know were inserted.
+        """
+        counters = self._counters
+        positions = list(self._positions(item))
+        if any(counters[position] == 0 for position in positions):
+            return
+        for position in positions:
+            if 0 < counters[position] < self.MAX_COUNT:
+                counters[position] -= 1
+        self.count = max(0, self.count - 1)
+
+    def __contains__(self, item: str) -> bool:
+        """Whether the item is possibly present."""
+        counters = self._counters
+        return all(counters[position] for position in self._positions(item))
+
+    def estimated_false_positive_rate(self) -> float:
+        """Expected false-positive rate at the current item count."""
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+    def stats(self) -> Dict[str, Any]:
+        """Return sizing, fill and memory figures."""
+        return {
+            "capacity": self.capacity,
+            "items": self.count,
+            "counters": self.size,
+            "hash_functions": self.hash_count,
+            "memory_bytes": len(self._counters),
+            "target_false_positive_rate": self.error_rate,
+            "estimated_false_positive_rate": self.estimated_false_positive_rate(),
+        }
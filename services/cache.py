@@ -0,0 +1,197 @@
+"""In-process read-through cache for transformed user documents."""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+from config import settings
+from services.metrics import registry
+
+
+def normalize_username(username: str) -> str:
+    """Normalize a username the same way it is stored."""
+    return username.strip().lower()
+
+
+class UserCache:
+    """
+    Bounded LRU + TTL cache of ``user_helper`` payloads.
+
+    Entries are keyed by user ID; usernames are aliases that resolve to an ID,
+    so invalidating an ID always drops every way of reaching that entry.
+    All operations are synchronous and never await, which makes them atomic
+    with respect to other coroutines on the event loop.
+    """
+
+    def __init__(self, max_size: int = settings.USER_CACHE_MAX_SIZE, ttl: float = settings.USER_CACHE_TTL_SECONDS):
+        """Initialize an empty cache."""
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._aliases: Dict[str, str] = {}
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether caching is turned on."""
+        return self.max_size > 0 and self.ttl > 0
+
+    def get_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached user by ID.
+
+        Args:
+            user_id: User ID as string
+
+        Returns:
+            Cached user payload or None on a miss
+        """
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, payload = entry
+        if expires_at <= time.monotonic():
+            self._remove(user_id)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return payload
+
+    def get_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached user by username.
+
+        Args:
+            username: Username string (normalized before lookup)
+
+        Returns:
+            Cached user payload or None on a miss
+        """
+        user_id = self._aliases.get(normalize_username(username))
+        if user_id is None:
+            self.misses += 1
+            return None
+        return self.get_by_id(user_id)
+
+    def set(self, user: Dict[str, Any]) -> None:
+        """
+        Store a user payload under its ID and username.
+
+        Args:
+            user: Output of ``user_helper``
+        """
+        if not self.enabled:
+            return
+
+        user_id = user["id"]
+        if user_id in self._entries:
+            self._remove(user_id)
+        self._entries[user_id] = (time.monotonic() + self.ttl, user)
+        self._aliases[normalize_username(user["username"])] = user_id
+
+        while len(self._entries) > self.max_size:
+            oldest_id = next(iter(self._entries))
+            self._remove(oldest_id)
+            self.evictions += 1
+
+    def invalidate(self, user_id: str) -> None:
+        """
+        Drop a user from the cache.
+
+        Args:
+            user_id: User ID as string
+        """
+        self._remove(user_id)
+
+    def invalidate_many(self, user_ids: Iterable[str]) -> None:
+        """
+        Drop many users from the cache.
+
+        Args:
+            user_ids: User IDs as strings
+        """
+        for user_id in user_ids:
+            self._remove(user_id)
+
+    def set_ttl(self, ttl: float) -> None:
+        """
+        Change the lifetime of new entries.
+
+        Shortening it also drops every entry, so none outlives the new TTL.
+
+        Args:
+            ttl: Lifetime in seconds
+        """
+        if ttl < self.ttl:
+            self.clear()
+        self.ttl = ttl
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        self._entries.clear()
+        self._aliases.clear()
+
+    def _remove(self, user_id: str) -> None:
+        """Remove an entry and its username alias."""
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            username = normalize_username(entry[1]["username"])
+            if self._aliases.get(username) == user_id:
+                del self._aliases[username]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def create_user_cache(backend: str = settings.USER_CACHE_BACKEND):
+    """
+    Build the configured user cache.
+
+    Args:
+        backend: "memory" for a per-worker cache, "shm" for one shared by every worker on the host
+
+    Returns:
+        A ``UserCache`` or ``SharedUserCache``
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    if backend == "memory":
+        return UserCache()
+    if backend == "shm":
+        from services.shm_cache import SharedUserCache
+        return SharedUserCache()
+    raise ValueError(f"Unknown USER_CACHE_BACKEND: {backend}")
+
+
+user_cache = create_user_cache()
+
+registry.callback(
+    "user_cache_lookups_total", "User cache lookups by result", "counter",
+    lambda: {("hit",): user_cache.hits, ("miss",): user_cache.misses}, ("result",)
+)
+registry.callback(
+    "user_cache_evictions_total", "User cache LRU evictions", "counter",
+    lambda: user_cache.evictions
+)
+registry.callback(
+    "user_cache_entries", "Users currently cached", "gauge",
+    lambda: user_cache.stats()["size"]
+)
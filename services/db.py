@@ -1,48 +1,315 @@
 """Database configuration and connection management."""
+import logging
+import threading
+import time
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
 from config import settings
-from typing import Optional
+from services.metrics import registry
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 MONGO_URI: str = settings.MONGO_URI
 DB_NAME: str = settings.DB_NAME
 USERS_COLLECTION: str = settings.USERS_COLLECTION
 
-# Initialize MongoDB client
-client: AsyncIOMotorClient = AsyncIOMotorClient(MONGO_URI)
-db = client[DB_NAME]
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """
+    Track connection pool usage from pymongo's CMAP events.
+
+    Events are delivered on driver threads, so counters are guarded by a lock.
+    Checkout wait time is the driver-reported duration from checkout start
+    until a connection is handed over (or the checkout fails).
+    """
+
+    def __init__(self):
+        """Initialize all counters at zero."""
+        self._lock = threading.Lock()
+        self.pools = 0
+        self.open_connections = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.checkout_wait = registry.histogram(
+            "mongo_pool_checkout_wait_seconds", "Time spent waiting for a pooled MongoDB connection",
+            buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+        )
+
+    def _waited(self, duration: Optional[float]) -> None:
+        """Record one checkout wait (caller holds the lock)."""
+        duration = duration or 0.0
+        self.wait_time_total += duration
+        self.wait_time_max = max(self.wait_time_max, duration)
+        self.checkout_wait.observe(duration)
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        with self._lock:
+            self.pools += 1
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        pass
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        with self._lock:
+            self.pools -= 1
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        with self._lock:
+            self.open_connections -= 1
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent) -> None:
+        pass
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        with self._lock:
+            self.checkout_failures += 1
+            self._waited(getattr(event, "duration", None))
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+            self._waited(getattr(event, "duration", None))
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        with self._lock:
+            self.checked_out -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool usage counters and the configured limits."""
+        with self._lock:
+            return {
+                "max_pool_size": settings.MONGO_MAX_POOL_SIZE,
+                "min_pool_size": settings.MONGO_MIN_POOL_SIZE,
+                "pools": self.pools,
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "avg_wait_ms": self.wait_time_total / self.checkouts * 1000 if self.checkouts else 0.0,
+                "max_wait_ms": self.wait_time_max * 1000,
+                "read_preference": settings.MONGO_READ_PREFERENCE,
+            }
+
+
+def client_options() -> Dict[str, Any]:
+    """Build MongoClient keyword arguments from settings."""
+    options: Dict[str, Any] = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGO_SOCKET_TIMEOUT_MS or None,
+        "event_listeners": [pool_monitor],
+    }
+    if settings.MONGO_COMPRESSORS:
+        options["compressors"] = settings.MONGO_COMPRESSORS
+    return options
+
+
+# Read preference for listing, export and search
+READ_PREFERENCE = make_read_preference(
+    read_pref_mode_from_name(settings.MONGO_READ_PREFERENCE),
+    None,
+    settings.MONGO_MAX_STALENESS_SECONDS
+)
+
+pool_monitor = PoolMonitor()
+
+# Created by connect_db() during application startup, not at import time
+client: Optional[AsyncIOMotorClient] = None
+db = None
+
+IndexSpec = Tuple[List[Tuple[str, int]], Dict[str, Any]]
+
+# Indexes the users collection needs: (keys, options)
+USER_INDEXES: List[IndexSpec] = [
+    ([("username", 1)], {"unique": True, "sparse": True}),
+    ([("email", 1)], {"unique": True, "sparse": True}),
+    ([("is_active", 1)], {}),
+    ([("created_at", 1)], {}),
+    ([("updated_at", 1)], {}),
+    # Keyset pagination (list_page): the sort order, unfiltered and by is_active
+    ([("created_at", -1), ("_id", -1)], {}),
+    ([("is_active", 1), ("created_at", -1), ("_id", -1)], {}),
+]
+
+# Revocation entries delete themselves once the token they cover has expired
+REVOKED_TOKEN_INDEXES: List[IndexSpec] = [
+    ([("expires_at", 1)], {"expireAfterSeconds": 0}),
+]
+
+# Stored idempotent responses (and stale in-progress claims) expire the same way
+IDEMPOTENCY_INDEXES: List[IndexSpec] = [
+    ([("expires_at", 1)], {"expireAfterSeconds": 0}),
+]
+
+REQUIRED_INDEXES: Dict[str, List[IndexSpec]] = {
+    USERS_COLLECTION: USER_INDEXES,
+    settings.REVOKED_TOKENS_COLLECTION: REVOKED_TOKEN_INDEXES,
+    settings.IDEMPOTENCY_COLLECTION: IDEMPOTENCY_INDEXES,
+}
+
+registry.callback(
+    "mongo_pool_connections", "MongoDB connections by state", "gauge",
+    lambda: {
+        ("open",): pool_monitor.open_connections,
+        ("checked_out",): pool_monitor.checked_out,
+    },
+    ("state",)
+)
+registry.callback(
+    "mongo_pool_checkout_failures_total", "MongoDB connection checkouts that failed or timed out", "counter",
+    lambda: pool_monitor.checkout_failures
+)
+
+
+def create_client() -> AsyncIOMotorClient:
+    """Create a Motor client configured from settings."""
+    return AsyncIOMotorClient(MONGO_URI, **client_options())
+
+
+def get_database():
+    """
+    Get the application database.
+
+    Returns:
+        Database handle
+
+    Raises:
+        RuntimeError: If connect_db() has not run yet
+    """
+    if db is None:
+        raise RuntimeError("Database is not connected; connect_db() must run first")
+    return db
 
 
 def get_user_collection():
     """Get the users collection from MongoDB."""
-    return db[USERS_COLLECTION]
+    return get_database()[USERS_COLLECTION]
+
+
+def get_user_read_collection():
+    """Get the users collection configured with the read preference for GETs."""
+    return get_database()[USERS_COLLECTION].with_options(read_preference=READ_PREFERENCE)
 
 
 async def close_db_connection():
     """Close the database connection."""
-    client.close()
-
-
-async def create_indexes():
-    """Create database indexes for performance."""
-    users = db[USERS_COLLECTION]
-    
-    # Create unique indexes for username and email
-    await users.create_index("username", unique=True, sparse=True)
-    await users.create_index("email", unique=True, sparse=True)
-    
-    # Create regular indexes for common queries
-    await users.create_index("is_active")
-    await users.create_index("created_at")
-    
-    print("✓ Database indexes created")
-
-
-async def connect_db():
-    """Establish database connection and create indexes."""
+    global client, db
+    if client is not None:
+        client.close()
+        client = None
+        db = None
+
+
+async def missing_indexes(database=None) -> List[Tuple[str, List[Tuple[str, int]], Dict[str, Any]]]:
+    """
+    Find required indexes that do not exist yet, using one listIndexes call per collection.
+
+    Args:
+        database: Database to inspect (defaults to the application database)
+
+    Returns:
+        (collection, keys, options) for every REQUIRED_INDEXES entry whose
+        key pattern is not present
+    """
+    database = database if database is not None else get_database()
+    missing = []
+    for name, indexes in REQUIRED_INDEXES.items():
+        existing = set()
+        async for index in database[name].list_indexes():
+            existing.add(tuple(dict(index["key"]).items()))
+        missing.extend((name, keys, options) for keys, options in indexes if tuple(keys) not in existing)
+    return missing
+
+
+async def create_indexes(database=None, only_missing: bool = False) -> int:
+    """
+    Create database indexes for performance.
+
+    Args:
+        database: Database to index (defaults to the application database)
+        only_missing: Check with listIndexes first and create only absent indexes
+
+    Returns:
+        Number of indexes requested from the server
+    """
+    database = database if database is not None else get_database()
+    if only_missing:
+        indexes = await missing_indexes(database)
+    else:
+        indexes = [(name, keys, options) for name, specs in REQUIRED_INDEXES.items() for keys, options in specs]
+
+    for name, keys, options in indexes:
+        await database[name].create_index(keys, **options)
+
+    if indexes:
+        logger.info(
+            "Database indexes ensured: %s",
+            ", ".join(f"{name}.{'+'.join(field for field, _ in keys)}" for name, keys, _ in indexes)
+        )
+    return len(indexes)
+
+
+async def connect_db() -> Dict[str, float]:
+    """
+    Create the client, verify connectivity and bootstrap indexes.
+
+    Index handling follows settings.DB_INDEX_BOOTSTRAP: "auto" creates only
+    indexes missing according to listIndexes, "always" re-issues every
+    createIndex, and "skip" leaves indexes to the ``migrate.py`` command.
+    A database installed beforehand (e.g. an in-memory stand-in) is used
+    as-is and no client is created.
+
+    Returns:
+        Milliseconds spent in each startup phase
+    """
+    global client, db
+    timings: Dict[str, float] = {}
     try:
+        start = time.perf_counter()
+        if db is None:
+            client = create_client()
+            db = client[DB_NAME]
+        timings["client_ms"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
         await db.command("ping")
-        await create_indexes()
-        print("✓ Connected to MongoDB")
+        timings["ping_ms"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        mode = settings.DB_INDEX_BOOTSTRAP
+        if mode != "skip":
+            await create_indexes(only_missing=(mode != "always"))
+        timings["indexes_ms"] = (time.perf_counter() - start) * 1000
+
+        logger.info(
+            "Connected to MongoDB (client %.1f ms, ping %.1f ms, indexes[%s] %.1f ms)",
+            timings["client_ms"], timings["ping_ms"], mode, timings["indexes_ms"]
+        )
+        return timings
     except Exception as e:
-        print(f"✗ Failed to connect to MongoDB: {e}")
-        raise
\ No newline at end of file
+        logger.error("Failed to connect to MongoDB: %s", e)
+        await close_db_connection()
+        raise
@@ -0,0 +1,280 @@
+"""Password hashing engine that keeps bcrypt off the event loop."""
+import asyncio
+import multiprocessing
+import secrets
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import bcrypt
+import logging
+from config import settings
+from exceptions import HashingOverloadedError
+from services.metrics import registry, hash_duration
+
+logger = logging.getLogger(__name__)
+
+# bcrypt only ever reads this many bytes of a password; bcrypt>=5 raises
+# on longer input instead of truncating it
+BCRYPT_MAX_PASSWORD_BYTES = 72
+
+
+def _process_context() -> multiprocessing.context.BaseContext:
+    """
+    Start method for hashing processes.
+
+    The pool is created lazily, after the logging listener and the MongoDB
+    driver's monitor threads are running. A forked child could inherit one
+    of their locks in the held state and deadlock, so children come from a
+    clean forkserver process instead (spawn where that is unavailable).
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _password_bytes(password: str) -> bytes:
+    """Encode a password the way bcrypt has always consumed it."""
+    return password.encode('utf-8')[:BCRYPT_MAX_PASSWORD_BYTES]
+
+
+def _hash(password: str, rounds: int) -> str:
+    """Hash a password with bcrypt (runs inside a worker)."""
+    return bcrypt.hashpw(_password_bytes(password), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _hash_batch(passwords: List[str], rounds: int) -> List[str]:
+    """Hash a list of passwords (runs inside a worker)."""
+    return [_hash(password, rounds) for password in passwords]
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    """Check a password against a bcrypt hash (runs inside a worker)."""
+    return bcrypt.checkpw(_password_bytes(plain_password), hashed_password.encode('utf-8'))
+
+
+def hash_cost(hashed_password: str) -> Optional[int]:
+    """
+    Read the cost factor from a bcrypt hash such as ``$2b$12$...``.
+
+    Args:
+        hashed_password: bcrypt hash string
+
+    Returns:
+        Cost factor, or None if the hash is not in bcrypt's modular format
+    """
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+class PasswordHasher:
+    """
+    Dispatch bcrypt work to a process or thread pool.
+
+    At most ``max_pending`` jobs are handed to the executor at once; further
+    callers wait for a slot and fail with HashingOverloadedError once
+    ``queue_timeout`` seconds have passed, so overload surfaces as a fast
+    error instead of an unbounded backlog.
+    """
+
+    def __init__(
+        self,
+        executor: str = settings.HASH_EXECUTOR,
+        workers: int = settings.HASH_WORKERS,
+        max_pending: int = settings.HASH_MAX_PENDING,
+        queue_timeout: float = settings.HASH_QUEUE_TIMEOUT,
+        rounds: int = settings.BCRYPT_ROUNDS,
+        batch_chunk_size: int = settings.HASH_BATCH_CHUNK_SIZE,
+    ):
+        """Initialize hasher configuration; the pool is created on first use."""
+        if executor not in ("process", "thread"):
+            raise ValueError(f"Unknown hash executor: {executor}")
+        self.executor_type = executor
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.queue_timeout = queue_timeout
+        self.rounds = rounds
+        self.batch_chunk_size = max(1, batch_chunk_size)
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._dummy_hash: Optional[str] = None
+
+        # Metrics
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.completed = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        """Create the worker pool lazily."""
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_process_context())
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="bcrypt"
+                )
+            logger.info("Started %s hashing pool with %d workers", self.executor_type, self.workers)
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        """Create the admission semaphore lazily."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        return self._slots
+
+    async def _acquire(self) -> None:
+        """Wait for an executor slot or raise when the queue is saturated."""
+        slots = self._get_slots()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise HashingOverloadedError()
+        finally:
+            self.waiting -= 1
+
+    async def _run(self, operation: str, func, *args: Any) -> Any:
+        """Run a hashing function in the pool under admission control."""
+        await self._acquire()
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.in_flight -= 1
+            self.completed += 1
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+            hash_duration.observe(elapsed, operation)
+            self._get_slots().release()
+
+    async def hash(self, password: str, rounds: Optional[int] = None) -> str:
+        """
+        Hash a password without blocking the event loop.
+
+        Args:
+            password: Plain text password
+            rounds: bcrypt cost factor (defaults to settings.BCRYPT_ROUNDS)
+
+        Returns:
+            bcrypt hash string
+
+        Raises:
+            HashingOverloadedError: If no worker slot frees up in time
+        """
+        return await self._run("hash", _hash, password, rounds or self.rounds)
+
+    async def hash_many(self, passwords: List[str], rounds: Optional[int] = None) -> List[str]:
+        """
+        Hash many passwords in parallel across the pool.
+
+        The passwords are hashed in jobs of ``batch_chunk_size`` that go
+        through the same admission control as single hashes, and at most
+        ``workers - 1`` of them run at once, so a bulk import never holds
+        every worker and logins keep being served alongside it.
+
+        Args:
+            passwords: Plain text passwords
+            rounds: bcrypt cost factor (defaults to settings.BCRYPT_ROUNDS)
+
+        Returns:
+            bcrypt hashes in the same order as ``passwords``
+
+        Raises:
+            HashingOverloadedError: If no worker slot frees up in time
+        """
+        if not passwords:
+            return []
+        size = self.batch_chunk_size
+        chunks = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+        # Jobs wait here rather than in the shared queue, where they would
+        # sit ahead of (and time out alongside) interactive requests
+        lanes = asyncio.Semaphore(max(1, self.workers - 1))
+
+        async def hash_chunk(chunk: List[str]) -> List[str]:
+            async with lanes:
+                return await self._run("hash_batch", _hash_batch, chunk, rounds or self.rounds)
+
+        results = await asyncio.gather(*(hash_chunk(chunk) for chunk in chunks))
+        return [hashed for batch in results for hashed in batch]
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Verify a password without blocking the event loop.
+
+        Args:
+            plain_password: Plain text password
+            hashed_password: Stored bcrypt hash
+
+        Returns:
+            True if the password matches
+
+        Raises:
+            HashingOverloadedError: If no worker slot frees up in time
+        """
+        return await self._run("verify", _verify, plain_password, hashed_password)
+
+    async def verify_dummy(self, plain_password: str) -> bool:
+        """
+        Spend the same work as a real verification, for unknown accounts.
+
+        Verifying against a throwaway hash at the current cost keeps the
+        response time of "no such user" indistinguishable from "wrong password".
+
+        Args:
+            plain_password: Plain text password
+
+        Returns:
+            Always False
+        """
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash(secrets.token_urlsafe(16))
+        await self.verify(plain_password, self._dummy_hash)
+        return False
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Whether a stored hash was made with a cost other than the configured one."""
+        return hash_cost(hashed_password) != self.rounds
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and latency metrics."""
+        return {
+            "executor": self.executor_type,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "queue_depth": self.in_flight + self.waiting,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "avg_seconds": self.total_seconds / self.completed if self.completed else 0.0,
+            "max_seconds": self.max_seconds,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._slots = None
+
+
+password_hasher = PasswordHasher()
+
+registry.callback(
+    "password_hash_queue_depth", "bcrypt jobs running or waiting for a worker slot", "gauge",
+    lambda: password_hasher.in_flight + password_hasher.waiting
+)
+registry.callback(
+    "password_hash_rejected_total", "bcrypt jobs rejected because the queue was full", "counter",
+    lambda: password_hasher.rejected
+)
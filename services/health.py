@@ -0,0 +1,136 @@
+"""Background readiness checks with a cached result for health probes."""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+from config import settings
+from services.cache import user_cache
+from services.db import get_database, pool_monitor
+from services.hashing import password_hasher
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """
+    Periodically ping MongoDB and cache the outcome.
+
+    Probes read ``snapshot()``, which does no I/O. The service is ready once
+    a ping has succeeded and stays ready until ``failure_threshold``
+    consecutive pings fail, or until the last check is older than three
+    intervals (the checker itself is stuck). Pool saturation and a backed-up
+    hashing queue mark the service ``degraded`` without failing readiness.
+    """
+
+    def __init__(
+        self,
+        interval: float = settings.HEALTH_CHECK_INTERVAL,
+        timeout: float = settings.HEALTH_CHECK_TIMEOUT,
+        failure_threshold: int = settings.HEALTH_FAILURE_THRESHOLD
+    ):
+        """Initialize in the not-ready state."""
+        self.interval = interval
+        self.timeout = timeout
+        self.failure_threshold = max(1, failure_threshold)
+        self.database_ok = False
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.ping_ms: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def check(self) -> bool:
+        """
+        Ping the database once and update the cached state.
+
+        Returns:
+            True if the ping succeeded
+        """
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(get_database().command("ping"), self.timeout)
+        except Exception as e:
+            self.consecutive_failures += 1
+            self.last_error = str(e) or type(e).__name__
+            if self.database_ok and self.consecutive_failures >= self.failure_threshold:
+                self.database_ok = False
+                logger.warning("Database health check failing: %s", self.last_error)
+            ok = False
+        else:
+            if not self.database_ok and self.checked_at is not None:
+                logger.info("Database health check recovered")
+            self.database_ok = True
+            self.consecutive_failures = 0
+            self.last_error = None
+            self.ping_ms = (time.perf_counter() - start) * 1000
+            ok = True
+        self.checked_at = time.monotonic()
+        return ok
+
+    async def _run(self) -> None:
+        """Check on every interval until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+    async def start(self) -> None:
+        """Run a first check, then keep checking in a background task."""
+        await self.check()
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the background task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether the last known database state is healthy and fresh."""
+        if not self.database_ok or self.checked_at is None:
+            return False
+        return time.monotonic() - self.checked_at <= self.interval * 3
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return the cached readiness state without doing any I/O.
+
+        Returns:
+            Overall status, database state, and pool/cache/hashing health
+        """
+        pool = pool_monitor.stats()
+        pool["saturated"] = pool["checked_out"] >= pool["max_pool_size"]
+        hashing = password_hasher.stats()
+        hashing["saturated"] = hashing["queue_depth"] >= hashing["max_pending"]
+        cache = user_cache.stats()
+
+        if not self.ready:
+            status = "not_ready"
+        elif pool["saturated"] or hashing["saturated"]:
+            status = "degraded"
+        else:
+            status = "ready"
+
+        return {
+            "status": status,
+            "database": {
+                "connected": self.database_ok,
+                "ping_ms": self.ping_ms,
+                "consecutive_failures": self.consecutive_failures,
+                "last_error": self.last_error,
+                "checked_seconds_ago": (
+                    time.monotonic() - self.checked_at if self.checked_at is not None else None
+                ),
+            },
+            "pool": {key: pool[key] for key in ("open_connections", "checked_out", "max_pool_size", "checkout_failures", "saturated")},
+            "cache": {key: cache[key] for key in ("size", "max_size", "hit_rate")},
+            "hashing": {key: hashing[key] for key in ("queue_depth", "max_pending", "rejected", "saturated")},
+        }
+
+
+health_monitor = HealthMonitor()
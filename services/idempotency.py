@@ -0,0 +1,250 @@
+"""Idempotency-Key handling: run a request once and replay its outcome."""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from config import settings
+from exceptions import (
+    DuplicateUserError, InvalidUserDataError,
+    IdempotencyKeyConflictError, IdempotencyKeyInProgressError
+)
+from repositories.idempotency_repository import IdempotencyRepository
+from services.metrics import registry
+from utils import utcnow
+
+logger = logging.getLogger(__name__)
+
+# Client errors that are a deterministic outcome of the request, so a retry
+# gets them replayed too. Anything else (overload, server errors) frees the
+# key so the retry runs again.
+REPLAYED_ERRORS = {cls.__name__: cls for cls in (DuplicateUserError, InvalidUserDataError)}
+
+# How often a worker re-reads a key another worker is still processing
+POLL_INTERVAL = 0.05
+
+idempotency_requests = registry.counter(
+    "idempotency_requests_total", "Requests carrying an Idempotency-Key by outcome", ("result",)
+)
+
+
+class IdempotencyStore:
+    """
+    Run an operation at most once per key and replay its stored outcome.
+
+    Outcomes are kept in a bounded in-process TTL store. With
+    settings.IDEMPOTENCY_BACKEND = "mongo" they are also written to the
+    idempotency collection, which is where keys are claimed, so every worker
+    replays the same outcome. Concurrent requests with a key that is still
+    being processed wait for the original (up to
+    settings.IDEMPOTENCY_WAIT_TIMEOUT) instead of running again. A claim
+    is locked for settings.IDEMPOTENCY_LOCK_SECONDS and renewed while the
+    operation runs, so only a claim whose worker died can be taken over.
+    """
+
+    def __init__(
+        self,
+        repo: IdempotencyRepository,
+        backend: str = settings.IDEMPOTENCY_BACKEND,
+        ttl: int = settings.IDEMPOTENCY_TTL_SECONDS,
+        max_keys: int = settings.IDEMPOTENCY_MAX_KEYS,
+        wait_timeout: float = settings.IDEMPOTENCY_WAIT_TIMEOUT,
+        lock_seconds: float = settings.IDEMPOTENCY_LOCK_SECONDS
+    ):
+        """Initialize an empty store."""
+        if backend not in ("memory", "mongo"):
+            raise ValueError(f"Unknown IDEMPOTENCY_BACKEND: {backend}")
+        self.repo = repo
+        self.backend = backend
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.wait_timeout = wait_timeout
+        self.lock_seconds = lock_seconds
+        # key -> (expires at (monotonic), fingerprint, outcome)
+        self._completed: "OrderedDict[str, Tuple[float, str, Dict[str, Any]]]" = OrderedDict()
+        # key -> (fingerprint, future resolved when the original finishes)
+        self._inflight: Dict[str, Tuple[str, asyncio.Future]] = {}
+
+    def _remember(self, key: str, fingerprint: str, outcome: Dict[str, Any]) -> None:
+        """Keep an outcome locally, evicting expired and then oldest keys."""
+        now = time.monotonic()
+        self._completed[key] = (now + self.ttl, fingerprint, outcome)
+        self._completed.move_to_end(key)
+        while self._completed:
+            oldest_key, (expires, _, _) = next(iter(self._completed.items()))
+            if expires > now and len(self._completed) <= self.max_keys:
+                break
+            del self._completed[oldest_key]
+
+    def _recall(self, key: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Return a local (fingerprint, outcome) for a key, if still fresh."""
+        entry = self._completed.get(key)
+        if entry is None:
+            return None
+        expires, fingerprint, outcome = entry
+        if expires <= time.monotonic():
+            del self._completed[key]
+            return None
+        return fingerprint, outcome
+
+    @staticmethod
+    def _replay(fingerprint: str, stored_fingerprint: str, outcome: Dict[str, Any]) -> Any:
+        """Return a stored result or raise a stored error."""
+        if fingerprint != stored_fingerprint:
+            idempotency_requests.inc("conflict")
+            raise IdempotencyKeyConflictError()
+        idempotency_requests.inc("replayed")
+        if "error" in outcome:
+            raise REPLAYED_ERRORS[outcome["error"]](outcome["message"])
+        return outcome["result"]
+
+    async def run(
+        self,
+        key: str,
+        fingerprint: str,
+        operation: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Run ``operation`` once for ``key`` or replay the outcome of the first run.
+
+        Args:
+            key: Client-supplied Idempotency-Key
+            fingerprint: Fingerprint of the request; reusing a key with a
+                different fingerprint is rejected
+            operation: Coroutine factory performing the request
+
+        Returns:
+            Tuple of (result, replayed)
+
+        Raises:
+            IdempotencyKeyConflictError: If the key was used for a different request
+            IdempotencyKeyInProgressError: If the original is still running after the wait timeout
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            stored = self._recall(key)
+            if stored is not None:
+                return self._replay(fingerprint, *stored), True
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            if inflight[0] != fingerprint:
+                idempotency_requests.inc("conflict")
+                raise IdempotencyKeyConflictError()
+            # Wait for the original in this worker, then look again; if it
+            # failed without a stored outcome, this request runs instead
+            idempotency_requests.inc("waited")
+            try:
+                await asyncio.wait_for(asyncio.shield(inflight[1]), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                idempotency_requests.inc("in_progress")
+                raise IdempotencyKeyInProgressError()
+
+        done = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (fingerprint, done)
+        try:
+            if self.backend == "mongo":
+                stored = await self._claim(key, fingerprint, deadline)
+                if stored is not None:
+                    self._remember(key, *stored)
+                    return self._replay(fingerprint, *stored), True
+            return await self._execute(key, fingerprint, operation), False
+        finally:
+            del self._inflight[key]
+            done.set_result(None)
+
+    async def _claim(self, key: str, fingerprint: str, deadline: float) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Claim a key in MongoDB, waiting while another worker holds it.
+
+        Returns:
+            None once claimed, or the (fingerprint, outcome) another worker stored
+        """
+        lock = timedelta(seconds=self.lock_seconds)
+        while True:
+            entry = await self.repo.claim(key, fingerprint, utcnow() + lock)
+            if entry is None:
+                return None
+            if entry["fingerprint"] != fingerprint:
+                idempotency_requests.inc("conflict")
+                raise IdempotencyKeyConflictError()
+            if entry["status"] == "completed":
+                return entry["fingerprint"], entry["outcome"]
+            if entry["locked_until"] <= utcnow():
+                # The worker holding the claim stopped renewing it (it died)
+                if await self.repo.take_over(key, entry["locked_until"], fingerprint, utcnow() + lock):
+                    return None
+                continue
+            if time.monotonic() >= deadline:
+                idempotency_requests.inc("in_progress")
+                raise IdempotencyKeyInProgressError()
+            idempotency_requests.inc("waited")
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def _keep_claim(self, key: str, fingerprint: str) -> None:
+        """Renew a claim's lock a few times per lock period until cancelled."""
+        lock = timedelta(seconds=self.lock_seconds)
+        while True:
+            await asyncio.sleep(self.lock_seconds / 3)
+            try:
+                if not await self.repo.renew(key, fingerprint, utcnow() + lock):
+                    logger.warning("Lost the idempotency claim on %s while running", key)
+                    return
+            except Exception as e:
+                # The next attempt may still land before the lock runs out
+                logger.warning("Failed to renew idempotency claim on %s: %s", key, e)
+
+    async def _execute(self, key: str, fingerprint: str, operation: Callable[[], Awaitable[Any]]) -> Any:
+        """Run the operation and store its outcome."""
+        idempotency_requests.inc("new")
+        renewal = asyncio.ensure_future(self._keep_claim(key, fingerprint)) if self.backend == "mongo" else None
+        try:
+            try:
+                result = await operation()
+            finally:
+                if renewal is not None:
+                    renewal.cancel()
+            outcome: Dict[str, Any] = {"result": result}
+        except tuple(REPLAYED_ERRORS.values()) as e:
+            outcome = {"error": type(e).__name__, "message": e.message}
+            await self._store(key, fingerprint, outcome)
+            raise
+        except BaseException:
+            if self.backend == "mongo":
+                await self._release(key)
+            raise
+        await self._store(key, fingerprint, outcome)
+        return result
+
+    async def _store(self, key: str, fingerprint: str, outcome: Dict[str, Any]) -> None:
+        """Record an outcome locally and, with the Mongo backend, for every worker."""
+        self._remember(key, fingerprint, outcome)
+        if self.backend == "mongo":
+            try:
+                await self.repo.complete(key, outcome, utcnow() + timedelta(seconds=self.ttl))
+            except Exception as e:
+                # The request itself succeeded; other workers will re-run a retry
+                # once the claim's lock runs out
+                logger.warning("Failed to store idempotent outcome for %s: %s", key, e)
+
+    async def _release(self, key: str) -> None:
+        """Free a claim after a failure that should not be replayed."""
+        try:
+            await self.repo.release(key)
+        except Exception as e:
+            logger.warning("Failed to release idempotency key %s: %s", key, e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return store sizes and configuration."""
+        return {
+            "backend": self.backend,
+            "stored_keys": len(self._completed),
+            "max_keys": self.max_keys,
+            "in_flight": len(self._inflight),
+            "ttl_seconds": self.ttl,
+        }
+
+
+idempotency_store = IdempotencyStore(IdempotencyRepository())
@@ -0,0 +1,346 @@
+"""Cross-worker invalidation of the in-process user cache."""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from pymongo.errors import OperationFailure
+from config import settings
+from services.cache import UserCache, user_cache
+from services.db import get_user_collection
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+
+invalidation_lag = registry.histogram(
+    "cache_invalidation_lag_seconds", "Delay between a write and its invalidation reaching this worker",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+invalidation_messages = registry.counter(
+    "cache_invalidation_messages_total", "Cache invalidation messages by direction", ("direction",)
+)
+
+
+class InvalidationBus:
+    """
+    Deliver other workers' cache invalidations to this worker's cache.
+
+    This base class is the "none" backend for a single worker: it never
+    hears from anyone and ``publish`` does nothing. Subclasses call
+    ``_deliver`` for every invalidation received and ``_set_up`` when the
+    transport connects or fails. While it is down the cache TTL drops to
+    settings.INVALIDATION_FALLBACK_TTL_SECONDS (clearing existing entries),
+    which bounds how stale another worker's write can leave this one.
+    """
+
+    name = "none"
+
+    def __init__(
+        self,
+        cache: UserCache,
+        fallback_ttl: float = settings.INVALIDATION_FALLBACK_TTL_SECONDS,
+        retry_interval: float = settings.INVALIDATION_RETRY_SECONDS
+    ):
+        """Initialize a bus that has not started yet."""
+        self.cache = cache
+        self.normal_ttl = cache.ttl
+        self.fallback_ttl = min(fallback_ttl, cache.ttl)
+        self.retry_interval = retry_interval
+        self.up: Optional[bool] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.published = 0
+        self.received = 0
+        self.dropped = 0
+        self.outages = 0
+        self.last_lag: Optional[float] = None
+        self.max_lag = 0.0
+
+    def publish(self, user_ids: Iterable[str]) -> None:
+        """
+        Tell the other workers to drop users from their caches.
+
+        Never blocks or raises; a message that cannot be sent is counted as
+        dropped and the receiver's TTL bounds the staleness.
+
+        Args:
+            user_ids: User IDs as strings
+        """
+
+    async def start(self) -> None:
+        """Connect the transport."""
+        self._set_up(True)
+
+    async def stop(self) -> None:
+        """Disconnect the transport."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _deliver(self, user_ids: List[str], sent_at: Optional[float]) -> None:
+        """Apply a received invalidation and record its lag."""
+        self.cache.invalidate_many(user_ids)
+        self.received += 1
+        invalidation_messages.inc("received")
+        if sent_at is not None:
+            lag = max(0.0, time.time() - sent_at)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            invalidation_lag.observe(lag)
+
+    def _set_up(self, up: bool) -> None:
+        """Record a transport state change and switch the cache TTL to match."""
+        if up == self.up:
+            return
+        self.up = up
+        if up:
+            self.cache.set_ttl(self.normal_ttl)
+            logger.info("Cache invalidation bus (%s) is up", self.name)
+        else:
+            self.outages += 1
+            self.cache.set_ttl(self.fallback_ttl)
+            logger.warning(
+                "Cache invalidation bus (%s) is down; user cache TTL lowered to %.1fs",
+                self.name, self.fallback_ttl
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return transport state, message counts and lag."""
+        return {
+            "backend": self.name,
+            "up": bool(self.up),
+            "cache_ttl_seconds": self.cache.ttl,
+            "published": self.published,
+            "received": self.received,
+            "dropped": self.dropped,
+            "outages": self.outages,
+            "last_lag_ms": self.last_lag * 1000 if self.last_lag is not None else None,
+            "max_lag_ms": self.max_lag * 1000,
+        }
+
+
+class LocalBus(InvalidationBus):
+    """
+    Invalidation bus for workers on one host, over Unix datagram sockets.
+
+    Every worker binds ``<INVALIDATION_SOCKET_DIR>/<pid>.sock``; publishing
+    sends one datagram to every other socket in the directory. Sockets of
+    workers that have exited are removed when a send is refused. A
+    background check rebinds the socket if it disappears (e.g. a /tmp
+    cleaner), treating the bus as down meanwhile.
+    """
+
+    name = "local"
+    MAX_IDS_PER_MESSAGE = 500
+
+    def __init__(self, cache: UserCache, directory: str = settings.INVALIDATION_SOCKET_DIR, **kwargs: Any):
+        """Initialize without binding; ``start`` binds the socket."""
+        super().__init__(cache, **kwargs)
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}.sock")
+        self._sock: Optional[socket.socket] = None
+
+    def _bind(self) -> None:
+        """Bind this worker's socket and start reading from it."""
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            sock.setblocking(False)
+            sock.bind(self.path)
+        except OSError:
+            sock.close()
+            raise
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._on_readable)
+        self._sock = sock
+        self._set_up(True)
+
+    def _close(self) -> None:
+        """Stop reading and close the socket."""
+        if self._sock is not None:
+            asyncio.get_running_loop().remove_reader(self._sock.fileno())
+            self._sock.close()
+            self._sock = None
+
+    def _on_readable(self) -> None:
+        """Drain every pending datagram."""
+        while self._sock is not None:
+            try:
+                data = self._sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                message = json.loads(data)
+                self._deliver(message["ids"], message.get("sent_at"))
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Ignoring malformed invalidation message")
+
+    def _peers(self) -> List[str]:
+        """Socket paths of the other workers."""
+        try:
+            with os.scandir(self.directory) as entries:
+                return [
+                    entry.path for entry in entries
+                    if entry.name.endswith(".sock") and entry.path != self.path
+                ]
+        except OSError:
+            return []
+
+    def publish(self, user_ids: Iterable[str]) -> None:
+        """Send the IDs to every other worker on this host."""
+        if self._sock is None:
+            return
+        ids = list(user_ids)
+        if not ids:
+            return
+        peers = self._peers()
+        sent_at = time.time()
+        for start in range(0, len(ids), self.MAX_IDS_PER_MESSAGE):
+            payload = json.dumps(
+                {"ids": ids[start:start + self.MAX_IDS_PER_MESSAGE], "sent_at": sent_at}
+            ).encode("utf-8")
+            self.published += 1
+            invalidation_messages.inc("sent")
+            for peer in list(peers):
+                try:
+                    self._sock.sendto(payload, peer)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Nobody is reading: the worker has exited
+                    peers.remove(peer)
+                    try:
+                        os.unlink(peer)
+                    except OSError:
+                        pass
+                except OSError:
+                    # Receiver's buffer is full; its TTL bounds the staleness
+                    self.dropped += 1
+                    invalidation_messages.inc("dropped")
+
+    async def _watch(self) -> None:
+        """Rebind the socket whenever it has gone missing."""
+        while True:
+            await asyncio.sleep(self.retry_interval)
+            if self._sock is not None and os.path.exists(self.path):
+                continue
+            self._set_up(False)
+            self._close()
+            try:
+                self._bind()
+            except OSError as e:
+                logger.warning("Cannot bind invalidation socket %s: %s", self.path, e)
+
+    async def start(self) -> None:
+        """Bind the socket and keep it bound in a background task."""
+        try:
+            self._bind()
+        except OSError as e:
+            logger.warning("Cannot bind invalidation socket %s: %s", self.path, e)
+            self._set_up(False)
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._watch())
+
+    async def stop(self) -> None:
+        """Close and remove this worker's socket."""
+        await super().stop()
+        self._close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+class ChangeStreamBus(InvalidationBus):
+    """
+    Invalidation bus fed by a MongoDB change stream on the users collection.
+
+    Every update, replace or delete, by any worker on any host, evicts the
+    user. ``publish`` has nothing to do: the write itself is the message.
+    The stream resumes from its last token after an error; while it is
+    down the fallback TTL applies. Requires a replica set or sharded cluster.
+    """
+
+    name = "mongo"
+    PIPELINE = [
+        {"$match": {"operationType": {"$in": ["update", "replace", "delete"]}}},
+        {"$project": {"documentKey": 1, "clusterTime": 1, "wallTime": 1}},
+    ]
+
+    def __init__(self, cache: UserCache, **kwargs: Any):
+        """Initialize without a stream; ``start`` opens it."""
+        super().__init__(cache, **kwargs)
+        self._resume_token: Optional[Dict[str, Any]] = None
+
+    @staticmethod
+    def _sent_at(change: Dict[str, Any]) -> Optional[float]:
+        """Epoch time of the write (wallTime on MongoDB 6.0+, else clusterTime)."""
+        wall_time = change.get("wallTime")
+        if wall_time is not None:
+            return (wall_time - _EPOCH).total_seconds()
+        cluster_time = change.get("clusterTime")
+        return float(cluster_time.time) if cluster_time is not None else None
+
+    async def _run(self) -> None:
+        """Follow the change stream, reopening it after errors."""
+        while True:
+            try:
+                async with get_user_collection().watch(self.PIPELINE, resume_after=self._resume_token) as stream:
+                    self._set_up(True)
+                    async for change in stream:
+                        self._resume_token = stream.resume_token
+                        self._deliver([str(change["documentKey"]["_id"])], self._sent_at(change))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._set_up(False)
+                if isinstance(e, OperationFailure):
+                    # e.g. the resume point has left the oplog; start afresh
+                    self._resume_token = None
+                logger.warning("Invalidation change stream failed: %s", e)
+            await asyncio.sleep(self.retry_interval)
+
+    async def start(self) -> None:
+        """Open the change stream in a background task."""
+        if self._task is None:
+            self._set_up(False)
+            self._task = asyncio.ensure_future(self._run())
+
+
+BUS_BACKENDS = {"none": InvalidationBus, "local": LocalBus, "mongo": ChangeStreamBus}
+
+
+def create_bus(kind: str = settings.INVALIDATION_BUS, cache: UserCache = user_cache) -> InvalidationBus:
+    """
+    Build the configured invalidation bus.
+
+    Args:
+        kind: "none", "local" or "mongo"
+        cache: Cache to keep coherent
+
+    Returns:
+        An unstarted bus
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    if kind not in BUS_BACKENDS:
+        raise ValueError(f"Unknown INVALIDATION_BUS: {kind}")
+    return BUS_BACKENDS[kind](cache)
+
+
+invalidation_bus = create_bus()
+
+registry.callback(
+    "cache_invalidation_bus_up", "Whether the cache invalidation bus is connected", "gauge",
+    lambda: 1 if invalidation_bus.up else 0
+)
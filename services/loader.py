@@ -0,0 +1,81 @@
+"""DataLoader-style batching of keyed lookups."""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+BatchFunction = Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+
+
+class BatchLoader:
+    """
+    Collect ``load`` calls made within one event-loop tick into one batch call.
+
+    The first ``load`` of a tick schedules a dispatch with ``call_soon``; every
+    key requested before that callback runs joins the same batch. The batch
+    function receives the unique keys and returns a mapping of key to value;
+    keys missing from the mapping resolve to None.
+    """
+
+    def __init__(self, batch_fn: BatchFunction, max_batch_size: int = 1000):
+        """Initialize with the function that resolves a batch of keys."""
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._scheduled = False
+
+        # Metrics
+        self.batches = 0
+        self.keys_loaded = 0
+
+    async def load(self, key: Hashable) -> Optional[Any]:
+        """
+        Load one key as part of the current tick's batch.
+
+        Args:
+            key: Key to resolve
+
+        Returns:
+            Value returned by the batch function for this key, or None
+        """
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+            if not self._scheduled:
+                self._scheduled = True
+                loop.call_soon(self._dispatch)
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        """Hand the collected keys to the batch function in chunks."""
+        pending, self._pending = self._pending, {}
+        self._scheduled = False
+        keys = list(pending)
+        for start in range(0, len(keys), self.max_batch_size):
+            chunk = {key: pending[key] for key in keys[start:start + self.max_batch_size]}
+            asyncio.ensure_future(self._run_batch(chunk))
+
+    async def _run_batch(self, futures: Dict[Hashable, asyncio.Future]) -> None:
+        """Resolve one chunk of futures from a single batch call."""
+        self.batches += 1
+        self.keys_loaded += len(futures)
+        try:
+            results = await self.batch_fn(list(futures))
+        except Exception as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()
+            return
+
+        for key, future in futures.items():
+            if not future.done():
+                future.set_result(results.get(key))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batch counters."""
+        return {
+            "batches": self.batches,
+            "keys_loaded": self.keys_loaded,
+            "avg_batch_size": self.keys_loaded / self.batches if self.batches else 0.0,
+        }
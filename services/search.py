@@ -0,0 +1,275 @@
+"""In-memory prefix index over users' full names."""
+import asyncio
+import logging
+import time
+import unicodedata
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from bson import ObjectId
+from config import settings
+from repositories.user_repository import UserRepository
+from services.availability import REFRESH_OVERLAP
+from services.metrics import registry
+from services.sorted_keys import SortedKeyList
+
+logger = logging.getLogger(__name__)
+
+NAME_INDEX_PROJECTION = {"_id": 1, "full_name": 1, "updated_at": 1}
+# Separates the name from the 12-byte ObjectId in a key; sorts before any text
+_SEPARATOR = b"\x00"
+
+search_duration = registry.histogram(
+    "user_search_duration_seconds", "Time to answer a user prefix search",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+)
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """
+    Fold a full name (or a query for one) to the form that is indexed.
+
+    Accents are stripped, case is folded and runs of whitespace become a
+    single space, so "  José   Ramírez" and "jose ram" compare as prefixes.
+    """
+    if not name:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", name)
+    text = "".join(char for char in decomposed if not unicodedata.combining(char) and char != "\x00")
+    return " ".join(text.casefold().split())
+
+
+def name_keys(name: Optional[str], user_id: ObjectId) -> List[bytes]:
+    """
+    Index keys for a user's full name: one per word, each holding the rest of the name.
+
+    "Ada King Lovelace" yields keys for "ada king lovelace", "king lovelace"
+    and "lovelace", so a query matches from the start of any word and may
+    span several words.
+    """
+    words = normalize_name(name).split(" ")
+    if words == [""]:
+        return []
+    suffix = _SEPARATOR + user_id.binary
+    return list(dict.fromkeys(" ".join(words[i:]).encode("utf-8") + suffix for i in range(len(words))))
+
+
+def name_matches(name: Optional[str], query: str) -> bool:
+    """Whether a normalized query is a prefix of any word-suffix of a name."""
+    normalized = normalize_name(name)
+    return normalized.startswith(query) or f" {query}" in normalized
+
+
+class NameIndex:
+    """
+    Answer full-name prefix queries from a sorted key list.
+
+    ``full_name`` is free text, so no MongoDB index can answer a
+    case-insensitive prefix query on it. Every worker keeps the names in a
+    SortedKeyList instead: built at startup from a projected cursor,
+    updated by this worker's writes and topped up every
+    SEARCH_NAME_INDEX_REFRESH_SECONDS with users other workers created or
+    updated (an ``updated_at`` range query). Renames and deletes made by
+    other workers leave stale keys until the periodic rebuild
+    (SEARCH_NAME_INDEX_REBUILD_SECONDS); callers must re-check candidates
+    against the documents they load.
+    """
+
+    def __init__(
+        self,
+        repo: UserRepository,
+        refresh_interval: float = settings.SEARCH_NAME_INDEX_REFRESH_SECONDS,
+        rebuild_interval: float = settings.SEARCH_NAME_INDEX_REBUILD_SECONDS
+    ):
+        """Initialize with an empty, not-yet-ready index."""
+        self.repo = repo
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.keys = SortedKeyList()
+        self.ready = False
+        self._building: Optional[SortedKeyList] = None
+        self._watermark: Optional[datetime] = None
+        self._built_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.searches = 0
+        self.stale = 0
+        self.build_seconds: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the index is turned on."""
+        return settings.SEARCH_NAME_INDEX_ENABLED
+
+    def _targets(self) -> List[SortedKeyList]:
+        """The live key list, plus the one being rebuilt if any."""
+        if self._building is None:
+            return [self.keys]
+        return [self.keys, self._building]
+
+    def add_user(self, user: Dict[str, Any]) -> None:
+        """
+        Index a user's full name.
+
+        Args:
+            user: Document with ``_id``, ``full_name`` and ``updated_at``
+        """
+        for target in self._targets():
+            self._insert(target, user)
+
+    def _insert(self, target: SortedKeyList, user: Dict[str, Any]) -> None:
+        """Add a user's keys to one key list and advance the refresh watermark."""
+        if "_id" not in user:
+            return
+        for key in name_keys(user.get("full_name"), user["_id"]):
+            target.add(key)
+        updated_at = user.get("updated_at")
+        if updated_at is not None and (self._watermark is None or updated_at > self._watermark):
+            self._watermark = updated_at
+
+    def add_users(self, users: Iterable[Dict[str, Any]]) -> None:
+        """Index many users."""
+        for user in users:
+            self.add_user(user)
+
+    def remove_user(self, user: Dict[str, Any]) -> None:
+        """
+        Drop a user's full name from the index.
+
+        Args:
+            user: Document with ``_id`` and the ``full_name`` that was indexed
+        """
+        if "_id" not in user:
+            return
+        keys = name_keys(user.get("full_name"), user["_id"])
+        for target in self._targets():
+            for key in keys:
+                target.discard(key)
+
+    def replace_user(self, old_name: Optional[str], user: Dict[str, Any]) -> None:
+        """
+        Re-index a user whose full name may have changed.
+
+        Args:
+            old_name: Full name before the update
+            user: Updated document with ``_id``, ``full_name`` and ``updated_at``
+        """
+        if normalize_name(old_name) != normalize_name(user.get("full_name")):
+            self.remove_user({"_id": user["_id"], "full_name": old_name})
+        self.add_user(user)
+
+    def search(self, query: str, limit: int) -> List[ObjectId]:
+        """
+        IDs of users with a name word starting with ``query``.
+
+        Args:
+            query: Normalized query (see ``normalize_name``)
+            limit: Maximum number of IDs
+
+        Returns:
+            Up to ``limit`` distinct IDs, ordered by the matching name
+        """
+        self.searches += 1
+        ids: Dict[bytes, None] = {}
+        if query:
+            for key in self.keys.iter_prefix(query.encode("utf-8")):
+                ids[key[-12:]] = None
+                if len(ids) >= limit:
+                    break
+        return [ObjectId(user_id) for user_id in ids]
+
+    def record_stale(self, count: int) -> None:
+        """Count candidates that no longer matched their document."""
+        self.stale += count
+
+    async def build(self) -> None:
+        """Index every full name with one projected cursor, then swap the result in."""
+        if not self.enabled:
+            return
+        start = time.perf_counter()
+        self._building = SortedKeyList()
+        try:
+            async for user in self.repo.iter_users({}, NAME_INDEX_PROJECTION, sort=None):
+                self._insert(self._building, user)
+            self.keys = self._building
+        finally:
+            self._building = None
+        self.ready = True
+        self._built_at = time.monotonic()
+        self.build_seconds = time.perf_counter() - start
+        stats = self.keys.stats()
+        logger.info(
+            "Name search index built: %d keys, %.1f MiB, %.1f ms",
+            stats["keys"], stats["memory_bytes"] / 2 ** 20, self.build_seconds * 1000
+        )
+
+    async def refresh(self) -> None:
+        """Index users created or updated since the last build or refresh (by any worker)."""
+        if self._watermark is None:
+            return
+        since = self._watermark - REFRESH_OVERLAP
+        async for user in self.repo.iter_users({"updated_at": {"$gte": since}}, NAME_INDEX_PROJECTION, sort=None):
+            self.add_user(user)
+
+    def _rebuild_due(self) -> bool:
+        """Whether the periodic rebuild should run now."""
+        return bool(self.rebuild_interval) and time.monotonic() - self._built_at >= self.rebuild_interval
+
+    async def _run(self) -> None:
+        """Build the index, then refresh and periodically rebuild it until cancelled."""
+        while not self.ready:
+            try:
+                await self.build()
+            except Exception as e:
+                # Name matches are left out of searches until a build succeeds
+                logger.warning("Name search index build failed: %s", e)
+                await asyncio.sleep(self.refresh_interval)
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                if self._rebuild_due():
+                    await self.build()
+                else:
+                    await self.refresh()
+            except Exception as e:
+                logger.warning("Name search index refresh failed: %s", e)
+
+    async def start(self) -> None:
+        """
+        Build the index and keep it current in a background task.
+
+        Startup does not wait for the build; until it finishes, searches
+        match usernames and emails only.
+        """
+        if self.enabled and self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the background refresh."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return index size, memory footprint and stale-candidate counts."""
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "rebuilding": self._building is not None,
+            "build_ms": self.build_seconds * 1000 if self.build_seconds is not None else None,
+            **self.keys.stats(),
+            "searches": self.searches,
+            "stale_candidates": self.stale,
+        }
+
+
+name_index = NameIndex(UserRepository())
+
+registry.callback(
+    "search_name_index_bytes", "Memory used by the full-name search index", "gauge",
+    lambda: name_index.keys.nbytes
+)
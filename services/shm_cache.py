@@ -0,0 +1,408 @@
+"""User cache shared by every worker process on a host through a memory-mapped file."""
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from config import settings
+from services.cache import normalize_username
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"USRCACHE"
+VERSION = 1
+
+# magic, version, slots, slot bytes, occupied slots, evictions
+HEADER = struct.Struct("<8sIIIQQ")
+HEADER_BYTES = 64
+# Per-worker lookup counters: pid, hits, misses
+WORKER = struct.Struct("<IQQ")
+MAX_WORKERS = 64
+TABLE_OFFSET = HEADER_BYTES + MAX_WORKERS * WORKER.size
+# seq (odd while being written), key hash, expiry (CLOCK_MONOTONIC), crc32 of key+value, key length, value length
+SLOT = struct.Struct("<IQdIHH4x")
+SEQ = struct.Struct("<I")
+
+DATETIME_FIELDS = ("created_at", "updated_at")
+
+
+def _hash(key: bytes) -> int:
+    """Process-independent 64-bit hash (``hash()`` is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def _encode(user: Dict[str, Any]) -> bytes:
+    """Serialize a ``user_helper`` payload (datetimes as ISO 8601)."""
+    if orjson is not None:
+        return orjson.dumps(user, default=str)
+    return json.dumps(
+        user, separators=(",", ":"),
+        default=lambda value: value.isoformat() if isinstance(value, datetime) else str(value)
+    ).encode("utf-8")
+
+
+def _decode(data: bytes) -> Dict[str, Any]:
+    """Deserialize a payload written by ``_encode``, restoring datetimes."""
+    user = orjson.loads(data) if orjson is not None else json.loads(data)
+    for field in DATETIME_FIELDS:
+        if isinstance(user.get(field), str):
+            user[field] = datetime.fromisoformat(user[field])
+    return user
+
+
+class SharedUserCache:
+    """
+    Fixed-size hash table of ``user_helper`` payloads in shared memory.
+
+    Drop-in replacement for ``UserCache``: every worker maps the same file,
+    so the hot set is stored (and warmed) once per host and a write on one
+    worker is immediately visible to the others.
+
+    The table is 4-way set associative: a key hashes to a bucket of four
+    fixed-size slots, and an insert replaces a free or expired slot, else
+    the one closest to expiry. Usernames are separate alias entries
+    pointing at the ID entry, checked against the payload on lookup.
+
+    Reads take no lock. Each slot carries a sequence number that writers
+    make odd while they change the slot (a seqlock), and a CRC of its
+    contents; a reader retries when either shows a concurrent write.
+    Writers serialize on an exclusive ``flock`` of the file.
+
+    Expiry uses CLOCK_MONOTONIC, which is system-wide, so every worker
+    agrees on it. The file name encodes the table geometry, so workers
+    started with different settings never share a file.
+    """
+
+    WAYS = 4
+    READ_RETRIES = 3
+
+    def __init__(
+        self,
+        path: str = settings.USER_CACHE_SHM_PATH,
+        slots: int = settings.USER_CACHE_SHM_SLOTS,
+        slot_bytes: int = settings.USER_CACHE_SHM_SLOT_BYTES,
+        ttl: float = settings.USER_CACHE_TTL_SECONDS
+    ):
+        """Map (creating and initializing if needed) the shared table."""
+        if slot_bytes <= SLOT.size:
+            raise ValueError(f"USER_CACHE_SHM_SLOT_BYTES must be larger than {SLOT.size}")
+        self.slots = max(self.WAYS, slots - slots % self.WAYS)
+        self.slot_bytes = slot_bytes
+        self.max_size = self.slots
+        self.ttl = ttl
+        self.path = f"{path}.{self.slots}x{slot_bytes}"
+        self.memory_bytes = TABLE_OFFSET + self.slots * slot_bytes
+
+        # Metrics (this worker only)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.oversize = 0
+        self.torn_reads = 0
+
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._locked():
+            if os.fstat(self._fd).st_size < self.memory_bytes:
+                os.ftruncate(self._fd, self.memory_bytes)
+            self._mm = mmap.mmap(self._fd, self.memory_bytes)
+            magic, version, table_slots, table_slot_bytes, _, _ = HEADER.unpack_from(self._mm, 0)
+            if (magic, version, table_slots, table_slot_bytes) != (MAGIC, VERSION, self.slots, slot_bytes):
+                self._mm[:self.memory_bytes] = bytes(self.memory_bytes)
+                HEADER.pack_into(self._mm, 0, MAGIC, VERSION, self.slots, slot_bytes, 0, 0)
+            self._worker_offset = self._claim_worker_entry()
+        logger.info(
+            "Shared user cache %s: %d slots x %d bytes (%.1f MiB)",
+            self.path, self.slots, slot_bytes, self.memory_bytes / 2 ** 20
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Whether caching is turned on."""
+        return self.max_size > 0 and self.ttl > 0
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the cross-process writer lock."""
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _claim_worker_entry(self) -> Optional[int]:
+        """Take a counters entry, reusing those of exited workers (caller holds the lock)."""
+        pid = os.getpid()
+        free = None
+        for index in range(MAX_WORKERS):
+            offset = HEADER_BYTES + index * WORKER.size
+            owner = WORKER.unpack_from(self._mm, offset)[0]
+            if owner == pid:
+                free = offset
+                break
+            if free is None and (owner == 0 or not _alive(owner)):
+                free = offset
+        if free is not None:
+            WORKER.pack_into(self._mm, free, pid, 0, 0)
+        return free
+
+    def _count(self, hit: bool) -> None:
+        """Record a lookup locally and in this worker's shared counters."""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self._worker_offset is not None:
+            struct.pack_into("<QQ", self._mm, self._worker_offset + 4, self.hits, self.misses)
+
+    def _bucket(self, key_hash: int) -> int:
+        """Offset of the first slot of a key's bucket."""
+        return TABLE_OFFSET + (key_hash % (self.slots // self.WAYS)) * self.WAYS * self.slot_bytes
+
+    def _read(self, key: bytes) -> Optional[bytes]:
+        """Return the live value stored under a key, without locking."""
+        key_hash = _hash(key)
+        mm = self._mm
+        bucket = self._bucket(key_hash)
+        for way in range(self.WAYS):
+            offset = bucket + way * self.slot_bytes
+            for _ in range(self.READ_RETRIES):
+                seq, slot_hash, expires, crc, key_len, value_len = SLOT.unpack_from(mm, offset)
+                if seq & 1:
+                    continue
+                if slot_hash != key_hash or key_len != len(key):
+                    break
+                start = offset + SLOT.size
+                data = mm[start:start + key_len + value_len]
+                if SEQ.unpack_from(mm, offset)[0] != seq or zlib.crc32(data) != crc:
+                    continue
+                if data[:key_len] != key:
+                    break
+                return data[key_len:] if expires > time.monotonic() else None
+            else:
+                # Kept losing to writers; treat as a miss rather than spin
+                self.torn_reads += 1
+        return None
+
+    def _find(self, key: bytes, key_hash: int) -> Optional[int]:
+        """Offset of the slot holding a key (caller holds the lock)."""
+        bucket = self._bucket(key_hash)
+        for way in range(self.WAYS):
+            offset = bucket + way * self.slot_bytes
+            _, slot_hash, _, _, key_len, _ = SLOT.unpack_from(self._mm, offset)
+            if key_len and slot_hash == key_hash:
+                start = offset + SLOT.size
+                if self._mm[start:start + key_len] == key:
+                    return offset
+        return None
+
+    def _write_slot(self, offset: int, key_hash: int, expires: float, key: bytes, value: bytes) -> None:
+        """Rewrite one slot under the seqlock (caller holds the lock)."""
+        mm = self._mm
+        seq = SEQ.unpack_from(mm, offset)[0]
+        SEQ.pack_into(mm, offset, seq + 1)
+        data = key + value
+        start = offset + SLOT.size
+        mm[start:start + len(data)] = data
+        SLOT.pack_into(mm, offset, seq + 1, key_hash, expires, zlib.crc32(data), len(key), len(value))
+        SEQ.pack_into(mm, offset, seq + 2)
+
+    def _adjust_header(self, occupied: int = 0, evictions: int = 0) -> None:
+        """Update the shared slot and eviction counts (caller holds the lock)."""
+        header = HEADER.unpack_from(self._mm, 0)
+        HEADER.pack_into(self._mm, 0, *header[:4], header[4] + occupied, header[5] + evictions)
+
+    def _store(self, key: bytes, value: bytes, expires: float) -> None:
+        """Insert or replace a key, evicting within its bucket if needed."""
+        if SLOT.size + len(key) + len(value) > self.slot_bytes:
+            self.oversize += 1
+            return
+        key_hash = _hash(key)
+        with self._locked():
+            offset = self._find(key, key_hash)
+            if offset is None:
+                now = time.monotonic()
+                bucket = self._bucket(key_hash)
+                victim = None
+                for way in range(self.WAYS):
+                    candidate = bucket + way * self.slot_bytes
+                    _, _, slot_expires, _, key_len, _ = SLOT.unpack_from(self._mm, candidate)
+                    if not key_len:
+                        victim = (candidate, -1.0, key_len)
+                        break
+                    if victim is None or slot_expires < victim[1]:
+                        victim = (candidate, slot_expires, key_len)
+                offset, victim_expires, victim_key_len = victim
+                if not victim_key_len:
+                    self._adjust_header(occupied=1)
+                elif victim_expires > now:
+                    self.evictions += 1
+                    self._adjust_header(evictions=1)
+            self._write_slot(offset, key_hash, expires, key, value)
+
+    def _delete(self, key: bytes) -> None:
+        """Remove a key if present."""
+        key_hash = _hash(key)
+        with self._locked():
+            offset = self._find(key, key_hash)
+            if offset is not None:
+                self._write_slot(offset, 0, 0.0, b"", b"")
+                self._adjust_header(occupied=-1)
+
+    def get_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached user by ID.
+
+        Args:
+            user_id: User ID as string
+
+        Returns:
+            Cached user payload or None on a miss
+        """
+        value = self._read(b"i:" + user_id.encode("utf-8"))
+        if value is None:
+            self._count(False)
+            return None
+        self._count(True)
+        return _decode(value)
+
+    def get_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached user by username.
+
+        Args:
+            username: Username string (normalized before lookup)
+
+        Returns:
+            Cached user payload or None on a miss
+        """
+        normalized = normalize_username(username)
+        user_id = self._read(b"u:" + normalized.encode("utf-8"))
+        if user_id is None:
+            self._count(False)
+            return None
+        user = self.get_by_id(user_id.decode("utf-8"))
+        if user is not None and normalize_username(user["username"]) != normalized:
+            return None
+        return user
+
+    def set(self, user: Dict[str, Any]) -> None:
+        """
+        Store a user payload under its ID and username.
+
+        Args:
+            user: Output of ``user_helper``
+        """
+        if not self.enabled:
+            return
+        expires = time.monotonic() + self.ttl
+        user_id = user["id"].encode("utf-8")
+        self._store(b"i:" + user_id, _encode(user), expires)
+        self._store(b"u:" + normalize_username(user["username"]).encode("utf-8"), user_id, expires)
+
+    def invalidate(self, user_id: str) -> None:
+        """
+        Drop a user from the cache (for every worker).
+
+        Args:
+            user_id: User ID as string
+        """
+        self._delete(b"i:" + user_id.encode("utf-8"))
+
+    def invalidate_many(self, user_ids: Iterable[str]) -> None:
+        """
+        Drop many users from the cache.
+
+        Args:
+            user_ids: User IDs as strings
+        """
+        for user_id in user_ids:
+            self.invalidate(user_id)
+
+    def set_ttl(self, ttl: float) -> None:
+        """
+        Change the lifetime of new entries.
+
+        Shortening it also drops every entry, so none outlives the new TTL.
+
+        Args:
+            ttl: Lifetime in seconds
+        """
+        if ttl < self.ttl:
+            self.clear()
+        self.ttl = ttl
+
+    def clear(self) -> None:
+        """Drop every cached entry (for every worker)."""
+        with self._locked():
+            for index in range(self.slots):
+                offset = TABLE_OFFSET + index * self.slot_bytes
+                if SLOT.unpack_from(self._mm, offset)[4]:
+                    self._write_slot(offset, 0, 0.0, b"", b"")
+            header = HEADER.unpack_from(self._mm, 0)
+            HEADER.pack_into(self._mm, 0, *header[:4], 0, header[5])
+
+    def close(self) -> None:
+        """Unmap the table; the file stays for the other workers."""
+        self._mm.close()
+        os.close(self._fd)
+
+    def workers(self) -> List[Dict[str, Any]]:
+        """Lookup counters of every live worker using the table."""
+        result = []
+        for index in range(MAX_WORKERS):
+            pid, hits, misses = WORKER.unpack_from(self._mm, HEADER_BYTES + index * WORKER.size)
+            if pid and _alive(pid):
+                lookups = hits + misses
+                result.append({
+                    "pid": pid,
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": hits / lookups if lookups else 0.0,
+                })
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Return this worker's counters plus the shared table's size and memory use."""
+        _, _, _, _, occupied, shared_evictions = HEADER.unpack_from(self._mm, 0)
+        lookups = self.hits + self.misses
+        return {
+            "backend": "shm",
+            "pid": os.getpid(),
+            "size": occupied,
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "path": self.path,
+            "memory_bytes": self.memory_bytes,
+            "slot_bytes": self.slot_bytes,
+            "shared_evictions": shared_evictions,
+            "oversize": self.oversize,
+            "torn_reads": self.torn_reads,
+            "workers": self.workers(),
+        }
+
+
+def _alive(pid: int) -> bool:
+    """Whether a process exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
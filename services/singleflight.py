@@ -0,0 +1,54 @@
+"""Coalesce concurrent identical async calls into one."""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Share one in-flight awaitable between concurrent callers with the same key.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same future and receive the same result (or
+    exception). Nothing is retained once the call completes, so this is
+    deduplication, not caching.
+    """
+
+    def __init__(self):
+        """Initialize with no calls in flight."""
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+        # Metrics
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run ``func`` once for all concurrent callers using ``key``.
+
+        Args:
+            key: Identity of the call being deduplicated
+            func: Zero-argument coroutine function performing the work
+
+        Returns:
+            Result of ``func``
+        """
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            # Run the work in its own task so a cancelled caller does not
+            # cancel the call for everybody else waiting on it
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        """Drop a finished call so the next caller starts a fresh one."""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Return executed vs. shared call counters."""
+        return {"in_flight": len(self._calls), "calls": self.calls, "shared": self.shared}
@@ -0,0 +1,304 @@
+"""Short-lived HMAC-signed access tokens validated without database reads."""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from config import settings
+from exceptions import AuthenticationError
+from repositories.revocation_repository import RevocationRepository
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+_HEADER = {"alg": "HS256", "typ": "JWT"}
+_EPOCH = datetime(1970, 1, 1)
+DEFAULT_SECRET_KEY = "your-secret-key-change-in-production"
+
+token_verifications = registry.counter(
+    "token_verifications_total", "Access token verifications by result", ("result",)
+)
+
+
+def _b64encode(raw: bytes) -> str:
+    """URL-safe base64 without padding."""
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    """Decode URL-safe base64 with or without padding."""
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _utc(timestamp: float) -> datetime:
+    """Naive UTC datetime for an epoch timestamp, as MongoDB returns them."""
+    return datetime.utcfromtimestamp(timestamp)
+
+
+def _epoch(value: datetime) -> float:
+    """Epoch timestamp of a naive UTC datetime."""
+    return (value - _EPOCH).total_seconds()
+
+
+class RevocationList:
+    """
+    In-memory view of revoked tokens, refreshed from MongoDB in the background.
+
+    Lookups are plain dict reads. Revocations made by this worker apply
+    immediately; those made by other workers apply after the next refresh,
+    i.e. within settings.TOKEN_REVOCATION_REFRESH_SECONDS.
+    """
+
+    def __init__(self, repo: RevocationRepository, interval: float = settings.TOKEN_REVOCATION_REFRESH_SECONDS):
+        """Initialize with nothing revoked."""
+        self.repo = repo
+        self.interval = interval
+        self._tokens: Dict[str, float] = {}   # jti -> token expiry
+        self._users: Dict[str, float] = {}    # user id -> revoked_at
+        self.refreshed_at: Optional[float] = None
+        self.refresh_failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def is_revoked(self, claims: Dict[str, Any]) -> bool:
+        """Whether a token's ID, or every token of its user issued so far, was revoked."""
+        if claims["jti"] in self._tokens:
+            return True
+        revoked_at = self._users.get(claims["sub"])
+        return revoked_at is not None and claims["iat"] <= revoked_at
+
+    async def revoke_token(self, jti: str, expires: float) -> None:
+        """Revoke one token until it expires."""
+        now = time.time()
+        self._tokens[jti] = expires
+        await self.repo.revoke(f"token:{jti}", _utc(now), _utc(expires))
+
+    async def revoke_user(self, user_id: str) -> None:
+        """Revoke every token issued to a user up to now."""
+        now = time.time()
+        # iat has one-second resolution, so this also covers tokens issued later in the same second
+        self._users[user_id] = int(now)
+        await self.repo.revoke(f"user:{user_id}", _utc(now), _utc(now + settings.TOKEN_TTL_SECONDS))
+
+    async def revoke_users(self, user_ids: List[str]) -> None:
+        """Revoke every token issued to many users up to now, with one write."""
+        now = time.time()
+        for user_id in user_ids:
+            self._users[user_id] = int(now)
+        await self.repo.revoke_many(
+            [f"user:{user_id}" for user_id in user_ids], _utc(now), _utc(now + settings.TOKEN_TTL_SECONDS)
+        )
+
+    async def refresh(self) -> None:
+        """
+        Merge the active revocations in MongoDB into the in-memory view.
+
+        Revocations are never undone, so entries are only added here and
+        pruned once every token they cover has expired. Merging (rather than
+        replacing) also keeps a local revocation whose write is still in
+        flight when the load runs.
+        """
+        entries = await self.repo.load_active(datetime.utcnow())
+        now = time.time()
+        tokens = {jti: expires for jti, expires in self._tokens.items() if expires > now}
+        users = {
+            user_id: revoked_at for user_id, revoked_at in self._users.items()
+            if revoked_at + settings.TOKEN_TTL_SECONDS > now
+        }
+        for entry in entries:
+            kind, _, value = entry["_id"].partition(":")
+            if kind == "token":
+                tokens[value] = _epoch(entry["expires_at"])
+            elif kind == "user":
+                users[value] = max(users.get(value, 0), int(_epoch(entry["revoked_at"])))
+        self._tokens = tokens
+        self._users = users
+        self.refreshed_at = time.monotonic()
+
+    async def _run(self) -> None:
+        """Refresh on every interval until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                # Keep serving the last known list; the next refresh retries
+                self.refresh_failures += 1
+                logger.warning("Revocation list refresh failed: %s", e)
+
+    async def start(self) -> None:
+        """Load the list once, then keep refreshing it in a background task."""
+        try:
+            await self.refresh()
+        except Exception as e:
+            self.refresh_failures += 1
+            logger.warning("Initial revocation list load failed: %s", e)
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the background refresh."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return list sizes and refresh state."""
+        return {
+            "revoked_tokens": len(self._tokens),
+            "revoked_users": len(self._users),
+            "refreshed_seconds_ago": (
+                time.monotonic() - self.refreshed_at if self.refreshed_at is not None else None
+            ),
+            "refresh_failures": self.refresh_failures,
+        }
+
+
+class TokenService:
+    """
+    Issue and verify HS256 JWTs carrying a user's id, username and active flag.
+
+    Verification is pure CPU: an HMAC comparison, an expiry check and a
+    revocation-list lookup.
+    """
+
+    def __init__(self, secret: str = settings.SECRET_KEY, ttl: int = settings.TOKEN_TTL_SECONDS):
+        """Initialize with the signing secret and token lifetime."""
+        self._key = secret.encode("utf-8")
+        self.ttl = ttl
+        self._header = _b64encode(json.dumps(_HEADER, separators=(",", ":")).encode("utf-8"))
+        self.revocations = RevocationList(RevocationRepository())
+
+    def _sign(self, signing_input: str) -> str:
+        """HMAC-SHA256 signature of the header and payload segments."""
+        return _b64encode(hmac.new(self._key, signing_input.encode("ascii"), hashlib.sha256).digest())
+
+    def issue(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Create a signed token for a user.
+
+        Args:
+            user: Dictionary with ``id``, ``username`` and optionally ``is_active``
+
+        Returns:
+            Dictionary with ``access_token``, ``token_type``, ``expires_in`` and ``expires_at``
+        """
+        now = int(time.time())
+        claims = {
+            "sub": user["id"],
+            "username": user["username"],
+            "is_active": user.get("is_active", True),
+            "iat": now,
+            "exp": now + self.ttl,
+            "jti": secrets.token_urlsafe(12),
+        }
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        signing_input = f"{self._header}.{payload}"
+        return {
+            "access_token": f"{signing_input}.{self._sign(signing_input)}",
+            "token_type": "bearer",
+            "expires_in": self.ttl,
+            "expires_at": _utc(claims["exp"]),
+        }
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Validate a token's signature, expiry and revocation status.
+
+        Args:
+            token: Encoded token
+
+        Returns:
+            Token claims
+
+        Raises:
+            AuthenticationError: If the token is malformed, forged, expired or revoked
+        """
+        try:
+            header, payload, signature = token.split(".")
+            if header != self._header:
+                raise ValueError("unexpected header")
+            expected = self._sign(f"{header}.{payload}")
+            if not hmac.compare_digest(signature, expected):
+                token_verifications.inc("invalid")
+                raise AuthenticationError("Invalid token")
+            claims = json.loads(_b64decode(payload))
+        except AuthenticationError:
+            raise
+        except Exception:
+            token_verifications.inc("malformed")
+            raise AuthenticationError("Invalid token")
+
+        if claims["exp"] <= time.time():
+            token_verifications.inc("expired")
+            raise AuthenticationError("Token expired")
+        if self.revocations.is_revoked(claims):
+            token_verifications.inc("revoked")
+            raise AuthenticationError("Token revoked")
+        token_verifications.inc("valid")
+        return claims
+
+    def introspect(self, token: str) -> Dict[str, Any]:
+        """
+        Describe a token in the style of RFC 7662.
+
+        Args:
+            token: Encoded token
+
+        Returns:
+            ``{"active": True, ...claims}`` for a usable token, otherwise
+            ``{"active": False, "reason": ...}``
+        """
+        try:
+            claims = self.verify(token)
+        except AuthenticationError as e:
+            return {"active": False, "reason": e.message}
+        return {"active": bool(claims["is_active"]), **claims}
+
+    async def start(self) -> None:
+        """Load revocations and start refreshing them in the background."""
+        if self._key == DEFAULT_SECRET_KEY.encode("utf-8"):
+            logger.warning("SECRET_KEY is the built-in default; set it before issuing tokens in production")
+        await self.revocations.start()
+
+    async def stop(self) -> None:
+        """Stop the background revocation refresh."""
+        await self.revocations.stop()
+
+    async def revoke(self, claims: Dict[str, Any]) -> None:
+        """
+        Revoke a verified token.
+
+        Args:
+            claims: Claims returned by ``verify``
+        """
+        await self.revocations.revoke_token(claims["jti"], claims["exp"])
+
+    async def revoke_user(self, user_id: str) -> None:
+        """
+        Revoke every token issued to a user so far.
+
+        Args:
+            user_id: User ID as string
+        """
+        await self.revocations.revoke_user(user_id)
+
+    async def revoke_users(self, user_ids: List[str]) -> None:
+        """
+        Revoke every token issued to each of many users so far.
+
+        Args:
+            user_ids: User IDs as strings
+        """
+        await self.revocations.revoke_users(user_ids)
+
+
+token_service = TokenService()
@@ -1,32 +1,111 @@
 """User service for business logic."""
-from repositories.user_repository import UserRepository
-from models.user_model import user_helper
-from schemas.user_schema import UserCreateSchema, UserResponseSchema
-from exceptions import UserNotFoundError, InvalidUserIDError, DuplicateUserError, InvalidUserDataError
-from utils import validate_password_strength, sanitize_update_data
-from datetime import datetime
-from typing import Dict, Any, Optional
-import bcrypt
+from repositories.user_repository import UserRepository, CREDENTIALS_PROJECTION
+from services.hashing import password_hasher
+from services.cache import user_cache, normalize_username
+from services.tokens import token_service
+from services.availability import availability_index
+from services.idempotency import idempotency_store
+from services.invalidation import invalidation_bus
+from services.search import name_index, normalize_name, name_matches, search_duration
+from models.user_model import user_helper, select_fields, fields_projection
+from schemas.user_schema import UserCreateSchema, UserResponseSchema, UserAuthenticateSchema
+from pydantic import ValidationError
+from exceptions import (
+    UserNotFoundError, InvalidUserIDError, DuplicateUserError, InvalidUserDataError,
+    AuthenticationError, PreconditionFailedError, HashingOverloadedError
+)
+from utils import (
+    validate_password_strength, sanitize_update_data, encode_cursor, decode_cursor, utcnow,
+    user_etag, parse_etags, etag_version
+)
+from config import settings
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List, AsyncIterator, Sequence, Tuple
 from bson import ObjectId
+import asyncio
+import hashlib
+import hmac
+import json
 import logging
+import time
+import zlib
 
 logger = logging.getLogger(__name__)
 
+EXPORT_PROJECTION = {"password": 0}
+BULK_DELETE_PROJECTION = {"_id": 1, "username": 1, "email": 1, "full_name": 1}
+BULK_RENAME_PROJECTION = {"_id": 1, "full_name": 1}
+SEARCH_FIELDS = ("username", "email", "full_name")
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
+def _json_default(value: Any) -> Any:
+    """Serialize values the stdlib encoder does not handle."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+def build_user_document(user: UserCreateSchema, hashed_password: str) -> Dict[str, Any]:
+    """Build the normalized MongoDB document for a new user."""
+    now = utcnow()
+    return {
+        "username": user.username.strip().lower(),
+        "email": user.email.strip().lower(),
+        "password": hashed_password,
+        "full_name": user.full_name.strip() if user.full_name else None,
+        "mobile": user.mobile,
+        "is_active": user.is_active,
+        "created_at": now,
+        "updated_at": now
+    }
+
+
+def time_range_query(
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    updated_after: Optional[datetime] = None,
+    updated_before: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Build a MongoDB filter for half-open created_at/updated_at ranges.
+    
+    Timezone-aware bounds are converted to naive UTC, matching the stored values.
+    """
+    def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+        if value is None or value.tzinfo is None:
+            return value
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    query: Dict[str, Any] = {}
+    for field, lower, upper in (
+        ("created_at", created_after, created_before),
+        ("updated_at", updated_after, updated_before)
+    ):
+        bounds = {}
+        if lower is not None:
+            bounds["$gte"] = naive_utc(lower)
+        if upper is not None:
+            bounds["$lt"] = naive_utc(upper)
+        if bounds:
+            query[field] = bounds
+    return query
+
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify(plain_password, hashed_password)
 
 
 class UserService:
     """Service class for user business logic."""
 
     def __init__(self):
-        """Initialize with repository."""
+        """Initialize with repository and cache."""
         self.repo = UserRepository()
+        self.cache = user_cache
 
     async def add_user(self, user: UserCreateSchema) -> Dict[str, Any]:
         """
@@ -45,34 +124,154 @@ class UserService:
         # Validate password strength
         is_valid, error_msg = validate_password_strength(user.password)
         if not is_valid:
-            logger.warning(f"Password validation failed: {error_msg}")
+            logger.warning("Password validation failed: %s", error_msg)
             raise InvalidUserDataError(error_msg)
         
-        user_data = {
-            "username": user.username.strip().lower(),
-            "email": user.email.strip().lower(),
-            "password": hash_password(user.password),
-            "full_name": user.full_name.strip() if user.full_name else None,
-            "mobile": user.mobile,
-            "is_active": user.is_active,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
+        user_data = build_user_document(user, await hash_password(user.password))
         
         result = await self.repo.create(user_data)
-        logger.info(f"User created: {user_data['username']}")
-        return user_helper(result)
+        availability_index.add_user(user_data)
+        name_index.add_user(result)
+        logger.info("User created: %s", user_data["username"])
+        new_user = user_helper(result)
+        self.cache.set(new_user)
+        return new_user
+
+    async def add_user_idempotent(self, user: UserCreateSchema, idempotency_key: str) -> Tuple[Dict[str, Any], bool]:
+        """
+        Add a new user at most once per Idempotency-Key.
+        
+        A retry with the same key and body replays the first outcome (the
+        created user, or the same 400/409 error) without hashing the
+        password or querying the users collection; a concurrent retry waits
+        for the original to finish.
+        
+        Args:
+            user: UserCreateSchema instance
+            idempotency_key: Client-supplied key
+            
+        Returns:
+            Tuple of (user response dictionary, whether it was replayed)
+            
+        Raises:
+            InvalidUserDataError: If password validation fails
+            DuplicateUserError: If username or email already exists
+            IdempotencyKeyConflictError: If the key was used with a different body
+            IdempotencyKeyInProgressError: If the original request is still running
+        """
+        # Keyed so the stored fingerprint reveals nothing about the password
+        body = json.dumps(user.model_dump(), sort_keys=True, default=_json_default)
+        fingerprint = hmac.new(settings.SECRET_KEY.encode("utf-8"), body.encode("utf-8"), hashlib.sha256).hexdigest()
+        return await idempotency_store.run(idempotency_key, fingerprint, lambda: self.add_user(user))
+
+    async def import_users(self, rows: List[Any]) -> Dict[str, Any]:
+        """
+        Create many users, reporting the outcome of every row.
+        
+        Rows are processed in chunks of settings.BULK_IMPORT_CHUNK_SIZE:
+        each chunk is validated, its passwords are hashed in parallel
+        across the hashing pool, and the valid rows are written with one
+        unordered insert. Duplicates are reported by the unique indexes
+        instead of being checked up front. When the hashing pool is
+        saturated, the valid rows of that chunk are reported as
+        ``retryable`` (nothing was written for them) and the import goes on.
+        
+        Args:
+            rows: Raw user objects as returned by ``parse_json_rows``
+            
+        Returns:
+            Dictionary with ``summary`` counts and per-row ``results``
+        """
+        results: List[Dict[str, Any]] = []
+        chunk_size = max(1, settings.BULK_IMPORT_CHUNK_SIZE)
+        
+        for start in range(0, len(rows), chunk_size):
+            valid: List[tuple] = []
+            for index, row in enumerate(rows[start:start + chunk_size], start=start):
+                if isinstance(row, InvalidUserDataError):
+                    results.append({"index": index, "status": "invalid", "error": row.message})
+                    continue
+                try:
+                    user = UserCreateSchema.model_validate(row)
+                except ValidationError as e:
+                    error = "; ".join(
+                        f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}"
+                        for err in e.errors()
+                    )
+                    results.append({"index": index, "status": "invalid", "error": error})
+                    continue
+                
+                is_valid, error_msg = validate_password_strength(user.password)
+                if not is_valid:
+                    results.append({"index": index, "status": "invalid", "error": error_msg})
+                    continue
+                
+                results.append({"index": index, "status": "pending"})
+                valid.append((len(results) - 1, user))
+            
+            if not valid:
+                continue
+            
+            try:
+                hashes = await password_hasher.hash_many([user.password for _, user in valid])
+            except HashingOverloadedError as e:
+                for position, _ in valid:
+                    results[position].update({"status": "retryable", "error": e.message})
+                continue
+            documents = [build_user_document(user, hashed) for (_, user), hashed in zip(valid, hashes)]
+            outcomes = await self.repo.insert_many(documents)
+            for (position, _), document, outcome in zip(valid, documents, outcomes):
+                results[position].update(outcome)
+                if outcome["status"] == "created":
+                    availability_index.add_user(document)
+                    name_index.add_user(document)
+        
+        summary = {"created": 0, "duplicate": 0, "invalid": 0, "retryable": 0}
+        for result in results:
+            summary[result["status"]] += 1
+        logger.info(
+            "Bulk import finished: %d created, %d duplicate, %d invalid, %d retryable",
+            summary["created"], summary["duplicate"], summary["invalid"], summary["retryable"]
+        )
+        return {"summary": summary, "results": results}
 
-    async def get_user_by_id(self, user_id: str) -> Dict[str, Any]:
+    async def get_user_by_id(self, user_id: str, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
         """
         Get user by ID.
         
         Args:
             user_id: User ID as string
+            fields: Optional response fields to return; narrows the
+                database projection when the user is not cached
             
         Returns:
             User response dictionary
             
+        Raises:
+            InvalidUserIDError: If user ID format is invalid
+            UserNotFoundError: If user not found
+        """
+        user, _ = await self.get_user_with_etag(user_id, fields)
+        return user
+
+    async def get_user_with_etag(
+        self,
+        user_id: str,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        Get user by ID together with the ETag of the returned representation.
+        
+        A cached user yields its tag without touching MongoDB, which is what
+        lets conditional GETs be answered with 304 straight from the cache.
+        
+        Args:
+            user_id: User ID as string
+            fields: Optional response fields to return
+            
+        Returns:
+            Tuple of (user response dictionary, quoted ETag)
+            
         Raises:
             InvalidUserIDError: If user ID format is invalid
             UserNotFoundError: If user not found
@@ -80,19 +279,190 @@ class UserService:
         if not ObjectId.is_valid(user_id):
             raise InvalidUserIDError("Invalid user ID format")
         
-        user = await self.repo.get_by_id(user_id)
+        # Cache entries are keyed by the canonical (lowercase) form of the ID
+        cached = self.cache.get_by_id(str(ObjectId(user_id)))
+        if cached is not None:
+            return self._with_etag(cached, fields)
+        
+        if fields:
+            user = await self.repo.get_by_id(user_id, projection=self._etag_projection(fields))
+            if not user:
+                raise UserNotFoundError("User not found")
+            return user_helper(user, fields), user_etag(str(user["_id"]), user.get("updated_at"), fields)
+        
+        # A cached result must not come from a lagging secondary
+        user = await self.repo.get_by_id(user_id, primary=self.cache.enabled)
         
         if not user:
             raise UserNotFoundError("User not found")
         
-        return user_helper(user)
+        result = user_helper(user)
+        self.cache.set(result)
+        return self._with_etag(result, None)
 
-    async def get_user_by_username(self, username: str) -> Dict[str, Any]:
+    @staticmethod
+    def _with_etag(user: Dict[str, Any], fields: Optional[Sequence[str]]) -> Tuple[Dict[str, Any], str]:
+        """Narrow a full response payload and tag it."""
+        etag = user_etag(user["id"], user.get("updated_at"), fields)
+        return (select_fields(user, fields) if fields else user), etag
+
+    @staticmethod
+    def _etag_projection(fields: Sequence[str]) -> Dict[str, int]:
+        """Projection for a sparse read that still carries what the ETag needs."""
+        return {**fields_projection(fields), "_id": 1, "updated_at": 1}
+
+    async def get_users_by_ids(self, user_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get many users by ID, preserving request order.
+        
+        Cached users are served from the cache; the rest are fetched with a
+        single repository query.
+        
+        Args:
+            user_ids: User IDs as strings
+            
+        Returns:
+            One result per requested ID with ``id``, ``status``
+            (found, not_found or invalid_id) and ``data``
+        """
+        canonical_ids = [str(ObjectId(user_id)) if ObjectId.is_valid(user_id) else None for user_id in user_ids]
+        
+        found: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for user_id in dict.fromkeys(filter(None, canonical_ids)):
+            cached = self.cache.get_by_id(user_id)
+            if cached is not None:
+                found[user_id] = cached
+            else:
+                missing.append(user_id)
+        
+        if missing:
+            users = await self.repo.get_many(missing, primary=self.cache.enabled)
+            for user_id, user in users.items():
+                result = user_helper(user)
+                self.cache.set(result)
+                found[user_id] = result
+        
+        results = []
+        for user_id, canonical_id in zip(user_ids, canonical_ids):
+            if canonical_id is None:
+                results.append({"id": user_id, "status": "invalid_id", "data": None})
+            elif canonical_id in found:
+                results.append({"id": user_id, "status": "found", "data": found[canonical_id]})
+            else:
+                results.append({"id": user_id, "status": "not_found", "data": None})
+        return results
+
+    async def list_users(
+        self,
+        limit: int = settings.LIST_DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        List users newest first with cursor pagination.
+        
+        Args:
+            limit: Page size (capped at settings.LIST_MAX_PAGE_SIZE)
+            cursor: Opaque token from a previous page's ``next_cursor``
+            is_active: Optional active-status filter
+            fields: Optional response fields to return
+            
+        Returns:
+            Dictionary with ``users`` and ``next_cursor`` (None on the last page)
+            
+        Raises:
+            InvalidUserDataError: If the cursor token is malformed
+        """
+        limit = max(1, min(limit, settings.LIST_MAX_PAGE_SIZE))
+        
+        after = None
+        if cursor:
+            after = decode_cursor(cursor)
+            if after is None:
+                raise InvalidUserDataError("Invalid pagination cursor")
+        
+        # Fetch one extra document to learn whether another page exists
+        projection = fields_projection(fields) if fields else None
+        users = await self.repo.list_page(limit + 1, after=after, is_active=is_active, projection=projection)
+        
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            last = users[-1]
+            next_cursor = encode_cursor(last.get("created_at"), last["_id"])
+        
+        return {
+            "users": [user_helper(user, fields) for user in users],
+            "next_cursor": next_cursor
+        }
+
+    async def export_users(
+        self,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        updated_after: Optional[datetime] = None,
+        updated_before: Optional[datetime] = None,
+        compress: bool = False
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream all matching users as newline-delimited JSON.
+        
+        Documents are read from the database cursor with the password
+        excluded server-side and written out in chunks of about
+        settings.EXPORT_CHUNK_BYTES, so memory use does not grow with the
+        collection size.
+        
+        Args:
+            created_after: Only users created at or after this time
+            created_before: Only users created before this time
+            updated_after: Only users updated at or after this time
+            updated_before: Only users updated before this time
+            compress: Gzip-compress the stream
+            
+        Yields:
+            Chunks of NDJSON (gzip-compressed if requested)
+        """
+        query = time_range_query(created_after, created_before, updated_after, updated_before)
+        
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+        buffer: List[bytes] = []
+        buffered = 0
+        rows = 0
+        started = time.perf_counter()
+        
+        try:
+            async for user in self.repo.iter_users(query, EXPORT_PROJECTION):
+                line = json.dumps(user_helper(user), default=_json_default).encode("utf-8") + b"\n"
+                buffer.append(line)
+                buffered += len(line)
+                rows += 1
+                if buffered >= settings.EXPORT_CHUNK_BYTES:
+                    chunk = b"".join(buffer)
+                    buffer, buffered = [], 0
+                    chunk = compressor.compress(chunk) if compressor else chunk
+                    if chunk:
+                        yield chunk
+            
+            chunk = b"".join(buffer)
+            if compressor:
+                chunk = compressor.compress(chunk) + compressor.flush()
+            if chunk:
+                yield chunk
+        finally:
+            elapsed = time.perf_counter() - started
+            rate = rows / elapsed if elapsed > 0 else 0.0
+            logger.info("Exported %d users in %.2fs (%.0f rows/s)", rows, elapsed, rate)
+
+    async def get_user_by_username(self, username: str, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
         """
-        Get user by username.
+        Get user by username (case-insensitive, as usernames are stored normalized).
         
         Args:
             username: Username string
+            fields: Optional response fields to return; narrows the
+                database projection when the user is not cached
             
         Returns:
             User response dictionary
@@ -100,20 +470,114 @@ class UserService:
         Raises:
             UserNotFoundError: If user not found
         """
-        user = await self.repo.get_by_username(username)
+        user, _ = await self.get_user_by_username_with_etag(username, fields)
+        return user
+
+    async def get_user_by_username_with_etag(
+        self,
+        username: str,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        Get user by username together with the ETag of the returned representation.
+        
+        Args:
+            username: Username string
+            fields: Optional response fields to return
+            
+        Returns:
+            Tuple of (user response dictionary, quoted ETag)
+            
+        Raises:
+            UserNotFoundError: If user not found
+        """
+        cached = self.cache.get_by_username(username)
+        if cached is not None:
+            return self._with_etag(cached, fields)
+        
+        if fields:
+            user = await self.repo.get_by_username(
+                normalize_username(username), projection=self._etag_projection(fields)
+            )
+            if not user:
+                raise UserNotFoundError("User not found")
+            return user_helper(user, fields), user_etag(str(user["_id"]), user.get("updated_at"), fields)
+        
+        user = await self.repo.get_by_username(normalize_username(username), primary=self.cache.enabled)
         
         if not user:
             raise UserNotFoundError("User not found")
         
-        return user_helper(user)
+        result = user_helper(user)
+        self.cache.set(result)
+        return self._with_etag(result, None)
+
+    async def authenticate(self, credentials: UserAuthenticateSchema) -> Dict[str, Any]:
+        """
+        Verify a username/email and password pair.
+        
+        The lookup fetches only the fields needed to decide the login, and
+        bcrypt runs in the hashing pool. Unknown accounts are checked against
+        a dummy hash so they take as long as a wrong password. After a
+        successful login, a hash made with a cost other than
+        settings.BCRYPT_ROUNDS is replaced with one at the current cost.
+        
+        Args:
+            credentials: UserAuthenticateSchema instance
+            
+        Returns:
+            Dictionary with the authenticated user's ``id`` and ``username``
+            
+        Raises:
+            AuthenticationError: If the credentials are wrong or the user is inactive
+        """
+        if credentials.username is not None:
+            user = await self.repo.get_by_username(
+                normalize_username(credentials.username), projection=CREDENTIALS_PROJECTION, primary=True
+            )
+        else:
+            user = await self.repo.get_by_email(
+                credentials.email.strip().lower(), projection=CREDENTIALS_PROJECTION, primary=True
+            )
+        
+        if not user or not user.get("password"):
+            await password_hasher.verify_dummy(credentials.password)
+            raise AuthenticationError()
+        
+        if not await verify_password(credentials.password, user["password"]):
+            raise AuthenticationError()
+        
+        if not user.get("is_active", True):
+            raise AuthenticationError("User account is inactive")
+        
+        if password_hasher.needs_rehash(user["password"]):
+            try:
+                new_hash = await hash_password(credentials.password)
+                if await self.repo.replace_password_hash(user["_id"], user["password"], new_hash):
+                    logger.info("Rehashed password for %s at cost %d", user["username"], settings.BCRYPT_ROUNDS)
+            except Exception as e:
+                # The login itself succeeded; a failed upgrade is retried next time
+                logger.warning("Password rehash failed for %s: %s", user["username"], e)
+        
+        return {"id": str(user["_id"]), "username": user["username"]}
 
-    async def update_user(self, user_id: str, update_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def update_user(
+        self,
+        user_id: str,
+        update_data: Dict[str, Any],
+        if_match: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Update user information.
         
+        With ``if_match`` the version encoded in the ETag(s) becomes part of
+        the update filter, so the check and the write are a single atomic
+        ``find_one_and_update``.
+        
         Args:
             user_id: User ID as string
             update_data: Dictionary of fields to update
+            if_match: Optional If-Match header value
             
         Returns:
             Updated user response dictionary
@@ -121,23 +585,177 @@ class UserService:
         Raises:
             InvalidUserIDError: If user ID format is invalid
             UserNotFoundError: If user not found
+            PreconditionFailedError: If the user no longer matches ``if_match``
         """
         if not ObjectId.is_valid(user_id):
             raise InvalidUserIDError("Invalid user ID format")
         
+        match = self._if_match_filter(str(ObjectId(user_id)), if_match)
+        
         # Sanitize update data to prevent injection attacks
         update_data = sanitize_update_data(update_data)
         
         # Add updated_at timestamp
-        update_data["updated_at"] = datetime.utcnow()
+        update_data["updated_at"] = utcnow()
+        
+        # The name index needs the name being replaced
+        renamed = "full_name" in update_data
+        before = await self.repo.get_by_id(user_id, projection={"full_name": 1}, primary=True) if renamed else None
         
-        user = await self.repo.update(user_id, update_data)
+        canonical_id = str(ObjectId(user_id))
+        self.cache.invalidate(canonical_id)
+        user = await self.repo.update(user_id, update_data, match=match)
+        invalidation_bus.publish([canonical_id])
         
         if not user:
+            if match is not None and await self.repo.get_by_id(user_id, projection={"_id": 1}, primary=True):
+                raise PreconditionFailedError()
             raise UserNotFoundError("User not found")
         
-        logger.info(f"User updated: {user_id}")
-        return user_helper(user)
+        logger.info("User updated: %s", user_id)
+        if renamed:
+            name_index.replace_user(before.get("full_name") if before else None, user)
+        result = user_helper(user)
+        # Replaces anything a concurrent cache miss stored during the write
+        self.cache.set(result)
+        if update_data.get("is_active") is False:
+            # Tokens carry is_active; make the ones already issued stop working
+            await token_service.revoke_user(result["id"])
+        return result
+
+    @staticmethod
+    def _if_match_filter(user_id: str, if_match: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Translate an If-Match header into an updated_at filter.
+        
+        Tags are compared strongly, so weak (``W/``) tags never match.
+        
+        Args:
+            user_id: Canonical user ID
+            if_match: Raw If-Match header value
+            
+        Returns:
+            Filter to add to the update, or None when there is no precondition
+            
+        Raises:
+            PreconditionFailedError: If no tag can refer to this user
+        """
+        if not parse_etags(if_match):
+            return None
+        tags = parse_etags(if_match, strong=True)
+        if "*" in tags:
+            return None
+        
+        versions = []
+        for tag in tags:
+            parsed = etag_version(tag)
+            if parsed is not None and parsed[0] == user_id:
+                versions.append(parsed[1])
+        if not versions:
+            raise PreconditionFailedError()
+        if len(versions) == 1:
+            return {"updated_at": versions[0]}
+        return {"updated_at": {"$in": versions}}
+
+    async def check_availability(
+        self,
+        username: Optional[str] = None,
+        email: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Report whether a username and/or email can still be registered.
+        
+        Values that were never taken are answered from the in-memory
+        availability filter; only possible hits query MongoDB.
+        
+        Args:
+            username: Username to check
+            email: Email to check
+            
+        Returns:
+            Dictionary with the normalized values and their availability
+            
+        Raises:
+            InvalidUserDataError: If neither value is given
+        """
+        if not username and not email:
+            raise InvalidUserDataError("Provide a username or an email to check")
+        
+        result: Dict[str, Any] = {}
+        if username:
+            normalized = normalize_username(username)
+            result["username"] = normalized
+            result["username_available"] = not await availability_index.is_taken("username", normalized)
+        if email:
+            normalized = email.strip().lower()
+            result["email"] = normalized
+            result["email_available"] = not await availability_index.is_taken("email", normalized)
+        return result
+
+    async def search_users(
+        self,
+        query: str,
+        limit: int = settings.SEARCH_DEFAULT_LIMIT,
+        field: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find users whose username, email or full name starts with ``query``.
+        
+        Usernames and emails are matched with index range scans, run
+        concurrently. Full names match from the start of any word and come
+        from the in-memory name index; candidates are re-checked against
+        their documents, so keys left stale by other workers are dropped.
+        Username matches come first, then email, then full name, without
+        duplicates.
+        
+        Args:
+            query: Search text
+            limit: Maximum number of users
+            field: Search only "username", "email" or "full_name"
+            
+        Returns:
+            List of user response dictionaries
+            
+        Raises:
+            InvalidUserDataError: If the query is blank
+        """
+        start = time.perf_counter()
+        prefix = query.strip().lower()
+        if not prefix:
+            raise InvalidUserDataError("Search query must not be blank")
+        
+        lookups = []
+        for name in ([field] if field else SEARCH_FIELDS):
+            if name == "full_name":
+                lookups.append(self._search_names(query, limit))
+            else:
+                lookups.append(self.repo.search_prefix(name, prefix, limit))
+        
+        users: Dict[ObjectId, Dict[str, Any]] = {}
+        for found in await asyncio.gather(*lookups):
+            for user in found:
+                users.setdefault(user["_id"], user)
+        results = [user_helper(user) for user in list(users.values())[:limit]]
+        search_duration.observe(time.perf_counter() - start)
+        return results
+
+    async def _search_names(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Users with a full-name word starting with ``query``, in index order."""
+        if not (name_index.enabled and name_index.ready):
+            return []
+        normalized = normalize_name(query)
+        ids = name_index.search(normalized, limit)
+        if not ids:
+            return []
+        
+        loaded = {user["_id"]: user async for user in self.repo.iter_users({"_id": {"$in": ids}}, sort=None)}
+        users = [
+            loaded[user_id] for user_id in ids
+            if user_id in loaded and name_matches(loaded[user_id].get("full_name"), normalized)
+        ]
+        if len(users) < len(ids):
+            name_index.record_stale(len(ids) - len(users))
+        return users
 
     async def delete_user(self, user_id: str) -> Dict[str, str]:
         """
@@ -156,9 +774,209 @@ class UserService:
         if not ObjectId.is_valid(user_id):
             raise InvalidUserIDError("Invalid user ID format")
         
+        canonical_id = str(ObjectId(user_id))
+        self.cache.invalidate(canonical_id)
         deleted = await self.repo.delete(user_id)
+        # Again after the write: a read that missed the cache meanwhile may
+        # have cached the user it loaded before the delete
+        self.cache.invalidate(canonical_id)
+        invalidation_bus.publish([canonical_id])
         
-        if not deleted:
+        if deleted is None:
             raise UserNotFoundError("User not found")
         
-        return {"message": "User deleted successfully"}
\ No newline at end of file
+        availability_index.remove_user(deleted)
+        name_index.remove_user(deleted)
+        await token_service.revoke_user(canonical_id)
+        return {"message": "User deleted successfully"}
+
+    async def bulk_update_users(
+        self,
+        update_data: Dict[str, Any],
+        user_ids: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Set the same fields on every selected user.
+        
+        Users are selected by ID or by filter and written in chunks of
+        settings.BULK_WRITE_CHUNK_SIZE with one ``update_many`` each; no
+        documents are returned. Filter conditions are repeated in every
+        write, so a user that stopped matching mid-operation is skipped, and
+        only the users actually written are re-indexed or have their tokens
+        revoked. Setting ``full_name`` also reads each chunk's current names
+        so the name search index can drop them.
+        
+        Args:
+            update_data: Fields to set (sanitized like single updates)
+            user_ids: User IDs as strings
+            filters: ``is_active`` and created/updated time bounds
+            
+        Returns:
+            Dictionary with ``matched``, ``modified`` and ``invalid_ids``
+            
+        Raises:
+            InvalidUserDataError: If there is nothing to update
+        """
+        update_data = sanitize_update_data(update_data)
+        if not update_data:
+            raise InvalidUserDataError("No fields to update")
+        update_data["updated_at"] = utcnow()
+        
+        query = self._bulk_query(filters)
+        object_ids, invalid_ids = self._bulk_ids(user_ids)
+        renamed = "full_name" in update_data
+        matched = modified = 0
+        async for chunk in self._bulk_chunks(object_ids, query, BULK_RENAME_PROJECTION if renamed else None):
+            ids = [user["_id"] for user in chunk]
+            self.cache.invalidate_many(str(user_id) for user_id in ids)
+            chunk_matched, chunk_modified = await self.repo.update_many(ids, update_data, match=query)
+            matched += chunk_matched
+            modified += chunk_modified
+            # Again after the write, for reads that missed the cache meanwhile
+            self.cache.invalidate_many(str(user_id) for user_id in ids)
+            if chunk_modified:
+                invalidation_bus.publish(str(user_id) for user_id in ids)
+            updated = set(await self._updated_ids(ids, chunk_matched, update_data["updated_at"]))
+            if renamed:
+                for user in chunk:
+                    if user["_id"] in updated:
+                        name_index.replace_user(user.get("full_name"), {"_id": user["_id"], **update_data})
+            if update_data.get("is_active") is False and updated:
+                await token_service.revoke_users([str(user_id) for user_id in ids if user_id in updated])
+        
+        logger.info("Bulk update: %d matched, %d modified", matched, modified)
+        return {"matched": matched, "modified": modified, "invalid_ids": invalid_ids}
+
+    async def bulk_delete_users(
+        self,
+        user_ids: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Delete every selected user.
+        
+        Works like ``bulk_update_users``: each chunk is read with a
+        projection (for the availability filter and name index) and removed with one
+        ``delete_many``.
+        
+        Args:
+            user_ids: User IDs as strings
+            filters: ``is_active`` and created/updated time bounds
+            
+        Returns:
+            Dictionary with ``deleted`` and ``invalid_ids``
+        """
+        query = self._bulk_query(filters)
+        object_ids, invalid_ids = self._bulk_ids(user_ids)
+        deleted = 0
+        async for chunk in self._bulk_chunks(object_ids, query, BULK_DELETE_PROJECTION):
+            if not chunk:
+                continue
+            ids = [user["_id"] for user in chunk]
+            self.cache.invalidate_many(str(user_id) for user_id in ids)
+            chunk_deleted = await self.repo.delete_many(ids, match=query)
+            deleted += chunk_deleted
+            # Again after the write, for reads that missed the cache meanwhile
+            self.cache.invalidate_many(str(user_id) for user_id in ids)
+            if chunk_deleted:
+                invalidation_bus.publish(str(user_id) for user_id in ids)
+            removed = set(await self._deleted_ids(ids, chunk_deleted))
+            for user in chunk:
+                if user["_id"] in removed:
+                    availability_index.remove_user(user)
+                    name_index.remove_user(user)
+            if removed:
+                await token_service.revoke_users([str(user_id) for user_id in ids if user_id in removed])
+        
+        logger.info("Bulk delete: %d deleted", deleted)
+        return {"deleted": deleted, "invalid_ids": invalid_ids}
+
+    @staticmethod
+    def _bulk_query(filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Translate a bulk filter into a MongoDB filter."""
+        if not filters:
+            return {}
+        query = time_range_query(
+            filters.get("created_after"), filters.get("created_before"),
+            filters.get("updated_after"), filters.get("updated_before")
+        )
+        if filters.get("is_active") is not None:
+            query["is_active"] = filters["is_active"]
+        return query
+
+    @staticmethod
+    def _bulk_ids(user_ids: Optional[List[str]]) -> Tuple[Optional[List[ObjectId]], List[str]]:
+        """Split requested IDs into unique ObjectIds and invalid strings."""
+        if user_ids is None:
+            return None, []
+        invalid = [user_id for user_id in user_ids if not ObjectId.is_valid(user_id)]
+        valid = list(dict.fromkeys(ObjectId(user_id) for user_id in user_ids if ObjectId.is_valid(user_id)))
+        return valid, invalid
+
+    async def _updated_ids(self, ids: List[ObjectId], matched: int, updated_at: datetime) -> List[ObjectId]:
+        """
+        IDs in a chunk that a bulk update actually wrote.
+        
+        Users that stopped matching the filter mid-operation are skipped by
+        the write. Every written user carries this operation's ``updated_at``,
+        so when the counts show some were skipped, one primary read finds the
+        written ones.
+        """
+        if matched == len(ids):
+            return ids
+        if not matched:
+            return []
+        query = {"_id": {"$in": ids}, "updated_at": updated_at}
+        return [user["_id"] async for user in self.repo.iter_users(query, {"_id": 1}, sort=None, primary=True)]
+
+    async def _deleted_ids(self, ids: List[ObjectId], deleted: int) -> List[ObjectId]:
+        """
+        IDs in a chunk that a bulk delete actually removed.
+        
+        When the count shows some users were skipped (they stopped matching
+        the filter), one primary read finds the ones still present.
+        """
+        if deleted == len(ids):
+            return ids
+        if not deleted:
+            return []
+        query = {"_id": {"$in": ids}}
+        remaining = {user["_id"] async for user in self.repo.iter_users(query, {"_id": 1}, sort=None, primary=True)}
+        return [user_id for user_id in ids if user_id not in remaining]
+
+    async def _bulk_chunks(
+        self,
+        object_ids: Optional[List[ObjectId]],
+        query: Dict[str, Any],
+        projection: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yield the selected users in chunks of settings.BULK_WRITE_CHUNK_SIZE.
+        
+        Requested IDs are chunked as given (and only read when a projection
+        is needed); a filter is streamed from one ``_id``-ordered cursor.
+        Both read the primary: the selection decides what is written.
+        """
+        chunk_size = max(1, settings.BULK_WRITE_CHUNK_SIZE)
+        if object_ids is not None:
+            for start in range(0, len(object_ids), chunk_size):
+                ids = object_ids[start:start + chunk_size]
+                if projection is None:
+                    yield [{"_id": user_id} for user_id in ids]
+                else:
+                    yield [
+                        user async for user in self.repo.iter_users(
+                            {**query, "_id": {"$in": ids}}, projection, batch_size=chunk_size, sort=None, primary=True
+                        )
+                    ]
+            return
+        
+        chunk: List[Dict[str, Any]] = []
+        async for user in self.repo.iter_users(query, projection or {"_id": 1}, batch_size=chunk_size, primary=True):
+            chunk.append(user)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
@@ -0,0 +1,40 @@
+"""Shared fixtures: the application running against the in-memory MongoDB stand-in."""
+import os
+import sys
+
+# Settings are read at import time, so these must be set before the app is imported
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("HASH_EXECUTOR", "thread")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from benchmarks import fake_mongo  # noqa: E402
+
+STRONG_PASSWORD = "Test#Pass123"
+
+
+@pytest.fixture
+def fake_db():
+    """A fresh in-memory database installed as the application database."""
+    return fake_mongo.install()
+
+
+@pytest.fixture
+def users(fake_db):
+    """The in-memory users collection."""
+    from config import settings
+    return fake_db[settings.USERS_COLLECTION]
+
+
+@pytest.fixture
+def client(fake_db):
+    """Test client with startup and shutdown run around each test."""
+    from main import app
+    from services.cache import user_cache
+
+    user_cache.clear()
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,70 @@
+"""The availability filter never reports a taken username as free."""
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from benchmarks.fake_mongo import FakeCollection
+from repositories.user_repository import UserRepository
+from services.availability import AvailabilityIndex
+
+
+def user_doc(username, created_at):
+    return {"_id": ObjectId(), "username": username, "email": f"{username}@example.com", "created_at": created_at}
+
+
+def test_refresh_finds_users_older_than_a_local_create(users):
+    index = AvailabilityIndex(UserRepository())
+    now = datetime.utcnow()
+
+    async def scenario():
+        await users.insert_one(user_doc("first", now))
+        await index.build()
+        # This worker's clock runs an hour ahead of the one that creates "remote"
+        index.add_user(user_doc("local", now + timedelta(hours=1)))
+        await users.insert_one(user_doc("remote", now + timedelta(minutes=1)))
+        await index.refresh()
+        return await index.is_taken("username", "remote")
+
+    assert asyncio.run(scenario())
+    assert index.negatives == 0
+
+
+def test_delete_only_decrements_keys_the_filter_inserted(users, monkeypatch):
+    index = AvailabilityIndex(UserRepository())
+    old = user_doc("old", datetime.utcnow() - timedelta(days=30))
+    unseen = user_doc("unseen", datetime.utcnow())
+    local = user_doc("local", datetime.utcnow())
+    removed = []
+
+    async def scenario():
+        await users.insert_one(old)
+        await users.insert_one(user_doc("newest", datetime.utcnow()))
+        await index.build()
+        monkeypatch.setattr(index.filter, "remove", removed.append)
+        index.add_user(local)
+        # Created on another worker and deleted here before any refresh
+        index.remove_user(unseen)
+        # Inserted by the build, but long enough ago that it is not tracked
+        index.remove_user(old)
+        index.remove_user(local)
+
+    asyncio.run(scenario())
+
+    assert removed == ["username:local", "email:local@example.com"]
+
+
+def test_filter_reads_ignore_a_lagging_secondary(users, monkeypatch):
+    secondary = FakeCollection()
+    monkeypatch.setattr("repositories.user_repository.get_user_read_collection", lambda: secondary)
+    index = AvailabilityIndex(UserRepository())
+
+    async def scenario():
+        await users.insert_one(user_doc("taken", datetime.utcnow()))
+        await index.build()
+        await users.insert_one(user_doc("later", datetime.utcnow()))
+        await index.refresh()
+        return await index.is_taken("username", "taken"), await index.is_taken("username", "later")
+
+    assert asyncio.run(scenario()) == (True, True)
+    assert secondary.calls["find"] + secondary.calls["find_one"] == 0
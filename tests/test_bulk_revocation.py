@@ -0,0 +1,68 @@
+"""Bulk writes revoke tokens only for the users they actually changed."""
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from conftest import STRONG_PASSWORD
+
+
+@pytest.fixture
+def two_users(client):
+    """Two users with an issued token each: (id, token) pairs."""
+    pairs = []
+    for username in ("kept_a", "kept_b"):
+        response = client.post("/api/users/", json={
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": STRONG_PASSWORD,
+        })
+        token = client.post("/api/users/token", json={"username": username, "password": STRONG_PASSWORD})
+        pairs.append((response.json()["data"]["id"], token.json()["data"]["access_token"]))
+    return pairs
+
+
+def token_active(client, token):
+    return client.post("/api/users/token/introspect", json={"token": token}).json()["data"]["active"]
+
+
+def updated_concurrently(monkeypatch, users, method, user_id):
+    """Make ``user_id`` stop matching an updated_before filter just before the write."""
+    from routes.user_routes import user_service
+
+    write = getattr(user_service.repo, method)
+
+    async def write_after_concurrent_update(*args, **kwargs):
+        users.docs[ObjectId(user_id)]["updated_at"] = datetime.utcnow() + timedelta(days=1)
+        return await write(*args, **kwargs)
+
+    monkeypatch.setattr(user_service.repo, method, write_after_concurrent_update)
+
+
+def cutoff():
+    return (datetime.utcnow() + timedelta(hours=1)).isoformat()
+
+
+def test_bulk_deactivate_skips_users_that_stopped_matching(client, users, two_users, monkeypatch):
+    (_, written_token), (skipped_id, skipped_token) = two_users
+    updated_concurrently(monkeypatch, users, "update_many", skipped_id)
+
+    response = client.patch("/api/users/bulk", json={
+        "filter": {"updated_before": cutoff()}, "update": {"is_active": False}
+    })
+
+    assert response.json()["data"]["matched"] == 1
+    assert not token_active(client, written_token)
+    assert token_active(client, skipped_token)
+
+
+def test_bulk_delete_skips_users_that_stopped_matching(client, users, two_users, monkeypatch):
+    (_, deleted_token), (skipped_id, skipped_token) = two_users
+    updated_concurrently(monkeypatch, users, "delete_many", skipped_id)
+
+    response = client.post("/api/users/bulk-delete", json={"filter": {"updated_before": cutoff()}})
+
+    assert response.json()["data"]["deleted"] == 1
+    assert ObjectId(skipped_id) in users.docs
+    assert not token_active(client, deleted_token)
+    assert token_active(client, skipped_token)
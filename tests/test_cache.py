@@ -0,0 +1,53 @@
+"""The user cache stays consistent with writes."""
+from conftest import STRONG_PASSWORD
+
+
+def create_user(client, username):
+    response = client.post("/api/users/", json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": STRONG_PASSWORD,
+    })
+    assert response.status_code == 201
+    return response.json()["data"]["id"]
+
+
+def test_delete_by_uppercased_id_evicts_cached_user(client):
+    user_id = create_user(client, "cached")
+    # Fill the cache by ID and by username
+    assert client.get(f"/api/users/{user_id}").status_code == 200
+    assert client.get("/api/users/username/cached").status_code == 200
+
+    assert client.delete(f"/api/users/{user_id.upper()}").status_code == 204
+
+    assert client.get(f"/api/users/{user_id}").status_code == 404
+    assert client.get("/api/users/username/cached").status_code == 404
+
+
+def test_update_by_uppercased_id_is_seen_by_cached_reads(client):
+    user_id = create_user(client, "renamed")
+    assert client.get(f"/api/users/{user_id}").status_code == 200
+
+    response = client.put(f"/api/users/{user_id.upper()}", json={"full_name": "New Name"})
+
+    assert response.status_code == 200
+    assert client.get(f"/api/users/{user_id}").json()["data"]["full_name"] == "New Name"
+    assert client.get(f"/api/users/{user_id.upper()}").json()["data"]["full_name"] == "New Name"
+
+
+def test_read_cached_during_delete_is_evicted(client, monkeypatch):
+    from routes.user_routes import user_service
+
+    user_id = create_user(client, "racing")
+    stale = client.get(f"/api/users/{user_id}").json()["data"]
+    delete = user_service.repo.delete
+
+    async def delete_after_concurrent_read(target_id):
+        # A GET that missed the cache stores the user it loaded before the delete
+        user_service.cache.set(stale)
+        return await delete(target_id)
+
+    monkeypatch.setattr(user_service.repo, "delete", delete_after_concurrent_read)
+
+    assert client.delete(f"/api/users/{user_id}").status_code == 204
+    assert client.get(f"/api/users/{user_id}").status_code == 404
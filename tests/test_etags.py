@@ -0,0 +1,47 @@
+"""Conditional requests with ETags."""
+from conftest import STRONG_PASSWORD
+
+
+def create_and_tag(client):
+    response = client.post("/api/users/", json={
+        "username": "tagged",
+        "email": "tagged@example.com",
+        "password": STRONG_PASSWORD,
+    })
+    user_id = response.json()["data"]["id"]
+    return user_id, client.get(f"/api/users/{user_id}").headers["etag"]
+
+
+def test_if_match_with_current_tag_updates(client):
+    user_id, etag = create_and_tag(client)
+
+    response = client.put(f"/api/users/{user_id}", json={"full_name": "Tagged"}, headers={"If-Match": etag})
+
+    assert response.status_code == 200
+
+
+def test_if_match_rejects_weak_tag(client):
+    user_id, etag = create_and_tag(client)
+
+    response = client.put(f"/api/users/{user_id}", json={"full_name": "Tagged"}, headers={"If-Match": f"W/{etag}"})
+
+    assert response.status_code == 412
+    assert client.get(f"/api/users/{user_id}").json()["data"]["full_name"] != "Tagged"
+
+
+def test_if_match_ignores_weak_tags_in_a_list(client):
+    user_id, etag = create_and_tag(client)
+
+    response = client.put(
+        f"/api/users/{user_id}", json={"full_name": "Tagged"}, headers={"If-Match": f'W/"stale", {etag}'}
+    )
+
+    assert response.status_code == 200
+
+
+def test_if_none_match_accepts_weak_tag(client):
+    user_id, etag = create_and_tag(client)
+
+    response = client.get(f"/api/users/{user_id}", headers={"If-None-Match": f"W/{etag}"})
+
+    assert response.status_code == 304
@@ -0,0 +1,66 @@
+"""Bulk hashing shares the pool with interactive requests."""
+import asyncio
+
+from services.hashing import PasswordHasher, _verify
+
+
+def test_hash_many_uses_small_jobs_and_leaves_a_worker_free():
+    hasher = PasswordHasher(executor="thread", workers=4, rounds=4, batch_chunk_size=3)
+    passwords = [f"password-{i}" for i in range(20)]
+    jobs, running, peak = [], 0, 0
+    run = hasher._run
+
+    async def tracked_run(operation, func, *args):
+        nonlocal running, peak
+        jobs.append(len(args[0]))
+        running += 1
+        peak = max(peak, running)
+        try:
+            return await run(operation, func, *args)
+        finally:
+            running -= 1
+
+    hasher._run = tracked_run
+    try:
+        hashes = asyncio.run(hasher.hash_many(passwords))
+    finally:
+        hasher.shutdown()
+
+    assert max(jobs) <= 3 and sum(jobs) == len(passwords)
+    assert peak == 3
+    assert all(_verify(password, hashed) for password, hashed in zip(passwords, hashes))
+
+
+def test_single_hash_is_not_queued_behind_a_bulk_import():
+    hasher = PasswordHasher(executor="thread", workers=2, rounds=8, batch_chunk_size=2)
+
+    async def login_during_import():
+        bulk = asyncio.ensure_future(hasher.hash_many([f"password-{i}" for i in range(16)]))
+        await asyncio.sleep(0)
+        await hasher.hash("interactive")
+        return bulk.done(), await bulk
+
+    try:
+        bulk_done_first, hashes = asyncio.run(login_during_import())
+    finally:
+        hasher.shutdown()
+
+    assert not bulk_done_first
+    assert len(hashes) == 16
+
+
+def test_process_pool_does_not_fork_the_server():
+    hasher = PasswordHasher(executor="process", workers=1, rounds=4)
+
+    async def hash_and_verify():
+        hashed = await hasher.hash("process-password")
+        return hashed, await hasher.verify("process-password", hashed)
+
+    try:
+        hashed, verified = asyncio.run(hash_and_verify())
+        start_method = hasher._executor._mp_context.get_start_method()
+    finally:
+        hasher.shutdown()
+
+    assert verified and _verify("process-password", hashed)
+    assert start_method != "fork"
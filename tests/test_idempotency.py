@@ -0,0 +1,30 @@
+"""Idempotency keys shared between workers through MongoDB."""
+import asyncio
+
+from repositories.idempotency_repository import IdempotencyRepository
+from services.idempotency import IdempotencyStore
+
+
+def test_slow_operation_keeps_its_claim(fake_db):
+    # Two workers sharing the database; the create outlasts the lock period several times
+    first = IdempotencyStore(IdempotencyRepository(), backend="mongo", wait_timeout=2.0, lock_seconds=0.15)
+    second = IdempotencyStore(IdempotencyRepository(), backend="mongo", wait_timeout=2.0, lock_seconds=0.15)
+    runs = 0
+
+    async def slow_create():
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.6)
+        return {"id": "created"}
+
+    async def scenario():
+        original = asyncio.ensure_future(first.run("key-1", "fingerprint", slow_create))
+        await asyncio.sleep(0.3)
+        retry = await second.run("key-1", "fingerprint", slow_create)
+        return await original, retry
+
+    original, retry = asyncio.run(scenario())
+
+    assert runs == 1
+    assert original == ({"id": "created"}, False)
+    assert retry == ({"id": "created"}, True)
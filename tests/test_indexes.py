@@ -0,0 +1,21 @@
+"""Index definitions cover the queries that depend on them."""
+import asyncio
+
+from config import settings
+from services.db import USER_INDEXES, create_indexes, missing_indexes
+
+
+def test_keyset_listing_sort_is_indexed():
+    keys = [keys for keys, _ in USER_INDEXES]
+
+    assert [("created_at", -1), ("_id", -1)] in keys
+    assert [("is_active", 1), ("created_at", -1), ("_id", -1)] in keys
+
+
+def test_created_indexes_are_not_reported_missing(fake_db):
+    async def create_then_check():
+        await create_indexes(fake_db)
+        return await missing_indexes(fake_db)
+
+    assert asyncio.run(create_then_check()) == []
+    assert "is_active_1_created_at_-1__id_-1" in fake_db[settings.USERS_COLLECTION].indexes
@@ -0,0 +1,28 @@
+"""Keyset pagination cursors."""
+import base64
+import json
+
+import pytest
+
+
+def cursor_token(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor",
+    cursor_token({"t": None, "id": "zz"}),
+    cursor_token({"t": "2024-01-01T00:00:00", "id": "507f1f77bcf86cd79943901"}),
+    cursor_token({"t": "yesterday", "id": "507f1f77bcf86cd799439011"}),
+    cursor_token(["507f1f77bcf86cd799439011"]),
+])
+def test_malformed_cursor_is_rejected(client, cursor):
+    response = client.get("/api/users/", params={"cursor": cursor})
+
+    assert response.status_code == 400
+
+
+def test_well_formed_cursor_is_accepted(client):
+    response = client.get("/api/users/", params={"cursor": cursor_token({"t": None, "id": "507f1f77bcf86cd799439011"})})
+
+    assert response.status_code == 200
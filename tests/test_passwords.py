@@ -0,0 +1,89 @@
+"""Passwords longer than bcrypt's 72-byte input limit."""
+from conftest import STRONG_PASSWORD
+from services.hashing import BCRYPT_MAX_PASSWORD_BYTES, _hash, _verify
+
+# 47 characters but 90 bytes in UTF-8
+LONG_MULTIBYTE_PASSWORD = "Aa1!" + "é" * 43
+
+
+def test_create_rejects_password_over_72_bytes(client):
+    response = client.post("/api/users/", json={
+        "username": "longpass",
+        "email": "longpass@example.com",
+        "password": LONG_MULTIBYTE_PASSWORD,
+    })
+
+    assert response.status_code == 422
+    assert "72 bytes" in response.text
+
+
+def test_create_accepts_password_of_exactly_72_bytes(client):
+    password = STRONG_PASSWORD + "x" * (BCRYPT_MAX_PASSWORD_BYTES - len(STRONG_PASSWORD))
+    response = client.post("/api/users/", json={
+        "username": "maxpass",
+        "email": "maxpass@example.com",
+        "password": password,
+    })
+
+    assert response.status_code == 201
+    login = client.post("/api/users/authenticate", json={"username": "maxpass", "password": password})
+    assert login.status_code == 200
+
+
+def test_bulk_import_reports_long_password_per_row(client, users):
+    rows = [
+        {"username": "bulk_ok_1", "email": "bulk_ok_1@example.com", "password": STRONG_PASSWORD},
+        {"username": "bulk_long", "email": "bulk_long@example.com", "password": LONG_MULTIBYTE_PASSWORD},
+        {"username": "bulk_ok_2", "email": "bulk_ok_2@example.com", "password": STRONG_PASSWORD},
+    ]
+
+    response = client.post("/api/users/bulk", json=rows)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["summary"] == {"created": 2, "duplicate": 0, "invalid": 1, "retryable": 0}
+    assert [row["status"] for row in body["data"]] == ["created", "invalid", "created"]
+    assert "72 bytes" in body["data"][1]["error"]
+    assert {doc["username"] for doc in users.docs.values()} == {"bulk_ok_1", "bulk_ok_2"}
+
+
+def test_hash_and_verify_agree_on_long_input():
+    # A login rehash may still see a long password; both sides use the same first 72 bytes
+    hashed = _hash(LONG_MULTIBYTE_PASSWORD, 4)
+
+    assert _verify(LONG_MULTIBYTE_PASSWORD, hashed)
+    assert not _verify(STRONG_PASSWORD, hashed)
+
+
+def test_bulk_import_reports_rows_the_saturated_pool_could_not_hash(client, users, monkeypatch):
+    from exceptions import HashingOverloadedError
+    from services.hashing import password_hasher
+
+    hash_many = password_hasher.hash_many
+    calls = 0
+
+    async def overloaded_once(passwords, rounds=None):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise HashingOverloadedError()
+        return await hash_many(passwords, rounds)
+
+    monkeypatch.setattr(password_hasher, "hash_many", overloaded_once)
+    monkeypatch.setattr("config.settings.BULK_IMPORT_CHUNK_SIZE", 2)
+    rows = [
+        {"username": f"chunked_{i}", "email": f"chunked_{i}@example.com", "password": STRONG_PASSWORD}
+        for i in range(6)
+    ]
+
+    response = client.post("/api/users/bulk", json=rows)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["summary"] == {"created": 4, "duplicate": 0, "invalid": 0, "retryable": 2}
+    assert [row["status"] for row in body["data"]] == ["created"] * 2 + ["retryable"] * 2 + ["created"] * 2
+    assert {doc["username"] for doc in users.docs.values()} == {"chunked_0", "chunked_1", "chunked_4", "chunked_5"}
+
+    # Re-sending only the retryable rows creates them
+    retry = client.post("/api/users/bulk", json=rows[2:4])
+    assert retry.json()["summary"]["created"] == 2
@@ -0,0 +1,70 @@
+"""Reads that decide a write or fill the cache go to the primary."""
+from benchmarks.fake_mongo import FakeCollection
+from conftest import STRONG_PASSWORD
+
+
+def test_lagging_secondary_only_affects_listing(client, monkeypatch):
+    from routes.user_routes import user_service
+
+    # A secondary that has not replicated anything yet
+    secondary = FakeCollection()
+    monkeypatch.setattr("repositories.user_repository.get_user_read_collection", lambda: secondary)
+    user_service.repo._database = None
+
+    response = client.post("/api/users/", json={
+        "username": "fresh",
+        "email": "fresh@example.com",
+        "password": STRONG_PASSWORD,
+    })
+    user_id = response.json()["data"]["id"]
+
+    login = client.post("/api/users/authenticate", json={"username": "fresh", "password": STRONG_PASSWORD})
+    assert login.status_code == 200
+    assert client.get(f"/api/users/{user_id}").status_code == 200
+    assert client.get("/api/users/username/fresh").status_code == 200
+    assert client.put(f"/api/users/{user_id}", json={"full_name": "Fresh User"}).status_code == 200
+    bulk = client.post("/api/users/bulk-delete", json={"ids": [user_id]})
+    assert bulk.json()["data"]["deleted"] == 1
+
+    assert secondary.calls["find"] + secondary.calls["find_one"] == 0
+    # Listing keeps using the configured read preference
+    assert client.get("/api/users/").status_code == 200
+    assert secondary.calls["find"] == 1
+
+
+
+class SecondaryReads:
+    """A secondary that is fully caught up and counts the reads it serves."""
+
+    def __init__(self, primary):
+        self.primary = primary
+        self.reads = 0
+
+    def find_one(self, *args, **kwargs):
+        self.reads += 1
+        return self.primary.find_one(*args, **kwargs)
+
+    def find(self, *args, **kwargs):
+        self.reads += 1
+        return self.primary.find(*args, **kwargs)
+
+
+def test_gets_use_the_read_preference_when_nothing_is_cached(client, users, monkeypatch):
+    from routes.user_routes import user_service
+
+    secondary = SecondaryReads(users)
+    monkeypatch.setattr("repositories.user_repository.get_user_read_collection", lambda: secondary)
+    monkeypatch.setattr(user_service.cache, "max_size", 0)
+    user_service.repo._database = None
+    response = client.post("/api/users/", json={
+        "username": "uncached",
+        "email": "uncached@example.com",
+        "password": STRONG_PASSWORD,
+    })
+    user_id = response.json()["data"]["id"]
+
+    assert client.get(f"/api/users/{user_id}").status_code == 200
+    assert client.get("/api/users/username/uncached").status_code == 200
+    assert client.post("/api/users/batch-get", json={"ids": [user_id]}).status_code == 200
+
+    assert secondary.reads == 3
@@ -0,0 +1,63 @@
+"""The fast JSON path renders the same body as response-model validation."""
+import inspect
+import json
+from datetime import datetime
+from typing import Any, Literal, Union, get_args, get_origin
+
+import pytest
+from pydantic import BaseModel
+
+from config import settings
+from responses import render
+from schemas import user_schema
+
+RESPONSE_MODELS = [
+    model for name, model in inspect.getmembers(user_schema, inspect.isclass)
+    if name.endswith("ApiResponse") and issubclass(model, BaseModel) and not model.__pydantic_generic_metadata__["parameters"]
+]
+
+
+def minimal(annotation: Any) -> Any:
+    """A value for ``annotation`` that sets only required fields, all the way down."""
+    origin = get_origin(annotation)
+    if origin is list:
+        return [minimal(get_args(annotation)[0])]
+    if origin is Literal:
+        return get_args(annotation)[0]
+    if origin is Union:
+        return minimal(next(arg for arg in get_args(annotation) if arg is not type(None)))
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return {
+            name: minimal(field.annotation)
+            for name, field in annotation.model_fields.items() if field.is_required()
+        }
+    return {str: "value", int: 1, bool: True, datetime: datetime(2024, 1, 2, 3, 4, 5, 678000)}[annotation]
+
+
+@pytest.mark.parametrize("model", RESPONSE_MODELS, ids=lambda model: model.__name__)
+def test_fast_path_matches_model_dump_json(model, monkeypatch):
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", True)
+    content = minimal(model)
+    expected = json.loads(model.model_validate(content).model_dump_json())
+
+    response = render(content, model)
+
+    assert json.loads(response.body) == expected
+
+
+def test_fast_path_leaves_shared_payloads_unchanged(monkeypatch):
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", True)
+    cached_user = {"id": "507f1f77bcf86cd799439011", "username": "shared", "email": "shared@example.com"}
+
+    response = render({"status": "success", "data": cached_user}, user_schema.UserApiResponse)
+
+    assert json.loads(response.body)["data"]["is_active"] is True
+    assert cached_user == {"id": "507f1f77bcf86cd799439011", "username": "shared", "email": "shared@example.com"}
+
+
+def test_sparse_users_are_not_filled(monkeypatch):
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", True)
+
+    response = render({"status": "success", "data": {"id": "1"}}, user_schema.UserApiResponse, sparse=True)
+
+    assert json.loads(response.body) == {"status": "success", "message": None, "data": {"id": "1"}}
@@ -0,0 +1,65 @@
+"""Concurrent reads of the same user share one database query."""
+import asyncio
+
+import pytest
+from pymongo.errors import ServerSelectionTimeoutError
+
+from conftest import STRONG_PASSWORD
+from repositories.user_repository import UserRepository
+
+CONCURRENT_READS = 20
+
+
+def test_concurrent_gets_share_one_query(client, users):
+    from routes.user_routes import user_service
+
+    response = client.post("/api/users/", json={
+        "username": "popular",
+        "email": "popular@example.com",
+        "password": STRONG_PASSWORD,
+    })
+    user_id = response.json()["data"]["id"]
+    user_service.cache.clear()
+    users.reset_calls()
+    shared = user_service.repo.inflight.shared
+
+    async def concurrent_gets():
+        return await asyncio.gather(
+            *(user_service.get_user_with_etag(user_id) for _ in range(CONCURRENT_READS))
+        )
+
+    results = asyncio.run(concurrent_gets())
+
+    assert users.calls["find"] + users.calls["find_one"] == 1
+    assert user_service.repo.inflight.shared - shared == CONCURRENT_READS - 1
+    assert all(result == results[0] for result in results)
+    assert results[0][0]["username"] == "popular"
+
+
+def test_leader_error_reaches_every_waiter(fake_db, users, monkeypatch):
+    repo = UserRepository()
+    attempts = 0
+
+    async def failing_find_one(*args, **kwargs):
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(0)
+        raise ServerSelectionTimeoutError("no primary available")
+
+    monkeypatch.setattr(users, "find_one", failing_find_one)
+    user_id = "64b7f0c2a1b2c3d4e5f60718"
+
+    async def concurrent_gets():
+        return await asyncio.gather(
+            *(repo.get_by_id(user_id, projection={"username": 1}) for _ in range(CONCURRENT_READS)),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(concurrent_gets())
+
+    assert attempts == 1
+    assert all(isinstance(result, ServerSelectionTimeoutError) for result in results)
+    # The failed call is not remembered; the next caller queries again
+    with pytest.raises(ServerSelectionTimeoutError):
+        asyncio.run(repo.get_by_id(user_id, projection={"username": 1}))
+    assert attempts == 2
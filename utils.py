@@ -1,6 +1,15 @@
-"""Utility functions for password validation."""
+"""Utility functions for password validation, sanitization, pagination, ETags and prefix ranges."""
+import base64
+import hashlib
+import json
 import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
 from config import settings
+from exceptions import InvalidUserDataError
+from models.user_model import USER_FIELDS
 
 
 def validate_password_strength(password: str) -> tuple[bool, str]:
@@ -41,3 +50,227 @@ def sanitize_update_data(data: dict) -> dict:
     # Remove sensitive fields that shouldn't be updated directly
     forbidden_fields = {'_id', 'password', 'created_at'}
     return {k: v for k, v in data.items() if k not in forbidden_fields}
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated ``fields`` query parameter.
+    
+    Args:
+        fields: Comma-separated response field names, or None
+        
+    Returns:
+        Requested field names in order without duplicates, or None when
+        no selection was requested
+        
+    Raises:
+        InvalidUserDataError: If the selection is empty or names unknown fields
+    """
+    if fields is None:
+        return None
+    
+    requested = list(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in requested if field not in USER_FIELDS]
+    if not requested or unknown:
+        raise InvalidUserDataError(
+            f"Invalid fields: {', '.join(unknown) or fields!r}. Allowed: {', '.join(USER_FIELDS)}"
+        )
+    return requested
+
+
+def utcnow() -> datetime:
+    """
+    Current UTC time truncated to millisecond precision.
+    
+    MongoDB stores datetimes with millisecond precision, so truncating up
+    front keeps in-memory documents identical to what a later read returns.
+    """
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond - now.microsecond % 1000)
+
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def user_etag(user_id: str, updated_at: Optional[datetime], fields: Optional[Sequence[str]] = None) -> str:
+    """
+    Build a strong ETag for a user representation.
+    
+    The tag is ``"<id>.<updated_at in microseconds, hex>"``, with a short
+    digest of the selected fields appended for sparse responses so each
+    field selection has its own tag.
+    
+    Args:
+        user_id: User ID as string
+        updated_at: Last update timestamp (None for documents that never had one)
+        fields: Response fields for sparse responses
+        
+    Returns:
+        Quoted ETag value
+    """
+    version = (updated_at - _EPOCH) // _MICROSECOND if updated_at else 0
+    tag = f"{user_id}.{version:x}"
+    if fields:
+        tag += "." + hashlib.sha1(",".join(fields).encode("utf-8")).hexdigest()[:8]
+    return f'"{tag}"'
+
+
+def parse_etags(header: Optional[str], strong: bool = False) -> List[str]:
+    """
+    Split an If-Match / If-None-Match header into entity tags.
+    
+    Args:
+        header: Raw header value
+        strong: Drop weak (``W/``) tags, which never match under the strong
+            comparison If-Match requires (RFC 9110, section 13.1.1)
+        
+    Returns:
+        Quoted tags with any weak ``W/`` prefix removed, or ``["*"]``
+    """
+    if not header:
+        return []
+    tags = []
+    for part in header.split(","):
+        part = part.strip()
+        if part.startswith("W/"):
+            if strong:
+                continue
+            part = part[2:]
+        if part:
+            tags.append(part)
+    return tags
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches the current ETag.
+    
+    Args:
+        if_none_match: Raw header value
+        etag: Current quoted ETag
+        
+    Returns:
+        True if the client's copy is current
+    """
+    tags = parse_etags(if_none_match)
+    return "*" in tags or etag in tags
+
+
+def etag_version(tag: str) -> Optional[Tuple[str, Optional[datetime]]]:
+    """
+    Recover the user ID and updated_at encoded in a tag from ``user_etag``.
+    
+    Args:
+        tag: Quoted ETag
+        
+    Returns:
+        Tuple of (user_id, updated_at), or None if the tag is not one of ours
+    """
+    parts = tag.strip('"').split(".")
+    if len(parts) not in (2, 3):
+        return None
+    try:
+        version = int(parts[1], 16)
+    except ValueError:
+        return None
+    return parts[0], (_EPOCH + version * _MICROSECOND if version else None)
+
+
+def encode_cursor(created_at: Optional[datetime], user_id: ObjectId) -> str:
+    """
+    Encode a keyset position as an opaque URL-safe token.
+    
+    Args:
+        created_at: Creation timestamp of the last returned user
+        user_id: ObjectId of the last returned user
+        
+    Returns:
+        Cursor token string
+    """
+    payload = {"t": created_at.isoformat() if created_at else None, "id": str(user_id)}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[Optional[datetime], ObjectId]]:
+    """
+    Decode a cursor token produced by ``encode_cursor``.
+    
+    Args:
+        cursor: Cursor token string
+        
+    Returns:
+        Tuple of (created_at, ObjectId), or None if the token is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        created_at = datetime.fromisoformat(payload["t"]) if payload["t"] else None
+        return created_at, ObjectId(payload["id"])
+    except (ValueError, TypeError, KeyError, UnicodeDecodeError, json.JSONDecodeError, InvalidId):
+        return None
+
+
+def parse_json_rows(body: bytes) -> List[Any]:
+    """
+    Parse a request body holding a JSON array or newline-delimited JSON.
+    
+    Args:
+        body: Raw request body
+        
+    Returns:
+        Parsed rows; an NDJSON line that is not valid JSON is returned as an
+        InvalidUserDataError in its position so it can be reported per row
+        
+    Raises:
+        InvalidUserDataError: If a JSON array body is malformed
+    """
+    text = body.decode("utf-8", errors="replace").strip()
+    if text.startswith("["):
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise InvalidUserDataError(f"Invalid JSON array: {e.msg}")
+        if not isinstance(rows, list):
+            raise InvalidUserDataError("Expected a JSON array of users")
+        return rows
+    
+    rows: List[Any] = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            rows.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            rows.append(InvalidUserDataError(f"Invalid JSON: {e.msg}"))
+    return rows
+
+
+def prefix_range(prefix: str) -> Dict[str, str]:
+    """
+    Range condition matching every string that starts with ``prefix``.
+    
+    Unlike a regex, a ``$gte``/``$lt`` pair is always answered with a
+    bounded scan of an ascending index. The upper bound is the prefix with
+    its last code point incremented; MongoDB's binary string order is
+    code point order.
+    
+    Args:
+        prefix: Non-empty prefix
+        
+    Returns:
+        Condition for a MongoDB filter, e.g. ``{"$gte": "jo", "$lt": "jp"}``
+    """
+    condition = {"$gte": prefix}
+    stem = prefix
+    while stem:
+        code = ord(stem[-1]) + 1
+        if 0xD800 <= code <= 0xDFFF:
+            # Surrogates cannot be encoded; the next valid code point follows them
+            code = 0xE000
+        if code <= 0x10FFFF:
+            condition["$lt"] = stem[:-1] + chr(code)
+            break
+        stem = stem[:-1]
+    return condition